@@ -1,5 +1,6 @@
 from rest_framework import serializers, viewsets
 from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
 from apps.accounts.models import CustomField
 
 
@@ -14,14 +15,38 @@ class CustomFieldSerializer(serializers.ModelSerializer):
 
 
 class CustomFieldViewSet(viewsets.ReadOnlyModelViewSet):
-    """Public read-only endpoint for WP plugin to fetch field definitions."""
+    """
+    Public read-only endpoint for WP plugin to fetch field definitions.
+
+    The list is served from the compiled custom field schema with an ETag,
+    so the plugin can revalidate with If-None-Match and get a 304.
+    """
     serializer_class = CustomFieldSerializer
     pagination_class = None
     permission_classes = [AllowAny]
 
+    # Seconds clients may reuse the list before revalidating
+    LIST_MAX_AGE = 300
+
     def get_queryset(self):
         qs = CustomField.objects.filter(is_active=True)
         applies_to = self.request.query_params.get('applies_to')
         if applies_to in ('transfer', 'trip'):
             qs = qs.filter(applies_to__in=[applies_to, 'both'])
         return qs.order_by('display_order', 'label')
+
+    def list(self, request, *args, **kwargs):
+        from django.utils.cache import get_conditional_response
+        from apps.accounts.custom_field_schema import custom_field_schema
+
+        applies_to = request.query_params.get('applies_to')
+        schema = custom_field_schema(applies_to if applies_to in ('transfer', 'trip') else None)
+
+        etag = f'"{schema.etag}"'
+        cache_control = f'public, max-age={self.LIST_MAX_AGE}'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response(list(schema.fields))
+        response['ETag'] = etag
+        response['Cache-Control'] = cache_control
+        return response
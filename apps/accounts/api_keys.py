@@ -66,3 +66,38 @@ class APIKey(models.Model):
     def hash_key(cls, raw_key):
         """Hash a raw API key for lookup."""
         return hashlib.sha256(raw_key.encode()).hexdigest()
+
+
+class APIKeyUsage(models.Model):
+    """Hourly request counters per API key and endpoint (rolled up from Redis, see apps.accounts.usage)."""
+
+    api_key = models.ForeignKey(
+        APIKey,
+        on_delete=models.CASCADE,
+        related_name='usage',
+        verbose_name=_('API key'),
+    )
+    hour = models.DateTimeField(_('hour'))
+    endpoint = models.CharField(_('endpoint'), max_length=200)
+    requests = models.PositiveIntegerField(_('requests'), default=0)
+    errors = models.PositiveIntegerField(_('errors'), default=0)
+    latency_ms_total = models.PositiveBigIntegerField(_('total latency (ms)'), default=0)
+    latency_histogram = models.JSONField(
+        _('latency histogram'),
+        default=list,
+        help_text=_('Request counts per latency bucket (see apps.accounts.usage.LATENCY_BUCKETS_MS)'),
+    )
+
+    class Meta:
+        verbose_name = _('API key usage')
+        verbose_name_plural = _('API key usage')
+        ordering = ['-hour', 'endpoint']
+        constraints = [
+            models.UniqueConstraint(fields=['api_key', 'hour', 'endpoint'], name='unique_api_key_usage_hour'),
+        ]
+        indexes = [
+            models.Index(fields=['api_key', '-hour'], name='api_key_usage_key_hour'),
+        ]
+
+    def __str__(self):
+        return f"{self.api_key_id} {self.endpoint} @ {self.hour:%Y-%m-%d %H:00}"
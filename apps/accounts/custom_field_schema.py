@@ -0,0 +1,103 @@
+"""
+Compiled CustomField schema for booking forms.
+
+Active custom fields are compiled once per process into a schema per booking
+type ('transfer', 'trip', or None for every active field): the ordered field
+definitions served to the plugin, the required fields and the select choices.
+Booking serializers validate submitted values against it in memory, and any
+CustomField write bumps the shared version (see apps.accounts.signals).
+"""
+import hashlib
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import validate_email
+from django.utils.dateparse import parse_date
+
+from config.process_cache import ProcessCache
+
+CUSTOM_FIELD_VERSION_KEY = 'accounts:custom_fields:version'
+
+# Fields as served by the public custom-fields endpoint
+SCHEMA_FIELDS = (
+    'id', 'name', 'label', 'field_type', 'placeholder',
+    'help_text_field', 'options', 'is_required', 'applies_to',
+    'display_order',
+)
+
+
+class CustomFieldSchema:
+    """Active custom fields for one booking type, ready for in-memory validation."""
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self.by_name = {f['name']: f for f in self.fields}
+        self.required = tuple(f for f in self.fields if f['is_required'])
+        self.choices = {
+            f['name']: {str(option) for option in f['options']}
+            for f in self.fields if f['field_type'] == 'select' and f['options']
+        }
+        body = json.dumps(self.fields, sort_keys=True, separators=(',', ':'))
+        self.etag = hashlib.sha256(body.encode('utf-8')).hexdigest()[:32]
+
+    def validate(self, values):
+        """Return {field name: message} for every problem in the submitted values."""
+        errors = {}
+        for field in self.required:
+            if field['name'] not in values or not str(values[field['name']]).strip():
+                errors[field['name']] = f"{field['label']} is required."
+
+        for name, value in values.items():
+            field = self.by_name.get(name)
+            if field is None or name in errors or value in (None, '') or not str(value).strip():
+                continue
+            field_type = field['field_type']
+            text = str(value).strip()
+            if name in self.choices and text not in self.choices[name]:
+                errors[name] = f"{field['label']}: select one of the available options."
+            elif field_type == 'number':
+                try:
+                    float(text)
+                except ValueError:
+                    errors[name] = f"{field['label']} must be a number."
+            elif field_type == 'email':
+                try:
+                    validate_email(text)
+                except DjangoValidationError:
+                    errors[name] = f"{field['label']} must be a valid email address."
+            elif field_type == 'date':
+                try:
+                    valid = parse_date(text) is not None
+                except ValueError:
+                    valid = False
+                if not valid:
+                    errors[name] = f"{field['label']} must be a date (YYYY-MM-DD)."
+        return errors
+
+
+def _compile(version=None):
+    from apps.accounts.models import CustomField
+
+    fields = list(
+        CustomField.objects.filter(is_active=True)
+        .order_by('display_order', 'label')
+        .values(*SCHEMA_FIELDS)
+    )
+    return {
+        None: CustomFieldSchema(fields),
+        'transfer': CustomFieldSchema(f for f in fields if f['applies_to'] in ('transfer', 'both')),
+        'trip': CustomFieldSchema(f for f in fields if f['applies_to'] in ('trip', 'both')),
+    }
+
+
+_schemas = ProcessCache(CUSTOM_FIELD_VERSION_KEY, _compile)
+
+
+def custom_field_schema(booking_type=None):
+    """Compiled schema for 'transfer' or 'trip' bookings, or for every active field."""
+    return _schemas.get()[booking_type]
+
+
+def invalidate_custom_field_schema():
+    """Recompile the schema in every worker after the current transaction commits."""
+    _schemas.invalidate()
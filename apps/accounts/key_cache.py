@@ -0,0 +1,128 @@
+"""
+API key resolution cache with write-behind last_used_at.
+
+Resolving an X-API-Key header used to cost a SELECT and an UPDATE on every
+request. Resolved keys are now kept in a bounded per-process LRU keyed on the
+key hash, for at most API_KEY_CACHE_TTL seconds; any APIKey save or delete
+bumps a shared version so every worker drops its entries (see
+apps.accounts.signals).
+
+Usage stamps go to a Redis hash (key id -> unix time) and are written to
+APIKey.last_used_at in one batch by the flush_api_key_usage task. Without a
+Redis cache backend (local settings) stamps are written straight through.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+
+from config.process_cache import ProcessCache
+
+logger = logging.getLogger(__name__)
+
+API_KEY_VERSION_KEY = 'accounts:api_keys:version'
+API_KEY_USAGE_HASH = 'accounts:api_keys:last_used'
+
+# A process re-stamps the same key in Redis at most this often (seconds)
+USAGE_STAMP_INTERVAL = 5
+
+
+def redis_connection():
+    """Raw Redis connection of the default cache, or None for other backends."""
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+    except Exception:
+        return None
+
+
+class APIKeyCache:
+    """Bounded LRU of resolved APIKey rows, keyed on the key hash."""
+
+    def __init__(self):
+        # version -> OrderedDict(hash -> (APIKey, cached_at))
+        self._entries = ProcessCache(API_KEY_VERSION_KEY, lambda version: OrderedDict())
+        self._lock = threading.Lock()
+        # api_key pk -> monotonic time of the last stamp sent to Redis
+        self._stamped = {}
+
+    def resolve(self, raw_key):
+        """Return the active APIKey for a raw key, or None. Expiry is left to the caller."""
+        from apps.accounts.api_keys import APIKey
+
+        hashed = APIKey.hash_key(raw_key)
+        ttl = getattr(settings, 'API_KEY_CACHE_TTL', 60)
+        entries = self._entries.get()
+        now = time.monotonic()
+
+        with self._lock:
+            entry = entries.get(hashed)
+            if entry is not None and now - entry[1] < ttl:
+                entries.move_to_end(hashed)
+                return entry[0]
+
+        try:
+            api_key = APIKey.objects.select_related('owner').get(key=hashed, is_active=True)
+        except APIKey.DoesNotExist:
+            return None
+
+        with self._lock:
+            entries[hashed] = (api_key, now)
+            entries.move_to_end(hashed)
+            while len(entries) > getattr(settings, 'API_KEY_CACHE_SIZE', 1024):
+                entries.popitem(last=False)
+        return api_key
+
+    def record_use(self, api_key):
+        """Stamp last_used_at: into Redis for the next flush, or straight to the row."""
+        from django.utils import timezone
+        from apps.accounts.api_keys import APIKey
+
+        now = time.monotonic()
+        last = self._stamped.get(api_key.pk)
+        if last is not None and now - last < USAGE_STAMP_INTERVAL:
+            return
+        self._stamped[api_key.pk] = now
+
+        redis = redis_connection()
+        if redis is not None:
+            try:
+                redis.hset(API_KEY_USAGE_HASH, api_key.pk, time.time())
+                return
+            except Exception:
+                logger.warning('Could not record API key usage in Redis', exc_info=True)
+        APIKey.objects.filter(pk=api_key.pk).update(last_used_at=timezone.now())
+
+    def invalidate(self):
+        """Drop cached keys in every worker (after the current transaction commits)."""
+        self._entries.invalidate()
+
+
+def flush_api_key_usage():
+    """Write the buffered last_used_at stamps to APIKey in one batch. Returns the number of keys."""
+    from apps.accounts.api_keys import APIKey
+
+    redis = redis_connection()
+    if redis is None:
+        return 0
+
+    # Read and clear atomically so stamps arriving meanwhile wait for the next flush
+    pipe = redis.pipeline(transaction=True)
+    pipe.hgetall(API_KEY_USAGE_HASH)
+    pipe.delete(API_KEY_USAGE_HASH)
+    stamps, _ = pipe.execute()
+    if not stamps:
+        return 0
+
+    api_keys = [
+        APIKey(pk=int(pk), last_used_at=datetime.fromtimestamp(float(ts), tz=dt_timezone.utc))
+        for pk, ts in stamps.items()
+    ]
+    APIKey.objects.bulk_update(api_keys, ['last_used_at'], batch_size=500)
+    return len(api_keys)
+
+
+api_key_cache = APIKeyCache()
@@ -1,3 +1,5 @@
+import time
+
 from django.conf import settings
 from django.utils import translation
 
@@ -33,3 +35,28 @@ class LanguageMiddleware:
 
         response = self.get_response(request)
         return response
+
+
+class APIKeyUsageMiddleware:
+    """
+    Meter requests made with an API key (see apps.accounts.usage).
+
+    The API key permissions attach the resolved key to the request; requests
+    without one are not recorded. Only Redis is written on the request path.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.monotonic()
+        response = self.get_response(request)
+
+        api_key = getattr(request, 'api_key', None)
+        if api_key is not None:
+            from apps.accounts.usage import record_usage
+
+            match = getattr(request, 'resolver_match', None)
+            endpoint = f'{request.method} {match.view_name}' if match else 'unresolved'
+            record_usage(api_key.pk, endpoint, response.status_code, (time.monotonic() - start) * 1000)
+        return response
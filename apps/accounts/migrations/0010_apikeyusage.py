@@ -0,0 +1,32 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_add_supplier_role'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='APIKeyUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(verbose_name='hour')),
+                ('endpoint', models.CharField(max_length=200, verbose_name='endpoint')),
+                ('requests', models.PositiveIntegerField(default=0, verbose_name='requests')),
+                ('errors', models.PositiveIntegerField(default=0, verbose_name='errors')),
+                ('latency_ms_total', models.PositiveBigIntegerField(default=0, verbose_name='total latency (ms)')),
+                ('latency_histogram', models.JSONField(default=list, help_text='Request counts per latency bucket (see apps.accounts.usage.LATENCY_BUCKETS_MS)', verbose_name='latency histogram')),
+                ('api_key', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage', to='accounts.apikey', verbose_name='API key')),
+            ],
+            options={
+                'verbose_name': 'API key usage',
+                'verbose_name_plural': 'API key usage',
+                'ordering': ['-hour', 'endpoint'],
+                'constraints': [models.UniqueConstraint(fields=('api_key', 'hour', 'endpoint'), name='unique_api_key_usage_hour')],
+                'indexes': [models.Index(fields=['api_key', '-hour'], name='api_key_usage_key_hour')],
+            },
+        ),
+    ]
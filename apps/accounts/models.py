@@ -1,7 +1,13 @@
+import copy
+
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from config.process_cache import ProcessCache
+
+SITE_SETTINGS_VERSION_KEY = 'accounts:site_settings:version'
+
 
 class UserManager(BaseUserManager):
     """Custom user manager for email-based authentication."""
@@ -266,10 +272,29 @@ class SiteSettings(models.Model):
 
     @classmethod
     def get_settings(cls):
-        """Get or create the singleton settings instance."""
+        """
+        Get the singleton settings instance.
+
+        Served from process memory and reloaded after any save or delete (see
+        apps.accounts.signals). Each caller gets its own copy, so it may be
+        modified and saved.
+        """
+        return copy.copy(_site_settings.get())
+
+    @classmethod
+    def load(cls, version=None):
+        """Get or create the singleton settings instance from the database."""
         settings, _ = cls.objects.get_or_create(pk=1)
         return settings
 
+    @classmethod
+    def invalidate_cache(cls):
+        """Make every worker reload the settings on its next get_settings()."""
+        _site_settings.invalidate()
+
+
+_site_settings = ProcessCache(SITE_SETTINGS_VERSION_KEY, SiteSettings.load)
+
 
 class CustomField(models.Model):
     """Admin-defined custom fields for booking forms."""
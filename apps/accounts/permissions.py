@@ -1,7 +1,27 @@
 from django.utils import timezone
 from rest_framework.permissions import BasePermission
 
-from apps.accounts.api_keys import APIKey
+from apps.accounts.key_cache import api_key_cache
+
+
+def _authenticate_api_key(request, raw_key):
+    """Resolve and stamp a raw API key; attach it to the request. Returns True if valid."""
+    api_key = api_key_cache.resolve(raw_key)
+    if api_key is None:
+        return False
+
+    # Check expiry
+    if api_key.expires_at and api_key.expires_at < timezone.now():
+        return False
+
+    # Stamp last_used_at (buffered in Redis, flushed by flush_api_key_usage)
+    api_key_cache.record_use(api_key)
+
+    # Attach to request for downstream use (throttling, etc.), and to the
+    # underlying HttpRequest for APIKeyUsageMiddleware
+    request.api_key = api_key
+    getattr(request, '_request', request).api_key = api_key
+    return True
 
 
 class HasAPIKey(BasePermission):
@@ -11,23 +31,7 @@ class HasAPIKey(BasePermission):
         raw_key = request.META.get('HTTP_X_API_KEY', '')
         if not raw_key:
             return False
-
-        hashed = APIKey.hash_key(raw_key)
-        try:
-            api_key = APIKey.objects.select_related('owner').get(key=hashed, is_active=True)
-        except APIKey.DoesNotExist:
-            return False
-
-        # Check expiry
-        if api_key.expires_at and api_key.expires_at < timezone.now():
-            return False
-
-        # Stamp last_used_at
-        APIKey.objects.filter(pk=api_key.pk).update(last_used_at=timezone.now())
-
-        # Attach to request for downstream use (throttling, etc.)
-        request.api_key = api_key
-        return True
+        return _authenticate_api_key(request, raw_key)
 
 
 class HasAPIKeyOrIsAuthenticated(BasePermission):
@@ -37,18 +41,7 @@ class HasAPIKeyOrIsAuthenticated(BasePermission):
         # Try API key first
         raw_key = request.META.get('HTTP_X_API_KEY', '')
         if raw_key:
-            hashed = APIKey.hash_key(raw_key)
-            try:
-                api_key = APIKey.objects.select_related('owner').get(key=hashed, is_active=True)
-            except APIKey.DoesNotExist:
-                return False
-
-            if api_key.expires_at and api_key.expires_at < timezone.now():
-                return False
-
-            APIKey.objects.filter(pk=api_key.pk).update(last_used_at=timezone.now())
-            request.api_key = api_key
-            return True
+            return _authenticate_api_key(request, raw_key)
 
         # Fall back to normal authentication
         return request.user and request.user.is_authenticated
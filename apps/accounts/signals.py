@@ -1,6 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import User, Profile
+from .api_keys import APIKey
+from .key_cache import api_key_cache
+from .custom_field_schema import invalidate_custom_field_schema
+from .models import User, Profile, SiteSettings, CustomField
 
 
 @receiver(post_save, sender=User)
@@ -15,3 +18,24 @@ def save_user_profile(sender, instance, **kwargs):
     """Save the Profile when the User is saved."""
     if hasattr(instance, 'profile'):
         instance.profile.save()
+
+
+@receiver(post_save, sender=APIKey)
+@receiver(post_delete, sender=APIKey)
+def invalidate_api_key_cache(sender, **kwargs):
+    """Revoked or edited keys must stop resolving from worker caches."""
+    api_key_cache.invalidate()
+
+
+@receiver(post_save, sender=SiteSettings)
+@receiver(post_delete, sender=SiteSettings)
+def invalidate_site_settings(sender, **kwargs):
+    """Reload the cached SiteSettings in every worker."""
+    SiteSettings.invalidate_cache()
+
+
+@receiver(post_save, sender=CustomField)
+@receiver(post_delete, sender=CustomField)
+def invalidate_custom_fields(sender, **kwargs):
+    """Recompile the booking form schema in every worker."""
+    invalidate_custom_field_schema()
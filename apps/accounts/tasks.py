@@ -0,0 +1,24 @@
+import logging
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def flush_api_key_usage():
+    """Write buffered API key last_used_at stamps to the database (scheduled by celery beat)."""
+    from .key_cache import flush_api_key_usage as flush
+
+    flushed = flush()
+    if flushed:
+        logger.info(f"Flushed last_used_at for {flushed} API key(s)")
+
+
+@shared_task(ignore_result=True)
+def rollup_api_key_usage():
+    """Fold per-minute API key usage counters from Redis into hourly rows (scheduled by celery beat)."""
+    from .usage import rollup_usage
+
+    buckets = rollup_usage()
+    if buckets:
+        logger.info(f"Rolled up {buckets} minute bucket(s) of API key usage")
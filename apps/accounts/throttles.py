@@ -1,7 +1,116 @@
+"""
+API throttles backed by an atomic Redis token bucket.
+
+DRF's SimpleRateThrottle keeps a list of request timestamps per client in the
+cache and rewrites it on every request, which is O(rate) per request and racy
+across workers. RedisRateThrottle keeps the same rates ("100/min") but stores
+a token bucket per client in a Redis hash and updates it in one Lua call:
+the bucket refills at ``num_requests / duration`` tokens per second and holds
+``num_requests + burst`` tokens, so a client can burst above its rate
+briefly but never exceeds it over time. Retry-After is the time until the
+next token. Without a Redis cache backend the DRF implementation is used.
+"""
+import logging
+
+from django.conf import settings
 from rest_framework.throttling import SimpleRateThrottle
 
+logger = logging.getLogger(__name__)
+
+# KEYS[1] bucket; ARGV[1] capacity, ARGV[2] refill tokens/second.
+# Returns {allowed (0/1), seconds to wait as a string (Lua numbers are truncated to integers)}.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * refill)
+
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / refill
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / refill * 1000) + 1000)
+return {allowed, tostring(wait)}
+"""
+
+
+class RedisRateThrottle(SimpleRateThrottle):
+    """
+    SimpleRateThrottle with the history replaced by a Redis token bucket.
+
+    Subclasses keep DRF's get_cache_key/get_rate contract and may override
+    get_burst(). Point ``connection()`` at fakeredis or a local Redis to test.
+    """
+
+    # Registered token bucket script per Redis client, so a request is one EVALSHA
+    _scripts = {}
+
+    def connection(self):
+        """Raw Redis client of the default cache, or None for other backends."""
+        try:
+            from django_redis import get_redis_connection
+            return get_redis_connection('default')
+        except Exception:
+            return None
+
+    def get_burst(self, request):
+        """Extra requests allowed above the rate in a short burst."""
+        return 0
+
+    def token_bucket(self, redis):
+        """The token bucket Script bound to ``redis``, registered once per client."""
+        script = RedisRateThrottle._scripts.get(redis)
+        if script is None:
+            script = RedisRateThrottle._scripts[redis] = redis.register_script(TOKEN_BUCKET_SCRIPT)
+        return script
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        redis = self.connection()
+        if redis is None:
+            self._wait = None
+            return super().allow_request(request, view)
+
+        capacity = self.num_requests + self.get_burst(request)
+        refill = self.num_requests / self.duration
+        try:
+            allowed, wait = self.token_bucket(redis)(keys=[f'throttle:{self.key}'], args=[capacity, refill])
+        except Exception:
+            # Fail open: an unavailable limiter must not take the API down
+            logger.warning('Rate limiter unavailable; allowing request', exc_info=True)
+            return True
+
+        self._wait = float(wait)
+        return bool(int(allowed))
 
-class APIKeyRateThrottle(SimpleRateThrottle):
+    def wait(self):
+        if getattr(self, '_wait', None) is None:
+            return super().wait()
+        return self._wait
+
+
+class APIKeyRateThrottle(RedisRateThrottle):
     """Dynamic rate throttle based on API key tier or IP for anonymous users."""
 
     scope = 'anon'
@@ -22,6 +131,12 @@ class APIKeyRateThrottle(SimpleRateThrottle):
                 return f'{api_key.rate_limit}/min'
         return '30/min'
 
+    def get_burst(self, request):
+        api_key = getattr(request, 'api_key', None)
+        if not api_key:
+            return 0
+        return getattr(settings, 'API_KEY_TIER_BURST', {}).get(api_key.tier, 0)
+
     def allow_request(self, request, view):
         # Store request so get_rate() can access it
         self.request = request
@@ -29,3 +144,17 @@ class APIKeyRateThrottle(SimpleRateThrottle):
         self.rate = self.get_rate()
         self.num_requests, self.duration = self.parse_rate(self.rate)
         return super().allow_request(request, view)
+
+
+class BulkQuoteRateThrottle(RedisRateThrottle):
+    """
+    Separate budget for bulk quotes so a large manifest does not use up the
+    key's per-minute rate_limit. Rate from DEFAULT_THROTTLE_RATES['bulk_quote'].
+    """
+
+    scope = 'bulk_quote'
+
+    def get_cache_key(self, request, view):
+        api_key = getattr(request, 'api_key', None)
+        ident = f'apikey_{api_key.pk}' if api_key else self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
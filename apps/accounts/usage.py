@@ -0,0 +1,192 @@
+"""
+Per-API-key usage metering.
+
+APIKeyUsageMiddleware records every request made with an API key into a
+Redis hash per minute: request count, error count (status >= 400), total
+latency and a fixed latency histogram per key and endpoint. Recording is one
+pipelined round trip to Redis and never touches the database.
+
+The rollup_api_key_usage task folds completed minute buckets into hourly
+APIKeyUsage rows, adding to rows that already exist for the hour. Each bucket
+is claimed (read and deleted in one MULTI) before anything is written, so an
+overlapping or retried rollup cannot count it twice. The dashboard reads the
+hourly table only.
+"""
+import logging
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from .key_cache import redis_connection
+
+logger = logging.getLogger(__name__)
+
+USAGE_KEY_PREFIX = 'accounts:api_usage:m:'
+
+# Upper bounds of the latency histogram buckets; one more bucket counts slower requests
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000)
+
+# Minute buckets outlive a missed rollup or two before Redis drops them
+MINUTE_BUCKET_TTL = 6 * 3600
+
+
+def _latency_bucket(elapsed_ms):
+    for index, bound in enumerate(LATENCY_BUCKETS_MS):
+        if elapsed_ms <= bound:
+            return index
+    return len(LATENCY_BUCKETS_MS)
+
+
+def record_usage(api_key_id, endpoint, status_code, elapsed_ms):
+    """Count one request in the current minute bucket. Best effort; never raises."""
+    redis = redis_connection()
+    if redis is None:
+        return
+    minute = int(time.time() // 60)
+    key = f'{USAGE_KEY_PREFIX}{minute}'
+    field = f'{api_key_id}|{endpoint}'
+    try:
+        pipe = redis.pipeline(transaction=False)
+        pipe.hincrby(key, f'{field}|n', 1)
+        if status_code >= 400:
+            pipe.hincrby(key, f'{field}|e', 1)
+        pipe.hincrby(key, f'{field}|t', int(elapsed_ms))
+        pipe.hincrby(key, f'{field}|h{_latency_bucket(elapsed_ms)}', 1)
+        pipe.expire(key, MINUTE_BUCKET_TTL)
+        pipe.execute()
+    except Exception:
+        logger.debug('Could not record API key usage', exc_info=True)
+
+
+def _hour_of(minute):
+    return datetime.fromtimestamp(minute * 60, tz=dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def _empty_counters():
+    return {'requests': 0, 'errors': 0, 'latency_ms_total': 0, 'latency_histogram': [0] * (len(LATENCY_BUCKETS_MS) + 1)}
+
+
+def _add_counters(counters, suffix, amount):
+    if suffix == 'n':
+        counters['requests'] += amount
+    elif suffix == 'e':
+        counters['errors'] += amount
+    elif suffix == 't':
+        counters['latency_ms_total'] += amount
+    elif suffix.startswith('h'):
+        index = int(suffix[1:])
+        if index < len(counters['latency_histogram']):
+            counters['latency_histogram'][index] += amount
+
+
+def rollup_usage():
+    """Fold completed minute buckets into hourly APIKeyUsage rows. Returns the number of buckets."""
+    from django.db import transaction
+    from .api_keys import APIKey, APIKeyUsage
+
+    redis = redis_connection()
+    if redis is None:
+        return 0
+
+    current_minute = int(time.time() // 60)
+    keys = []
+    for key in redis.scan_iter(match=f'{USAGE_KEY_PREFIX}*', count=500):
+        key = key.decode() if isinstance(key, bytes) else key
+        minute = int(key[len(USAGE_KEY_PREFIX):])
+        if minute < current_minute:
+            keys.append((minute, key))
+    if not keys:
+        return 0
+
+    pipe = redis.pipeline(transaction=True)
+    for _, key in keys:
+        pipe.hgetall(key)
+        pipe.delete(key)
+    claimed = pipe.execute()[::2]
+
+    # (api_key_id, hour, endpoint) -> counters
+    rows = {}
+    for (minute, _), bucket in zip(keys, claimed):
+        hour = _hour_of(minute)
+        for field, value in bucket.items():
+            field = field.decode() if isinstance(field, bytes) else field
+            try:
+                api_key_id, rest = field.split('|', 1)
+                endpoint, suffix = rest.rsplit('|', 1)
+                counters = rows.setdefault((int(api_key_id), hour, endpoint), _empty_counters())
+                _add_counters(counters, suffix, int(value))
+            except ValueError:
+                continue
+
+    known_keys = set(APIKey.objects.filter(pk__in={k[0] for k in rows}).values_list('pk', flat=True))
+    rows = {k: v for k, v in rows.items() if k[0] in known_keys}
+
+    with transaction.atomic():
+        existing = {
+            (u.api_key_id, u.hour, u.endpoint): u
+            for u in APIKeyUsage.objects.select_for_update().filter(
+                api_key_id__in=known_keys, hour__in={k[1] for k in rows},
+            )
+        }
+        to_update, to_create = [], []
+        for (api_key_id, hour, endpoint), counters in rows.items():
+            usage = existing.get((api_key_id, hour, endpoint))
+            if usage is None:
+                to_create.append(APIKeyUsage(api_key_id=api_key_id, hour=hour, endpoint=endpoint, **counters))
+                continue
+            usage.requests += counters['requests']
+            usage.errors += counters['errors']
+            usage.latency_ms_total += counters['latency_ms_total']
+            histogram = list(usage.latency_histogram or [])
+            histogram += [0] * (len(counters['latency_histogram']) - len(histogram))
+            usage.latency_histogram = [a + b for a, b in zip(histogram, counters['latency_histogram'])]
+            to_update.append(usage)
+        APIKeyUsage.objects.bulk_create(to_create, batch_size=500)
+        APIKeyUsage.objects.bulk_update(
+            to_update, ['requests', 'errors', 'latency_ms_total', 'latency_histogram'], batch_size=500,
+        )
+    return len(keys)
+
+
+def _percentile(histogram, total, fraction):
+    """Label of the histogram bucket holding the given fraction of requests (e.g. "≤ 250 ms"), or None."""
+    if not total:
+        return None
+    target = total * fraction
+    seen = 0
+    for index, count in enumerate(histogram):
+        seen += count
+        if seen >= target:
+            if index < len(LATENCY_BUCKETS_MS):
+                return f'≤ {LATENCY_BUCKETS_MS[index]} ms'
+            return f'> {LATENCY_BUCKETS_MS[-1]} ms'
+    return None
+
+
+def summarize_usage(api_key, hours=24):
+    """Per-endpoint usage of ``api_key`` over the last ``hours`` rolled-up hours, busiest first."""
+    from .api_keys import APIKeyUsage
+
+    since = datetime.now(dt_timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours)
+    endpoints = {}
+    for usage in APIKeyUsage.objects.filter(api_key=api_key, hour__gte=since):
+        summary = endpoints.setdefault(usage.endpoint, _empty_counters())
+        summary['requests'] += usage.requests
+        summary['errors'] += usage.errors
+        summary['latency_ms_total'] += usage.latency_ms_total
+        for index, count in enumerate(usage.latency_histogram or []):
+            if index < len(summary['latency_histogram']):
+                summary['latency_histogram'][index] += count
+
+    rows = []
+    for endpoint, summary in endpoints.items():
+        requests = summary['requests']
+        rows.append({
+            'endpoint': endpoint,
+            'requests': requests,
+            'errors': summary['errors'],
+            'error_rate': round(summary['errors'] * 100 / requests, 1) if requests else 0,
+            'avg_ms': round(summary['latency_ms_total'] / requests) if requests else None,
+            'p50': _percentile(summary['latency_histogram'], requests, 0.5),
+            'p95': _percentile(summary['latency_histogram'], requests, 0.95),
+        })
+    return sorted(rows, key=lambda row: -row['requests'])
@@ -23,6 +23,7 @@ from apps.locations.models import Zone, ZoneDistanceRange, Route, VehicleRoutePr
 from apps.payments.models import Payment, Coupon
 from apps.rental_companies.models import RentalCompany, CompanyDocument, CompanyPayout
 from apps.rentals.models import Rental
+from config.pagination import keyset_page
 
 
 def is_admin(user):
@@ -127,45 +128,89 @@ def transfer_calendar(request):
     return render(request, 'dashboard/transfers/calendar.html')
 
 
-@login_required
-@user_passes_test(is_admin)
-def transfer_calendar_events(request):
-    """JSON endpoint for calendar events."""
-    start = request.GET.get('start', '')
-    end = request.GET.get('end', '')
-
-    transfers = Transfer.objects.select_related('vehicle_category').all()
-    if start:
-        transfers = transfers.filter(pickup_datetime__date__gte=start[:10])
-    if end:
-        transfers = transfers.filter(pickup_datetime__date__lte=end[:10])
-
-    status_colors = {
-        'confirmed': '#198754',
-        'pending': '#ffc107',
-        'cancelled': '#dc3545',
-        'completed': '#0d6efd',
-    }
+CALENDAR_STATUS_COLORS = {
+    'confirmed': '#198754',
+    'pending': '#ffc107',
+    'cancelled': '#dc3545',
+    'completed': '#0d6efd',
+}
+
+
+def _calendar_events(rows):
+    """Yield the calendar feed as JSON text, one event at a time."""
+    import json
 
-    events = []
-    for t in transfers:
-        events.append({
-            'id': t.pk,
-            'title': f'{t.customer_name} - {t.vehicle_category.name if t.vehicle_category else "N/A"}',
-            'start': t.pickup_datetime.isoformat(),
-            'url': f'/dashboard/transfers/{t.pk}/',
-            'backgroundColor': status_colors.get(t.status, '#6c757d'),
-            'borderColor': status_colors.get(t.status, '#6c757d'),
+    yield '['
+    for index, t in enumerate(rows):
+        color = CALENDAR_STATUS_COLORS.get(t['status'], '#6c757d')
+        event = {
+            'id': t['pk'],
+            'title': f'{t["customer_name"]} - {t["vehicle_category__name"] or "N/A"}',
+            'start': t['pickup_datetime'].isoformat(),
+            'url': f'/dashboard/transfers/{t["pk"]}/',
+            'backgroundColor': color,
+            'borderColor': color,
             'extendedProps': {
-                'ref': t.booking_ref,
-                'status': t.status,
-                'pickup': t.pickup_address[:50] if t.pickup_address else '',
-                'dropoff': t.dropoff_address[:50] if t.dropoff_address else '',
-                'total': str(t.total_price),
+                'ref': t['booking_ref'],
+                'status': t['status'],
+                'pickup': t['pickup'] or '',
+                'dropoff': t['dropoff'] or '',
+                'total': str(t['total_price']),
             }
-        })
+        }
+        yield (',' if index else '') + json.dumps(event)
+    yield ']'
+
 
-    return JsonResponse(events, safe=False)
+@login_required
+@user_passes_test(is_admin)
+def transfer_calendar_events(request):
+    """JSON endpoint for calendar events, streamed and revalidated by ETag."""
+    import hashlib
+    from datetime import datetime, time as dt_time
+    from django.conf import settings
+    from django.db.models import Max
+    from django.db.models.functions import Substr
+    from django.http import StreamingHttpResponse
+    from django.utils.cache import get_conditional_response
+    from django.utils.dateparse import parse_date
+
+    max_days = getattr(settings, 'CALENDAR_MAX_WINDOW_DAYS', 62)
+    try:
+        start = parse_date(request.GET.get('start', '')[:10]) if request.GET.get('start') else timezone.localdate()
+        end = parse_date(request.GET.get('end', '')[:10]) if request.GET.get('end') else None
+    except ValueError:
+        # Well-formed but impossible dates such as 2026-02-30
+        start = end = None
+    if start is None or (request.GET.get('end') and end is None):
+        return JsonResponse({'error': 'Invalid start or end date.'}, status=400)
+    # Never more than CALENDAR_MAX_WINDOW_DAYS, starting today when start is missing
+    if end is None or end < start or (end - start).days > max_days:
+        end = start + timedelta(days=max_days)
+
+    window_start = timezone.make_aware(datetime.combine(start, dt_time.min))
+    window_end = timezone.make_aware(datetime.combine(end + timedelta(days=1), dt_time.min))
+    transfers = Transfer.objects.filter(pickup_datetime__gte=window_start, pickup_datetime__lt=window_end)
+
+    # Newest change and row count in the window; the count catches deletions
+    stats = transfers.aggregate(latest=Max('updated_at'), total=Count('id'))
+    latest = stats['latest'].isoformat() if stats['latest'] else ''
+    etag = '"{}"'.format(hashlib.sha1(f'{start}|{end}|{latest}|{stats["total"]}'.encode()).hexdigest())
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        rows = transfers.order_by('pickup_datetime', 'pk').annotate(
+            pickup=Substr('pickup_address', 1, 50),
+            dropoff=Substr('dropoff_address', 1, 50),
+        ).values(
+            'pk', 'customer_name', 'vehicle_category__name', 'pickup_datetime', 'status',
+            'booking_ref', 'pickup', 'dropoff', 'total_price',
+        ).iterator(chunk_size=500)
+        response = StreamingHttpResponse(_calendar_events(rows), content_type='application/json')
+    response['ETag'] = etag
+    # Let the browser keep the feed but revalidate it on every fetch
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 
 
 # Transfer Views
@@ -189,7 +234,7 @@ def transfer_list(request):
     # Filters
     status = request.GET.get('status')
     transfer_type = request.GET.get('type')
-    search = request.GET.get('search')
+    search = request.GET.get('search', '').strip()
 
     date_from = request.GET.get('date_from')
     date_to = request.GET.get('date_to')
@@ -203,17 +248,13 @@ def transfer_list(request):
     if date_to:
         transfers = transfers.filter(pickup_datetime__date__lte=date_to)
     if search:
-        transfers = transfers.filter(
-            Q(booking_ref__icontains=search) |
-            Q(customer_name__icontains=search) |
-            Q(customer_email__icontains=search) |
-            Q(pickup_address__icontains=search) |
-            Q(dropoff_address__icontains=search)
-        )
-
-    paginator = Paginator(transfers, 20)
-    page = request.GET.get('page')
-    transfers = paginator.get_page(page)
+        # Search results are ranked, so they keep offset pages
+        from apps.transfers.search_index import search_transfers
+        transfers = search_transfers(transfers, search)
+        paginator = Paginator(transfers, 20)
+        transfers = paginator.get_page(request.GET.get('page'))
+    else:
+        transfers = keyset_page(request, transfers, ('-created_at', '-id'))
 
     context = {
         'transfers': transfers,
@@ -302,7 +343,7 @@ def transfer_create(request):
                     new_base = Decimal(override_raw)
                     transfer.base_price = new_base
                     transfer.total_price = new_base + (transfer.extras_price or 0) - (transfer.discount or 0)
-                    transfer.save(update_fields=['base_price', 'total_price'])
+                    transfer.save(update_fields=['base_price', 'total_price', 'updated_at'])
                 except Exception:
                     messages.warning(request, 'Invalid price override — kept auto-calculated value.')
 
@@ -1226,6 +1267,25 @@ def zone_detail(request, pk):
             except Exception as e:
                 messages.error(request, str(e))
 
+        elif action == 'save_ranges':
+            from django.core.exceptions import ValidationError
+            from apps.locations.ranges import save_range_table
+            active_ids = set(request.POST.getlist('active_range_ids'))
+            rows = [
+                {'id': range_id, 'name': name.strip(), 'min_km': min_km, 'max_km': max_km,
+                 'is_active': range_id in active_ids}
+                for range_id, name, min_km, max_km in zip(
+                    request.POST.getlist('range_id'), request.POST.getlist('range_name'),
+                    request.POST.getlist('min_km'), request.POST.getlist('max_km'),
+                )
+            ]
+            try:
+                save_range_table(zone, rows)
+                messages.success(request, 'Distance ranges updated successfully.')
+            except (ValidationError, ValueError) as e:
+                for error in getattr(e, 'messages', [str(e)]):
+                    messages.error(request, error)
+
         elif action == 'delete_range':
             range_id = request.POST.get('range_id')
             distance_range = get_object_or_404(ZoneDistanceRange, pk=range_id, zone=zone)
@@ -1725,9 +1785,7 @@ def payment_list(request):
     if payment_type:
         payments = payments.filter(payment_type=payment_type)
 
-    paginator = Paginator(payments, 20)
-    page = request.GET.get('page')
-    payments = paginator.get_page(page)
+    payments = keyset_page(request, payments, ('-created_at', '-id'))
 
     context = {
         'payments': payments,
@@ -2706,8 +2764,14 @@ def api_key_detail(request, pk):
 
         return redirect('dashboard:api_key_detail', pk=pk)
 
+    from apps.accounts.usage import summarize_usage
+
+    usage = summarize_usage(api_key, hours=24)
     context = {
         'api_key': api_key,
+        'usage': usage,
+        'usage_requests': sum(row['requests'] for row in usage),
+        'usage_errors': sum(row['errors'] for row in usage),
     }
     return render(request, 'dashboard/api_keys/detail.html', context)
 
@@ -3021,9 +3085,7 @@ def rental_list(request):
 
     all_companies = RentalCompany.objects.filter(status='approved').order_by('company_name')
 
-    paginator = Paginator(rentals, 20)
-    page = request.GET.get('page')
-    rentals = paginator.get_page(page)
+    rentals = keyset_page(request, rentals, ('-created_at', '-id'))
 
     context = {
         'rentals': rentals,
@@ -165,63 +165,22 @@ class RouteWithPricingSerializer(serializers.ModelSerializer):
 
         Uses default route pricing + per-vehicle sub-zone price adjustments.
         Final price = default_price + pickup_adjustment + dropoff_adjustment.
-        Adjustments are stored as JSON on each VehicleRoutePricing record.
+        Prices come from the shared PricingEngine snapshot; pass the
+        PricingQuote as ``pricing_quote`` in the context to reuse its options.
+        Vehicle details come from the cached vehicle cards.
         """
-        from apps.vehicles.models import VehicleCategory
-
-        matched_pickup_zone = self.context.get('matched_pickup_zone')
-        matched_dropoff_zone = self.context.get('matched_dropoff_zone')
-
-        options = []
-
-        # Always use default route pricing (no zone FKs)
-        default_pricing = obj.vehicle_pricing.filter(
-            is_active=True,
-            pickup_zone__isnull=True,
-            dropoff_zone__isnull=True
-        ).select_related('vehicle', 'vehicle__category')
-
-        for pricing in default_pricing:
-            # Per-vehicle adjustments from JSON fields
-            pickup_adj = 0
-            dropoff_adj = 0
-            if matched_pickup_zone:
-                pickup_adj = float(pricing.pickup_zone_adjustments.get(str(matched_pickup_zone.id), 0))
-            if matched_dropoff_zone:
-                dropoff_adj = float(pricing.dropoff_zone_adjustments.get(str(matched_dropoff_zone.id), 0))
-            adjusted_price = float(pricing.price) + pickup_adj + dropoff_adj
-            options.append(self._build_vehicle_option(
-                pricing.vehicle, adjusted_price, 'route', pricing
-            ))
-
+        from apps.locations.pricing import pricing_engine
+        from apps.vehicles.cards import vehicle_cards
+
+        quote = self.context.get('pricing_quote')
+        if quote is not None and quote.route is not None and quote.route.id == obj.id:
+            priced = quote.options
+        else:
+            priced = pricing_engine.snapshot().route_options(
+                obj,
+                self.context.get('matched_pickup_zone'),
+                self.context.get('matched_dropoff_zone'),
+            )
+
+        options = vehicle_cards.options(priced, 'route')
         return sorted(options, key=lambda x: x['price'])
-
-    def _build_vehicle_option(self, vehicle, price, pricing_type, pricing=None):
-        """Build a vehicle option dict with image and custom_info."""
-        primary_image = vehicle.images.filter(is_primary=True).first()
-        image_url = primary_image.image.url if primary_image else None
-        category = vehicle.category
-        return {
-            'vehicle_id': vehicle.id,
-            'vehicle_name': vehicle.name,
-            'category_id': category.id,
-            'category_name': category.name,
-            'category_icon': category.icon,
-            'category_description': category.description or '',
-            'category_tagline': category.tagline or '',
-            'category_included_amenities': category.included_amenities or [],
-            'category_not_included': category.not_included or [],
-            'category_image': category.image.url if category.image else None,
-            'passengers': vehicle.passengers,
-            'luggage': vehicle.luggage,
-            'price': float(price),
-            'features': [f.name for f in vehicle.features.all()[:4]],
-            'image': image_url,
-            'client_description': vehicle.client_description or '',
-            'key_features': vehicle.key_features or [],
-            'important_note': vehicle.important_note or '',
-            'important_note_type': vehicle.important_note_type or 'info',
-            'custom_info': vehicle.custom_info or {},
-            'pricing_type': pricing_type,
-            'min_booking_hours': pricing.min_booking_hours if pricing else None
-        }
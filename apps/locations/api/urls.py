@@ -11,6 +11,8 @@ router.register('routes', views.RouteViewSet, basename='route')
 
 urlpatterns = [
     path('calculate-distance/', views.calculate_distance_view, name='calculate-distance'),
+    path('calculate-distance/batch/', views.calculate_distance_batch_view, name='calculate-distance-batch'),
     path('google-maps-config/', views.google_maps_config, name='google-maps-config'),
+    path('price-grid/', views.price_grid_view, name='price-grid'),
     path('', include(router.urls)),
 ]
@@ -1,7 +1,10 @@
+import logging
+import math
 from decimal import Decimal
-from math import radians, cos, sin, asin, sqrt
 
 from django.conf import settings
+from django.core.cache import cache
+from django.utils import translation
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import api_view, permission_classes as perm_classes, action
 from rest_framework.response import Response
@@ -12,7 +15,12 @@ from apps.accounts.permissions import HasAPIKeyOrIsAuthenticated
 from apps.accounts.models import SiteSettings
 
 from apps.locations.models import Zone, ZonePricing, Route, RoutePickupZone, RouteDropoffZone
-from apps.locations.services import calculate_distance, DistanceCalculationError
+from apps.locations.services import (
+    calculate_distance, calculate_distance_within, calculate_distances_batch, DistanceCalculationError,
+)
+from apps.locations.pricing import pricing_engine, snap_coordinates
+from apps.locations.geo import haversine_km
+from apps.vehicles.cards import vehicle_cards
 from .serializers import (
     ZoneSerializer,
     ZoneListSerializer,
@@ -25,6 +33,8 @@ from .serializers import (
     RouteDropoffZoneSerializer
 )
 
+logger = logging.getLogger(__name__)
+
 
 class IsAdminOrReadOnly(permissions.BasePermission):
     """Allow read access to anyone, write access to admins only."""
@@ -36,28 +46,15 @@ class IsAdminOrReadOnly(permissions.BasePermission):
 
 def _check_zone_extension_conflicts(zone, max_extension_km):
     """Return list of conflicting routes if max_extension_km would overlap any route endpoint."""
-    from apps.locations.models import Route
     if not zone.has_coordinates or not max_extension_km or float(max_extension_km) <= 0:
         return []
-    radius = float(zone.radius_km or 0)
-    outer = radius + float(max_extension_km)
-    conflicts = []
-    for route in Route.objects.filter(is_active=True):
-        if route.origin_latitude and route.origin_longitude:
-            d = haversine_distance(
-                float(zone.center_latitude), float(zone.center_longitude),
-                float(route.origin_latitude), float(route.origin_longitude),
-            )
-            if radius < d < outer:
-                conflicts.append({'route_name': route.name, 'point': 'origin', 'distance_km': round(d, 2)})
-        if route.destination_latitude and route.destination_longitude:
-            d = haversine_distance(
-                float(zone.center_latitude), float(zone.center_longitude),
-                float(route.destination_latitude), float(route.destination_longitude),
-            )
-            if radius < d < outer:
-                conflicts.append({'route_name': route.name, 'point': 'destination', 'distance_km': round(d, 2)})
-    return conflicts
+    conflicts = pricing_engine.snapshot().conflicts.routes_in_ring(
+        zone.center_latitude, zone.center_longitude, zone.radius_km, max_extension_km,
+    )
+    return [
+        {'route_name': c.route.name, 'point': c.point, 'distance_km': round(c.distance_km, 2)}
+        for c in conflicts
+    ]
 
 
 def _check_route_zone_conflicts(origin_lat, origin_lng, dest_lat, dest_lng):
@@ -67,23 +64,23 @@ def _check_route_zone_conflicts(origin_lat, origin_lng, dest_lat, dest_lng):
     falls inside any active zone's extension ring (radius_km < d < radius_km + max_extension_km).
     Returns a list of conflict dicts, empty if safe.
     """
-    conflicts = []
-    for zone in Zone.objects.filter(is_active=True, max_extension_km__gt=0, extra_km_price__gt=0):
-        if not zone.has_coordinates:
-            continue
-        radius = float(zone.radius_km or 0)
-        outer = radius + float(zone.max_extension_km)
-        z_lat = float(zone.center_latitude)
-        z_lng = float(zone.center_longitude)
-        if origin_lat and origin_lng:
-            d = haversine_distance(z_lat, z_lng, float(origin_lat), float(origin_lng))
-            if radius < d < outer:
-                conflicts.append({'zone_name': zone.name, 'point': 'origin', 'distance_km': round(d, 2)})
-        if dest_lat and dest_lng:
-            d = haversine_distance(z_lat, z_lng, float(dest_lat), float(dest_lng))
-            if radius < d < outer:
-                conflicts.append({'zone_name': zone.name, 'point': 'destination', 'distance_km': round(d, 2)})
-    return conflicts
+    conflicts = pricing_engine.snapshot().conflicts.zones_for_route(origin_lat, origin_lng, dest_lat, dest_lng)
+    return [
+        {'zone_name': c.zone.name, 'point': c.point, 'distance_km': round(c.distance_km, 2)}
+        for c in conflicts
+    ]
+
+
+def _audit_zone_route_conflicts():
+    """Return every zone extension ring / route endpoint conflict among active zones and routes."""
+    return [
+        {
+            'zone_id': c.zone.id, 'zone_name': c.zone.name,
+            'route_id': c.route.id, 'route_name': c.route.name,
+            'point': c.point, 'distance_km': round(c.distance_km, 2),
+        }
+        for c in pricing_engine.snapshot().conflicts.audit()
+    ]
 
 
 class ZoneViewSet(viewsets.ModelViewSet):
@@ -115,6 +112,12 @@ class ZoneViewSet(viewsets.ModelViewSet):
             return Response({'valid': False, 'conflicts': conflicts})
         return Response({'valid': True, 'conflicts': []})
 
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def audit_conflicts(self, request):
+        """Report every zone extension ring / route endpoint conflict in the catalogue."""
+        conflicts = _audit_zone_route_conflicts()
+        return Response({'valid': not conflicts, 'count': len(conflicts), 'conflicts': conflicts})
+
 
 class ZonePricingViewSet(viewsets.ModelViewSet):
     """ViewSet for managing zone pricing."""
@@ -125,90 +128,32 @@ class ZonePricingViewSet(viewsets.ModelViewSet):
     filterset_fields = ['from_zone', 'to_zone', 'vehicle_category', 'is_active']
 
 
-def haversine_distance(lat1, lon1, lat2, lon2):
-    """Calculate distance between two points using Haversine formula."""
-    R = 6371  # Earth's radius in km
-
-    lat1, lon1, lat2, lon2 = map(radians, [float(lat1), float(lon1), float(lat2), float(lon2)])
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
+def _pricing_cache_key(origin_lat, origin_lng, dest_lat, dest_lng, passengers):
+    """Cache key for a get_pricing payload; moves whenever pricing or vehicle cards change."""
+    return 'locations:get_pricing:{}:{}:{}:{},{},{},{}:{}'.format(
+        pricing_engine.version(), vehicle_cards.version(), translation.get_language() or settings.LANGUAGE_CODE,
+        origin_lat, origin_lng, dest_lat, dest_lng, passengers,
+    )
 
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * asin(sqrt(a))
 
-    return R * c
+def haversine_distance(lat1, lon1, lat2, lon2):
+    """Calculate distance between two points using Haversine formula."""
+    return haversine_km(lat1, lon1, lat2, lon2)
 
 
 def find_matching_pickup_zone(route, lat, lng):
     """Find the smallest pickup zone that contains the given coordinates."""
-    pickup_zones = route.pickup_zones.filter(is_active=True)
-    if not pickup_zones.exists():
-        return None
-
-    best = None
-    for zone in pickup_zones:
-        distance = haversine_distance(lat, lng, zone.center_latitude, zone.center_longitude)
-        if distance <= float(zone.radius_km):
-            if best is None or zone.radius_km < best.radius_km:
-                best = zone
-    return best
+    return pricing_engine.snapshot().pickup_subzone(route, lat, lng)
 
 
 def find_matching_dropoff_zone(route, lat, lng):
     """Find the smallest dropoff zone that contains the given coordinates."""
-    dropoff_zones = route.dropoff_zones.filter(is_active=True)
-    if not dropoff_zones.exists():
-        return None
-
-    best = None
-    for zone in dropoff_zones:
-        distance = haversine_distance(lat, lng, zone.center_latitude, zone.center_longitude)
-        if distance <= float(zone.radius_km):
-            if best is None or zone.radius_km < best.radius_km:
-                best = zone
-    return best
+    return pricing_engine.snapshot().dropoff_subzone(route, lat, lng)
 
 
 def find_matching_zone(lat, lng):
     """Find the standalone Zone containing the given coordinates."""
-    for zone in Zone.objects.filter(is_active=True):
-        if not zone.has_coordinates:
-            continue
-        distance = haversine_distance(lat, lng, zone.center_latitude, zone.center_longitude)
-        if distance <= float(zone.radius_km):
-            return zone
-    return None
-
-
-def _build_zone_vehicle_option(zone_pricing):
-    """Build a vehicle option dict from a VehicleZonePricing record."""
-    vehicle = zone_pricing.vehicle
-    category = vehicle.category
-    primary_image = vehicle.images.filter(is_primary=True).first()
-    return {
-        'vehicle_id': vehicle.id,
-        'vehicle_name': vehicle.name,
-        'category_id': category.id,
-        'category_name': category.name,
-        'category_icon': category.icon,
-        'category_description': category.description or '',
-        'category_tagline': category.tagline or '',
-        'category_included_amenities': category.included_amenities or [],
-        'category_not_included': category.not_included or [],
-        'category_image': category.image.url if category.image else None,
-        'passengers': vehicle.passengers,
-        'luggage': vehicle.luggage,
-        'price': float(zone_pricing.price),
-        'features': [f.name for f in vehicle.features.all()[:4]],
-        'image': primary_image.image.url if primary_image else None,
-        'client_description': vehicle.client_description or '',
-        'key_features': vehicle.key_features or [],
-        'important_note': vehicle.important_note or '',
-        'important_note_type': vehicle.important_note_type or 'info',
-        'custom_info': vehicle.custom_info or {},
-        'pricing_type': 'zone',
-        'min_booking_hours': zone_pricing.min_booking_hours,
-    }
+    return pricing_engine.snapshot().zones.find(lat, lng)
 
 
 @extend_schema_view(
@@ -325,57 +270,29 @@ class RouteViewSet(viewsets.ReadOnlyModelViewSet):
         dest_lat = serializer.validated_data['destination_lat']
         dest_lng = serializer.validated_data['destination_lng']
 
-        matching_routes = []
+        matches = list(pricing_engine.snapshot().routes.matches(origin_lat, origin_lng, dest_lat, dest_lng))
+        routes_by_id = self.get_queryset().in_bulk([match.route.id for match in matches])
 
-        for route in self.get_queryset():
-            # Check if origin is within route's origin radius
-            origin_distance = haversine_distance(
-                origin_lat, origin_lng,
-                route.origin_latitude, route.origin_longitude
-            )
-            dest_distance = haversine_distance(
-                dest_lat, dest_lng,
-                route.destination_latitude, route.destination_longitude
-            )
-
-            if (origin_distance <= float(route.origin_radius_km) and
-                dest_distance <= float(route.destination_radius_km)):
-                # Find matching zones within the route
+        matching_routes = []
+        for match in matches:
+            route = routes_by_id.get(match.route.id)
+            if route is None:
+                continue
+            if match.is_reverse:
+                # For reverse direction, pickup is from destination zones, dropoff is from origin zones
+                pickup_zone = find_matching_dropoff_zone(route, origin_lat, origin_lng)
+                dropoff_zone = find_matching_pickup_zone(route, dest_lat, dest_lng)
+            else:
                 pickup_zone = find_matching_pickup_zone(route, origin_lat, origin_lng)
                 dropoff_zone = find_matching_dropoff_zone(route, dest_lat, dest_lng)
-                matching_routes.append({
-                    'route': route,
-                    'direction': 'forward',
-                    'origin_distance_km': round(origin_distance, 2),
-                    'destination_distance_km': round(dest_distance, 2),
-                    'matched_pickup_zone': pickup_zone,
-                    'matched_dropoff_zone': dropoff_zone
-                })
-
-            # Check reverse direction for bidirectional routes
-            elif route.is_bidirectional:
-                origin_to_dest = haversine_distance(
-                    origin_lat, origin_lng,
-                    route.destination_latitude, route.destination_longitude
-                )
-                dest_to_origin = haversine_distance(
-                    dest_lat, dest_lng,
-                    route.origin_latitude, route.origin_longitude
-                )
-
-                if (origin_to_dest <= float(route.destination_radius_km) and
-                    dest_to_origin <= float(route.origin_radius_km)):
-                    # For reverse direction, pickup is from destination zones, dropoff is from origin zones
-                    pickup_zone = find_matching_dropoff_zone(route, origin_lat, origin_lng)
-                    dropoff_zone = find_matching_pickup_zone(route, dest_lat, dest_lng)
-                    matching_routes.append({
-                        'route': route,
-                        'direction': 'reverse',
-                        'origin_distance_km': round(origin_to_dest, 2),
-                        'destination_distance_km': round(dest_to_origin, 2),
-                        'matched_pickup_zone': pickup_zone,
-                        'matched_dropoff_zone': dropoff_zone
-                    })
+            matching_routes.append({
+                'route': route,
+                'direction': 'reverse' if match.is_reverse else 'forward',
+                'origin_distance_km': round(match.pickup_distance_km, 2),
+                'destination_distance_km': round(match.dropoff_distance_km, 2),
+                'matched_pickup_zone': pickup_zone,
+                'matched_dropoff_zone': dropoff_zone
+            })
 
         # Build response with route data and match info
         results = []
@@ -408,6 +325,8 @@ class RouteViewSet(viewsets.ReadOnlyModelViewSet):
         3. Returns all available vehicles with prices
 
         The response includes route details plus a list of vehicle options sorted by price.
+        Responses are cached on coordinates rounded to PRICING_RESPONSE_CACHE_PRECISION
+        decimals; the X-Cache header reports HIT, MISS or BYPASS.
         """,
         tags=['Routes'],
         parameters=[
@@ -482,175 +401,116 @@ class RouteViewSet(viewsets.ReadOnlyModelViewSet):
                         'vehicle_options': [],
                     }, status=200)
 
-        # Step 1: Check if both points are in the same Zone (within-city transfer)
-        pickup_zone = find_matching_zone(origin_lat, origin_lng)
-        dropoff_zone = find_matching_zone(dest_lat, dest_lng)
+        # Priced and cached on the same snapped point that quotes and bookings are
+        # priced on (see snap_coordinates); per-request fields are filled in below
+        origin_lat, origin_lng, dest_lat, dest_lng = snap_coordinates(origin_lat, origin_lng, dest_lat, dest_lng)
+        cache_status = 'BYPASS'
+        cache_key = None
+        if getattr(settings, 'PRICING_RESPONSE_CACHE_TTL', 0) > 0:
+            cache_key = _pricing_cache_key(origin_lat, origin_lng, dest_lat, dest_lng, passengers)
 
-        if pickup_zone and dropoff_zone and pickup_zone.id == dropoff_zone.id:
-            zone = pickup_zone
-            # Calculate driving distance
-            distance_km = float(haversine_distance(origin_lat, origin_lng, dest_lat, dest_lng))
-            duration_minutes = None
+        data = None
+        if cache_key:
             try:
-                dist_result = calculate_distance(float(origin_lat), float(origin_lng), float(dest_lat), float(dest_lng))
-                if dist_result.get('distance_km'):
-                    distance_km = float(dist_result['distance_km'])
-                    duration_minutes = dist_result.get('duration_minutes')
+                data = cache.get(cache_key)
             except Exception:
-                pass
-            if duration_minutes is None:
-                duration_minutes = int(distance_km * 1.5)
-
-            # Find matching distance range
-            distance_range = zone.get_range_for_distance(distance_km)
-            if distance_range:
-                from apps.vehicles.models import VehicleZonePricing
-                zone_vehicle_pricing = VehicleZonePricing.objects.filter(
-                    zone_distance_range=distance_range,
-                    is_active=True
-                ).select_related('vehicle', 'vehicle__category')
-
-                if zone_vehicle_pricing.exists():
-                    vehicle_options = []
-                    for zp in zone_vehicle_pricing:
-                        vehicle_options.append(_build_zone_vehicle_option(zp))
-
-                    min_hours_values = [zp.min_booking_hours for zp in zone_vehicle_pricing if zp.min_booking_hours]
-                    return Response({
-                        'id': None,
-                        'name': zone.name,
-                        'pricing_type': 'zone',
-                        'deposit_percentage': float(zone.deposit_percentage),
-                        'origin_name': request.query_params.get('origin_name', 'Pickup'),
-                        'destination_name': request.query_params.get('destination_name', 'Dropoff'),
-                        'distance_km': round(distance_km, 1),
-                        'estimated_duration_minutes': duration_minutes,
-                        'duration_display': f"{duration_minutes // 60}h {duration_minutes % 60}min",
-                        'client_notice': zone.client_notice,
-                        'client_notice_type': zone.client_notice_type,
-                        'pickup_instructions': zone.pickup_instructions,
-                        'area_description': zone.area_description,
-                        'custom_info': zone.custom_info,
-                        'min_booking_hours': min(min_hours_values) if min_hours_values else None,
-                        'vehicle_options': sorted(vehicle_options, key=lambda x: x['price']),
-                        'currency': SiteSettings.get_settings().default_currency,
-                    })
-        # If no zone match or no pricing → fall through to Route check
-
-        # Step 1b: Extended zone — pickup inside zone radius, dropoff just outside in extension ring
-        if pickup_zone and dropoff_zone is None \
-                and float(pickup_zone.max_extension_km or 0) > 0 \
-                and float(pickup_zone.extra_km_price or 0) > 0:
-            zone = pickup_zone
-            dropoff_dist = haversine_distance(dest_lat, dest_lng, float(zone.center_latitude), float(zone.center_longitude))
-            outer_boundary = float(zone.radius_km) + float(zone.max_extension_km)
-            if dropoff_dist <= outer_boundary:
-                km_beyond = max(0.0, dropoff_dist - float(zone.radius_km))
-                haversine_km = float(haversine_distance(origin_lat, origin_lng, dest_lat, dest_lng))
-                duration_minutes = None
+                logger.warning('Pricing response cache read failed', exc_info=True)
+            cache_status = 'HIT' if data is not None else 'MISS'
+
+        if data is None:
+            data = self._pricing_payload(origin_lat, origin_lng, dest_lat, dest_lng)
+            # Haversine fallbacks are refined in the background; don't pin them in the cache
+            if cache_key and data.get('distance_source') != 'haversine':
                 try:
-                    dist_result = calculate_distance(float(origin_lat), float(origin_lng), float(dest_lat), float(dest_lng))
-                    duration_minutes = dist_result.get('duration_minutes')
+                    cache.set(cache_key, data, settings.PRICING_RESPONSE_CACHE_TTL)
                 except Exception:
-                    pass
-                if duration_minutes is None:
-                    duration_minutes = int(haversine_km * 1.5)
-
-                # Extension ring is defined in haversine km; use haversine for range lookup too
-                distance_range = zone.get_range_for_distance(haversine_km)
-                if distance_range:
-                    from apps.vehicles.models import VehicleZonePricing
-                    zone_vehicle_pricing = VehicleZonePricing.objects.filter(
-                        zone_distance_range=distance_range,
-                        is_active=True,
-                    ).select_related('vehicle', 'vehicle__category')
-
-                    if zone_vehicle_pricing.exists():
-                        surcharge = round(float(zone.extra_km_price) * km_beyond, 2)
-                        vehicle_options = []
-                        for zp in zone_vehicle_pricing:
-                            opt = _build_zone_vehicle_option(zp)
-                            opt['price'] = round(opt['price'] + surcharge, 2)
-                            opt['extension_surcharge'] = surcharge
-                            opt['km_beyond'] = round(km_beyond, 2)
-                            vehicle_options.append(opt)
-
-                        min_hours_values = [zp.min_booking_hours for zp in zone_vehicle_pricing if zp.min_booking_hours]
-                        return Response({
-                            'id': None,
-                            'name': zone.name,
-                            'pricing_type': 'zone',
-                            'deposit_percentage': float(zone.deposit_percentage),
-                            'origin_name': request.query_params.get('origin_name', 'Pickup'),
-                            'destination_name': request.query_params.get('destination_name', 'Dropoff'),
-                            'distance_km': round(haversine_km, 1),
-                            'estimated_duration_minutes': duration_minutes,
-                            'duration_display': f"{duration_minutes // 60}h {duration_minutes % 60}min",
-                            'client_notice': zone.client_notice,
-                            'client_notice_type': zone.client_notice_type,
-                            'pickup_instructions': zone.pickup_instructions,
-                            'area_description': zone.area_description,
-                            'custom_info': zone.custom_info,
-                            'min_booking_hours': min(min_hours_values) if min_hours_values else None,
-                            'vehicle_options': sorted(vehicle_options, key=lambda x: x['price']),
-                            'currency': SiteSettings.get_settings().default_currency,
-                        })
-
-        # Step 2: Try to find a matching route
-        matching_route = None
-        matched_pickup_zone = None
-        matched_dropoff_zone = None
-        is_reverse = False
-
-        for route in self.get_queryset():
-            origin_distance = haversine_distance(
-                origin_lat, origin_lng,
-                route.origin_latitude, route.origin_longitude
-            )
-            dest_distance = haversine_distance(
-                dest_lat, dest_lng,
-                route.destination_latitude, route.destination_longitude
-            )
-
-            if (origin_distance <= float(route.origin_radius_km) and
-                dest_distance <= float(route.destination_radius_km)):
-                matching_route = route
-                matched_pickup_zone = find_matching_pickup_zone(route, origin_lat, origin_lng)
-                matched_dropoff_zone = find_matching_dropoff_zone(route, dest_lat, dest_lng)
-                break
-
-            # Check reverse for bidirectional
-            elif route.is_bidirectional:
-                origin_to_dest = haversine_distance(
-                    origin_lat, origin_lng,
-                    route.destination_latitude, route.destination_longitude
-                )
-                dest_to_origin = haversine_distance(
-                    dest_lat, dest_lng,
-                    route.origin_latitude, route.origin_longitude
-                )
-
-                if (origin_to_dest <= float(route.destination_radius_km) and
-                    dest_to_origin <= float(route.origin_radius_km)):
-                    matching_route = route
-                    is_reverse = True
-                    # For reverse, pickup from dropoff zones and vice versa
-                    matched_pickup_zone = find_matching_dropoff_zone(route, origin_lat, origin_lng)
-                    matched_dropoff_zone = find_matching_pickup_zone(route, dest_lat, dest_lng)
-                    break
-
-        if matching_route:
-            # Use route-based pricing with sub-zone price adjustments
+                    logger.warning('Pricing response cache write failed', exc_info=True)
+            elif cache_key:
+                cache_status = 'BYPASS'
+
+        data = dict(data)
+        if data.get('pricing_type') == 'zone':
+            data['origin_name'] = request.query_params.get('origin_name', 'Pickup')
+            data['destination_name'] = request.query_params.get('destination_name', 'Dropoff')
+        data['currency'] = SiteSettings.get_settings().default_currency
+        response = Response(data, status=200)
+        response['X-Cache'] = cache_status
+        response['X-Pricing-Version'] = pricing_engine.version() or ''
+        return response
+
+    def _pricing_payload(self, origin_lat, origin_lng, dest_lat, dest_lng):
+        """
+        Price a pickup/dropoff pair for get_pricing.
+
+        The result depends only on the coordinates, the pricing snapshot, the
+        vehicle cards and the active language, so get_pricing can cache it.
+        """
+        # One snapshot for the whole request so every step sees the same pricing data
+        snapshot = pricing_engine.snapshot()
+
+        # Driving distance is only needed to pick the range of a within-city zone transfer
+        pickup_zone = snapshot.zones.find(origin_lat, origin_lng)
+        dropoff_zone = snapshot.zones.find(dest_lat, dest_lng)
+        # (bounded by DISTANCE_LOOKUP_BUDGET_MS; falls back to haversine when Google is slow)
+        dist_result = None
+        distance_km = None
+        if pickup_zone and dropoff_zone and pickup_zone.id == dropoff_zone.id:
+            dist_result = calculate_distance_within(origin_lat, origin_lng, dest_lat, dest_lng)
+            if dist_result['source'] == 'google' and dist_result.get('distance_km'):
+                distance_km = float(dist_result['distance_km'])
+
+        quote = snapshot.quote(origin_lat, origin_lng, dest_lat, dest_lng, distance_km=distance_km)
+
+        # Step 1: Zone pricing — same zone (within-city) or pickup zone extension ring
+        if quote and quote.method == 'zone':
+            zone = quote.zone
+            if dist_result is None:
+                dist_result = calculate_distance_within(origin_lat, origin_lng, dest_lat, dest_lng)
+            duration_minutes = dist_result.get('duration_minutes')
+            if duration_minutes is None:
+                duration_minutes = int(quote.distance_km * 1.5)
+
+            vehicle_options = vehicle_cards.options(quote.options, 'zone')
+            for opt in vehicle_options:
+                opt['price'] = round(opt['price'], 2)
+                if quote.is_extension:
+                    opt['extension_surcharge'] = float(quote.surcharge)
+                    opt['km_beyond'] = round(quote.km_beyond, 2)
+
+            return {
+                'id': None,
+                'name': zone.name,
+                'pricing_type': 'zone',
+                'deposit_percentage': float(zone.deposit_percentage),
+                'origin_name': None,
+                'destination_name': None,
+                'distance_km': round(quote.distance_km, 1),
+                'distance_source': dist_result['source'],
+                'estimated_duration_minutes': duration_minutes,
+                'duration_display': f"{duration_minutes // 60}h {duration_minutes % 60}min",
+                'client_notice': zone.client_notice,
+                'client_notice_type': zone.client_notice_type,
+                'pickup_instructions': zone.pickup_instructions,
+                'area_description': zone.area_description,
+                'custom_info': zone.custom_info,
+                'min_booking_hours': quote.min_booking_hours,
+                'vehicle_options': sorted(vehicle_options, key=lambda x: x['price']),
+            }
+
+        # Step 2: Route pricing with sub-zone price adjustments
+        if quote and quote.method == 'route':
+            matched_pickup_zone = quote.pickup_subzone
+            matched_dropoff_zone = quote.dropoff_subzone
             data = RouteWithPricingSerializer(
-                matching_route,
+                quote.route,
                 context={
                     'matched_pickup_zone': matched_pickup_zone,
                     'matched_dropoff_zone': matched_dropoff_zone,
-                    'is_reverse': is_reverse
+                    'is_reverse': quote.is_reverse,
+                    'pricing_quote': quote,
                 }
             ).data
             data['pricing_type'] = 'route'
-            data['currency'] = SiteSettings.get_settings().default_currency
             # Compute route-level min_booking_hours (smallest non-null across vehicle options)
             min_hours_values = [
                 v['min_booking_hours'] for v in data.get('vehicle_options', [])
@@ -668,15 +528,14 @@ class RouteViewSet(viewsets.ReadOnlyModelViewSet):
                 data['matched_dropoff_zone'] = RouteDropoffZoneSerializer(matched_dropoff_zone).data
             else:
                 data['matched_dropoff_zone'] = None
-            return Response(data)
+            return data
 
         # No matching zone or route — no pricing available
-        return Response({
+        return {
             'error': 'No pricing configured for this route.',
             'vehicle_options': [],
             'pricing_type': 'none',
-            'currency': SiteSettings.get_settings().default_currency,
-        }, status=200)
+        }
 
 
 @extend_schema(
@@ -787,6 +646,131 @@ def calculate_distance_view(request):
         )
 
 
+@extend_schema(
+    summary="Calculate distances for many pairs",
+    description=(
+        "Calculate driving distances for up to DISTANCE_BATCH_MAX_PAIRS origin/destination pairs. "
+        "Pairs are deduplicated and grouped into multi-element Distance Matrix requests. "
+        "Results come back in input order; a pair that fails carries an `error` instead of a distance."
+    ),
+    tags=['Locations'],
+    request={
+        'application/json': {
+            'type': 'object',
+            'properties': {
+                'pairs': {
+                    'type': 'array',
+                    'items': {
+                        'type': 'object',
+                        'properties': {
+                            'origin_lat': {'type': 'number'},
+                            'origin_lng': {'type': 'number'},
+                            'dest_lat': {'type': 'number'},
+                            'dest_lng': {'type': 'number'},
+                        }
+                    }
+                }
+            }
+        }
+    },
+    responses={
+        200: {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer'},
+                'results': {
+                    'type': 'array',
+                    'items': {
+                        'type': 'object',
+                        'properties': {
+                            'distance_km': {'type': 'number', 'example': 45.5},
+                            'distance_text': {'type': 'string', 'example': '45.5 km'},
+                            'duration_minutes': {'type': 'integer', 'example': 55},
+                            'duration_text': {'type': 'string', 'example': '55 mins'},
+                            'source': {'type': 'string', 'example': 'google'},
+                            'error': {'type': 'string'},
+                        }
+                    }
+                },
+            }
+        },
+        400: {'description': 'Invalid parameters'},
+    },
+    examples=[
+        OpenApiExample(
+            'Batch Request',
+            value={
+                'pairs': [
+                    {'origin_lat': 31.6069, 'origin_lng': -8.0363, 'dest_lat': 31.6258, 'dest_lng': -7.9891},
+                    {'origin_lat': 31.6069, 'origin_lng': -8.0363, 'dest_lat': 31.5085, 'dest_lng': -9.7595},
+                ]
+            },
+            request_only=True,
+        ),
+    ],
+)
+@api_view(['POST'])
+@perm_classes([HasAPIKeyOrIsAuthenticated])
+def calculate_distance_batch_view(request):
+    """
+    Calculate driving distances for a list of origin/destination pairs.
+
+    POST Body:
+        {"pairs": [{"origin_lat", "origin_lng", "dest_lat", "dest_lng"}, ...]}
+
+    Returns:
+        {"count": N, "results": [{...distance fields...} or {"error": "..."}, ...]}
+    """
+    pairs = request.data.get('pairs') if isinstance(request.data, dict) else None
+    if not isinstance(pairs, list) or not pairs:
+        return Response(
+            {'error': 'pairs must be a non-empty list'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    max_pairs = getattr(settings, 'DISTANCE_BATCH_MAX_PAIRS', 1000)
+    if len(pairs) > max_pairs:
+        return Response(
+            {'error': f'At most {max_pairs} pairs per request'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    from apps.transfers.api.validators import validate_latitude, validate_longitude
+    from rest_framework.exceptions import ValidationError
+
+    # Validate every pair up front; invalid ones get an error slot instead of a lookup
+    results = [None] * len(pairs)
+    valid_indexes = []
+    valid_pairs = []
+    for index, pair in enumerate(pairs):
+        try:
+            coords = tuple(float(pair[name]) for name in ('origin_lat', 'origin_lng', 'dest_lat', 'dest_lng'))
+        except (KeyError, TypeError):
+            results[index] = {'error': 'Missing required parameters: origin_lat, origin_lng, dest_lat, dest_lng'}
+            continue
+        except ValueError as e:
+            results[index] = {'error': f'Invalid coordinate values: {e}'}
+            continue
+        if not all(math.isfinite(value) for value in coords):
+            results[index] = {'error': 'Invalid coordinate values: coordinates must be finite numbers'}
+            continue
+        try:
+            for lat, lng in (coords[:2], coords[2:]):
+                validate_latitude(lat)
+                validate_longitude(lng)
+        except ValidationError as e:
+            results[index] = {'error': f'Invalid coordinate values: {e.detail[0]}'}
+            continue
+        valid_indexes.append(index)
+        valid_pairs.append(coords)
+
+    if valid_pairs:
+        for index, result in zip(valid_indexes, calculate_distances_batch(valid_pairs)):
+            results[index] = result
+
+    return Response({'count': len(results), 'results': results})
+
+
 @extend_schema(
     summary="Get Google Maps API configuration",
     description="Get the Google Maps API key for frontend use (Places Autocomplete, Maps, etc.)",
@@ -809,10 +793,58 @@ def google_maps_config(request):
 
     Returns the API key needed for Google Places Autocomplete and Maps integration.
     """
-    from apps.accounts.models import SiteSettings
-    site_settings = SiteSettings.objects.first()
-    api_key = site_settings.google_maps_api_key if site_settings else ''
+    api_key = SiteSettings.get_settings().google_maps_api_key
     return Response({
         'api_key': api_key,
         'enabled': bool(api_key),
     })
+
+
+@extend_schema(
+    summary="Popular route price grid",
+    description="""
+    Precomputed prices for every popular route: each vehicle x pickup sub-zone x dropoff
+    sub-zone x direction, plus "from" prices per route and per vehicle category.
+
+    The grid is rebuilt in the background (`build_price_grid` / celery beat). The `ETag`
+    is the content hash of the grid, so clients and CDNs should revalidate with
+    `If-None-Match` and get `304 Not Modified` while prices are unchanged. The body is
+    gzip-encoded when the client accepts it.
+    """,
+    tags=['Routes'],
+    responses={200: {'type': 'object'}, 304: None, 404: None},
+)
+@api_view(['GET'])
+@perm_classes([permissions.AllowAny])
+def price_grid_view(request):
+    """Serve the latest price grid artifact with ETag revalidation."""
+    import gzip
+    from django.http import HttpResponse
+    from django.utils.cache import get_conditional_response
+    from apps.locations.price_grid import get_price_grid_manifest, read_price_grid
+
+    manifest = get_price_grid_manifest()
+    if manifest is None:
+        return Response({'error': 'The price grid has not been generated yet.'}, status=404)
+
+    etag = f'"{manifest["etag"]}"'
+    cache_control = f'public, max-age={getattr(settings, "PRICE_GRID_MAX_AGE", 300)}'
+    # Django's matching also accepts weak (W/"...") tags from proxies and gzip middleware
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response['ETag'] = etag
+        response['Cache-Control'] = cache_control
+        return response
+
+    body = read_price_grid(manifest)
+    response = HttpResponse(content_type='application/json; charset=utf-8')
+    if 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+        response.content = body
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response.content = gzip.decompress(body)
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    response['Vary'] = 'Accept-Encoding'
+    response['X-Price-Grid-Generated-At'] = manifest['generated_at']
+    return response
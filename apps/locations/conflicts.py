@@ -0,0 +1,130 @@
+"""
+Zone extension ring / route endpoint conflict detection.
+
+A route endpoint may not fall inside a zone's extension ring
+(``radius_km < d < radius_km + max_extension_km``), otherwise the same trip
+could be priced both by the zone surcharge and by the route. ConflictIndex
+keeps active route endpoints and extension rings of active zones in grid
+indexes so both directions of the check are range queries; it is built as
+part of the pricing snapshot.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from .geo import CircleArray, PointArray
+from .spatial import GridIndex, circle_bbox
+
+
+class RouteConflict(NamedTuple):
+    zone: object
+    route: object
+    point: str  # 'origin' or 'destination'
+    distance_km: float
+
+
+def _point(lat, lng):
+    """Return (lat, lng) as floats, or None when either is missing/zero (as in the old checks)."""
+    if not lat or not lng:
+        return None
+    return float(lat), float(lng)
+
+
+class ConflictIndex:
+    """Range queries between route endpoints and zone extension rings."""
+
+    POINTS = ('origin', 'destination')
+
+    def __init__(self, zones, routes):
+        # Route endpoints; index = route rank * 2 + (0 origin, 1 destination) so
+        # sorted indexes come back in Route ordering, origin before destination
+        self.routes = list(routes)
+        self.endpoint_grid = GridIndex()
+        endpoint_ids, lats, lngs = [], [], []
+        for rank, route in enumerate(self.routes):
+            for offset, (lat, lng) in enumerate((
+                (route.origin_latitude, route.origin_longitude),
+                (route.destination_latitude, route.destination_longitude),
+            )):
+                point = _point(lat, lng)
+                if point is None:
+                    continue
+                self.endpoint_grid.insert((point[0], point[1], point[0], point[1]), len(endpoint_ids))
+                endpoint_ids.append(rank * 2 + offset)
+                lats.append(point[0])
+                lngs.append(point[1])
+        self.endpoint_grid.freeze()
+        self.endpoint_ids = np.array(endpoint_ids, dtype=np.intp)
+        self.endpoints = PointArray(lats, lngs)
+
+        # Extension rings of zones that charge for the extension
+        self.ring_grid = GridIndex()
+        self.ring_zones = []
+        lats, lngs, inner, outer = [], [], [], []
+        for zone in zones:
+            if not zone.has_coordinates:
+                continue
+            max_extension = float(zone.max_extension_km or 0)
+            if max_extension <= 0 or float(zone.extra_km_price or 0) <= 0:
+                continue
+            lat, lng = float(zone.center_latitude), float(zone.center_longitude)
+            radius = float(zone.radius_km or 0)
+            self.ring_grid.insert(circle_bbox(lat, lng, radius + max_extension), len(self.ring_zones))
+            self.ring_zones.append(zone)
+            lats.append(lat)
+            lngs.append(lng)
+            inner.append(radius)
+            outer.append(radius + max_extension)
+        self.ring_grid.freeze()
+        self.rings = CircleArray(lats, lngs, outer)
+        self.ring_inner = np.array(inner, dtype=np.float64)
+
+    def routes_in_ring(self, lat, lng, radius_km, max_extension_km, zone=None):
+        """RouteConflicts for every route endpoint strictly inside the ring around (lat, lng)."""
+        radius = float(radius_km or 0)
+        outer = radius + float(max_extension_km)
+        lat, lng = float(lat), float(lng)
+        candidates = self.endpoint_grid.query_bbox(circle_bbox(lat, lng, outer))
+        if not len(candidates):
+            return []
+        distances = self.endpoints.distances_from(lat, lng, candidates)
+        mask = (distances > radius) & (distances < outer)
+        hits = sorted(zip(self.endpoint_ids[candidates[mask]], distances[mask]))
+        return [
+            RouteConflict(zone, self.routes[endpoint_id // 2], self.POINTS[endpoint_id % 2], float(distance))
+            for endpoint_id, distance in hits
+        ]
+
+    def rings_containing(self, lat, lng):
+        """(ring index, distance_km) for every extension ring strictly containing the point, in Zone ordering."""
+        lat, lng = float(lat), float(lng)
+        candidates = self.ring_grid.candidates(lat, lng)
+        if not len(candidates):
+            return []
+        distances = self.rings.distances_from(lat, lng, candidates)
+        mask = (distances > self.ring_inner[candidates]) & (distances < self.rings.radius[candidates])
+        return [(int(index), float(d)) for index, d in zip(candidates[mask], distances[mask])]
+
+    def zones_for_route(self, origin_lat, origin_lng, dest_lat, dest_lng, route=None):
+        """RouteConflicts for a route's endpoints against every zone extension ring."""
+        hits = []
+        for offset, (lat, lng) in enumerate(((origin_lat, origin_lng), (dest_lat, dest_lng))):
+            point = _point(lat, lng)
+            if point is None:
+                continue
+            for index, distance in self.rings_containing(*point):
+                hits.append((index, offset, distance))
+        hits.sort()
+        return [
+            RouteConflict(self.ring_zones[index], route, self.POINTS[offset], distance)
+            for index, offset, distance in hits
+        ]
+
+    def audit(self):
+        """Every zone/route conflict in the catalogue, grouped by zone in Zone ordering."""
+        conflicts = []
+        for zone in self.ring_zones:
+            conflicts.extend(self.routes_in_ring(
+                zone.center_latitude, zone.center_longitude, zone.radius_km, zone.max_extension_km, zone=zone,
+            ))
+        return conflicts
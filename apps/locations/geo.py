@@ -0,0 +1,160 @@
+"""
+Vectorized great-circle kernels.
+
+Coordinates are held in contiguous float64 NumPy arrays (radians, with cos(lat)
+precomputed) so the distance from one point to every candidate is a single
+array expression instead of a Python loop. Zone polygons are prepared once
+into edge arrays plus a bounding box for point-in-polygon tests. The scalar
+``haversine_km`` is kept for one-off distances, where NumPy's per-call overhead
+would dominate.
+"""
+from math import radians, cos, sin, asin, sqrt
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km between two points."""
+    lat1, lon1, lat2, lon2 = map(radians, [float(lat1), float(lon1), float(lat2), float(lon2)])
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+
+    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
+    c = 2 * asin(sqrt(a))
+
+    return EARTH_RADIUS_KM * c
+
+
+def _as_array(values):
+    return np.ascontiguousarray(np.asarray(values, dtype=np.float64))
+
+
+class PointArray:
+    """A set of points as contiguous float64 arrays."""
+
+    def __init__(self, lats, lngs):
+        self.lat = np.radians(_as_array(lats))
+        self.lng = np.radians(_as_array(lngs))
+        self.cos_lat = np.cos(self.lat)
+
+    def __len__(self):
+        return len(self.lat)
+
+    def distances_from(self, lat, lng, index=None):
+        """
+        Distances in km from (lat, lng) to every point, or to ``index`` only.
+
+        ``index`` is an integer array selecting a subset; the result is aligned
+        with it.
+        """
+        lat, lng = radians(float(lat)), radians(float(lng))
+        if index is None:
+            p_lat, p_lng, p_cos = self.lat, self.lng, self.cos_lat
+        else:
+            p_lat, p_lng, p_cos = self.lat[index], self.lng[index], self.cos_lat[index]
+        a = np.sin((p_lat - lat) / 2) ** 2 + cos(lat) * p_cos * np.sin((p_lng - lng) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class CircleArray(PointArray):
+    """Circles (center + radius in km) as contiguous float64 arrays."""
+
+    def __init__(self, lats, lngs, radii):
+        super().__init__(lats, lngs)
+        self.radius = _as_array(radii)
+
+    def contains(self, lat, lng, index=None):
+        """
+        Return ``(mask, distances)`` for the point against every circle (or ``index``).
+
+        ``mask[i]`` is True when the point lies inside circle i (boundary inclusive).
+        """
+        distances = self.distances_from(lat, lng, index)
+        radius = self.radius if index is None else self.radius[index]
+        return distances <= radius, distances
+
+    def smallest_containing(self, lat, lng):
+        """Index of the smallest circle containing the point (first wins on ties), or None."""
+        if not len(self):
+            return None
+        mask, _ = self.contains(lat, lng)
+        if not mask.any():
+            return None
+        return int(np.argmin(np.where(mask, self.radius, np.inf)))
+
+
+def _polygon_rings(raw):
+    """
+    Extract rings as lists of (lng, lat) from a GeoJSON value.
+
+    Accepts a Feature, a Polygon or MultiPolygon geometry, or a bare Polygon
+    coordinate array (list of rings) or single ring.
+    """
+    if isinstance(raw, dict):
+        if raw.get('type') == 'Feature':
+            return _polygon_rings(raw.get('geometry'))
+        if raw.get('type') == 'Polygon':
+            return [ring for ring in raw.get('coordinates') or []]
+        if raw.get('type') == 'MultiPolygon':
+            return [ring for polygon in raw.get('coordinates') or [] for ring in polygon]
+        return []
+    if isinstance(raw, list) and raw:
+        # A single ring is a list of [lng, lat] positions
+        if isinstance(raw[0], (list, tuple)) and raw[0] and isinstance(raw[0][0], (int, float)):
+            return [raw]
+        return raw
+    return []
+
+
+class Polygon:
+    """
+    A GeoJSON (multi)polygon prepared for fast point-in-polygon tests.
+
+    All ring edges are kept as contiguous float64 arrays; containment uses the
+    even-odd rule over every ring, so holes and multi-part zones work without
+    special cases. The bounding box is checked before the exact test.
+    """
+
+    def __init__(self, rings):
+        x1, y1, x2, y2 = [], [], [], []
+        for ring in rings:
+            points = [(float(p[0]), float(p[1])) for p in ring]
+            if len(points) < 3:
+                continue
+            # GeoJSON rings are closed, but tolerate open ones
+            if points[0] != points[-1]:
+                points.append(points[0])
+            for (a_lng, a_lat), (b_lng, b_lat) in zip(points, points[1:]):
+                x1.append(a_lng)
+                y1.append(a_lat)
+                x2.append(b_lng)
+                y2.append(b_lat)
+        if not x1:
+            raise ValueError('polygon has no rings with at least 3 points')
+        self.x1, self.y1, self.x2, self.y2 = _as_array(x1), _as_array(y1), _as_array(x2), _as_array(y2)
+        # Slope of each edge in lng per lat; horizontal edges never cross the scanline
+        dy = self.y2 - self.y1
+        self.slope = np.divide(self.x2 - self.x1, dy, out=np.zeros_like(dy), where=dy != 0)
+        lats = np.concatenate([self.y1, self.y2])
+        lngs = np.concatenate([self.x1, self.x2])
+        self.bbox = (float(lats.min()), float(lngs.min()), float(lats.max()), float(lngs.max()))
+
+    @classmethod
+    def from_geojson(cls, raw):
+        """Build a Polygon from a GeoJSON value, or return None if it is empty or malformed."""
+        try:
+            return cls(_polygon_rings(raw))
+        except (ValueError, TypeError, IndexError, KeyError):
+            return None
+
+    def contains(self, lat, lng):
+        """True when (lat, lng) lies inside the polygon."""
+        lat, lng = float(lat), float(lng)
+        min_lat, min_lng, max_lat, max_lng = self.bbox
+        if lat < min_lat or lat > max_lat or lng < min_lng or lng > max_lng:
+            return False
+        crosses = (self.y1 > lat) != (self.y2 > lat)
+        x_at_lat = self.x1 + (lat - self.y1) * self.slope
+        return bool(np.count_nonzero(crosses & (lng < x_at_lat)) % 2)
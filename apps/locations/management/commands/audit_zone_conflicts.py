@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Report every route endpoint that falls inside an active zone extension ring (e.g. after a CSV import)'
+
+    def handle(self, *args, **options):
+        from apps.locations.api.views import _audit_zone_route_conflicts
+
+        conflicts = _audit_zone_route_conflicts()
+        for c in conflicts:
+            self.stdout.write(
+                f'Zone "{c["zone_name"]}" ({c["zone_id"]}) / route "{c["route_name"]}" ({c["route_id"]}): '
+                f'{c["point"]} is {c["distance_km"]} km from the zone center'
+            )
+
+        if conflicts:
+            self.stdout.write(self.style.WARNING(f'{len(conflicts)} conflict(s) found.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('No zone/route conflicts found.'))
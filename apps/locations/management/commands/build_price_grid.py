@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Precompute the price grid for popular routes and publish it as a versioned gzipped JSON artifact'
+
+    def handle(self, *args, **options):
+        from apps.locations.price_grid import publish_price_grid
+
+        manifest = publish_price_grid()
+        self.stdout.write(self.style.SUCCESS(
+            f'Price grid {manifest["etag"]}: {manifest["routes"]} route(s), '
+            f'{manifest["size"]} bytes at {manifest["path"]}'
+        ))
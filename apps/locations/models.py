@@ -98,8 +98,20 @@ class Zone(models.Model):
     def __str__(self):
         return self.name
 
+    def clean(self):
+        from django.core.exceptions import ValidationError
+        from apps.locations.geo import Polygon
+        if self.polygon_coordinates and Polygon.from_geojson(self.polygon_coordinates) is None:
+            raise ValidationError({
+                'polygon_coordinates': _('Enter a GeoJSON Polygon or MultiPolygon with at least 3 points.')
+            })
+
     def get_range_for_distance(self, distance_km):
         """Get the range that matches a given distance."""
+        if self.is_active:
+            # Served from the in-memory interval index of the pricing snapshot
+            from apps.locations.pricing import pricing_engine
+            return pricing_engine.snapshot().range_for_distance(self, distance_km)
         return self.distance_ranges.filter(
             is_active=True,
             min_km__lte=distance_km,
@@ -0,0 +1,160 @@
+"""
+Precomputed price grid for popular routes.
+
+Every active route flagged ``is_popular`` is priced from the pricing snapshot
+for every vehicle x pickup sub-zone x dropoff sub-zone x direction (``None``
+meaning "outside any sub-zone"). The grid is serialized as canonical JSON and
+gzipped; the content hash is both the artifact name and its ETag, so each
+artifact is immutable and unchanged grids keep their ETag across rebuilds.
+
+A small manifest (ETag, storage path, generation time) points at the latest
+artifact. It is kept in default storage and mirrored in the cache.
+"""
+import gzip
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone, translation
+
+PRICE_GRID_DIR = 'price-grid'
+PRICE_GRID_MANIFEST = f'{PRICE_GRID_DIR}/latest.json'
+PRICE_GRID_CACHE_KEY = 'locations:price_grid:manifest'
+
+
+def _route_grid(snapshot, route):
+    """Grid entry for one route: its sub-zones, every price row and the "from" prices."""
+    pickup_zones, dropoff_zones = snapshot.route_subzones(route)
+    directions = [('forward', pickup_zones, dropoff_zones)]
+    if route.is_bidirectional:
+        # Travelling destination -> origin, pickup happens in the route's dropoff zones
+        directions.append(('reverse', dropoff_zones, pickup_zones))
+
+    prices = []
+    vehicles = {}
+    for direction, pickups, dropoffs in directions:
+        for pickup in (None,) + tuple(pickups):
+            for dropoff in (None,) + tuple(dropoffs):
+                for option in snapshot.route_options(route, pickup, dropoff):
+                    vehicle = option.vehicle
+                    vehicles[vehicle.id] = {
+                        'id': vehicle.id,
+                        'name': vehicle.name,
+                        'category_id': vehicle.category_id,
+                        'category_name': vehicle.category.name,
+                        'passengers': vehicle.passengers,
+                        'luggage': vehicle.luggage,
+                    }
+                    prices.append({
+                        'direction': direction,
+                        'vehicle_id': vehicle.id,
+                        'pickup_zone_id': pickup.id if pickup else None,
+                        'dropoff_zone_id': dropoff.id if dropoff else None,
+                        'price': float(option.price),
+                    })
+
+    from_prices = {}
+    for row in prices:
+        category_id = str(vehicles[row['vehicle_id']]['category_id'])
+        if category_id not in from_prices or row['price'] < from_prices[category_id]:
+            from_prices[category_id] = row['price']
+
+    return {
+        'id': route.id,
+        'slug': route.slug,
+        'name': route.name,
+        'origin_name': route.origin_name,
+        'destination_name': route.destination_name,
+        'distance_km': float(route.distance_km) if route.distance_km is not None else None,
+        'estimated_duration_minutes': route.estimated_duration_minutes,
+        'is_bidirectional': route.is_bidirectional,
+        'deposit_percentage': float(route.deposit_percentage),
+        'pickup_zones': [{'id': z.id, 'name': z.name} for z in pickup_zones],
+        'dropoff_zones': [{'id': z.id, 'name': z.name} for z in dropoff_zones],
+        'vehicles': sorted(vehicles.values(), key=lambda v: v['id']),
+        'from_price': min((row['price'] for row in prices), default=None),
+        'from_prices': from_prices,
+        'prices': prices,
+    }
+
+
+def build_price_grid(snapshot=None):
+    """
+    Price grid for every popular route, as a JSON-ready dict.
+
+    In ``reverse`` rows ``pickup_zone_id`` refers to the route's dropoff
+    zones and ``dropoff_zone_id`` to its pickup zones, as in route pricing.
+    Names are in the default language.
+    """
+    from apps.accounts.models import SiteSettings
+    from apps.locations.pricing import pricing_engine
+
+    snapshot = snapshot or pricing_engine.snapshot()
+    with translation.override(settings.LANGUAGE_CODE):
+        return {
+            'currency': SiteSettings.get_settings().default_currency,
+            'routes': [_route_grid(snapshot, route) for route in snapshot.routes.routes if route.is_popular],
+        }
+
+
+def encode_price_grid(grid):
+    """Return (etag, gzipped body) for a grid; equal grids give equal bytes."""
+    body = json.dumps(grid, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    etag = hashlib.sha256(body).hexdigest()[:32]
+    return etag, gzip.compress(body, mtime=0)
+
+
+def get_price_grid_manifest():
+    """Manifest of the latest artifact, or None if no grid was published yet."""
+    manifest = cache.get(PRICE_GRID_CACHE_KEY)
+    if manifest is None and default_storage.exists(PRICE_GRID_MANIFEST):
+        with default_storage.open(PRICE_GRID_MANIFEST) as f:
+            manifest = json.loads(f.read())
+        cache.set(PRICE_GRID_CACHE_KEY, manifest, None)
+    return manifest
+
+
+def read_price_grid(manifest):
+    """Gzipped body of the artifact a manifest points at."""
+    with default_storage.open(manifest['path']) as f:
+        return f.read()
+
+
+def publish_price_grid():
+    """
+    Build, store and point the manifest at the current price grid.
+
+    The previous artifact is kept so clients holding its ETag can still
+    fetch it; older ones are deleted. Returns the new manifest.
+    """
+    grid = build_price_grid()
+    etag, body = encode_price_grid(grid)
+    path = f'{PRICE_GRID_DIR}/price-grid-{etag}.json.gz'
+
+    previous = get_price_grid_manifest()
+    if previous and previous['etag'] == etag:
+        return previous
+
+    if not default_storage.exists(path):
+        default_storage.save(path, ContentFile(body))
+
+    manifest = {
+        'etag': etag,
+        'path': path,
+        'previous_path': previous['path'] if previous else None,
+        'generated_at': timezone.now().isoformat(),
+        'routes': len(grid['routes']),
+        'size': len(body),
+    }
+    if default_storage.exists(PRICE_GRID_MANIFEST):
+        default_storage.delete(PRICE_GRID_MANIFEST)
+    default_storage.save(PRICE_GRID_MANIFEST, ContentFile(json.dumps(manifest).encode('utf-8')))
+    cache.set(PRICE_GRID_CACHE_KEY, manifest, None)
+
+    stale = previous.get('previous_path') if previous else None
+    if stale and stale not in (path, manifest['previous_path']) and default_storage.exists(stale):
+        default_storage.delete(stale)
+    return manifest
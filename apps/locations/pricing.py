@@ -0,0 +1,356 @@
+"""
+Single pricing engine shared by the pricing, quote and booking endpoints.
+
+All pricing inputs (zones, distance ranges, routes, sub-zones, vehicle prices
+and the per-vehicle sub-zone adjustments) are loaded into an immutable
+PricingSnapshot held in process memory. Any write to a pricing model bumps the
+shared pricing version (see apps.locations.signals) and the next request swaps
+in a freshly built snapshot, so quotes never touch the database.
+"""
+from decimal import Decimal, InvalidOperation
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+
+from config.process_cache import ProcessCache
+
+from .conflicts import ConflictIndex
+from .geo import CircleArray, haversine_km
+from .ranges import RangeIndex
+from .spatial import ZoneIndex, RouteIndex
+
+PRICING_VERSION_KEY = 'locations:pricing:version'
+
+
+def snap_coordinates(*coords):
+    """
+    Round coordinates to PRICING_RESPONSE_CACHE_PRECISION decimal places.
+
+    Every quote is priced on snapped coordinates, so a cached get_pricing
+    response, a quote and a booking for the same point always agree, even
+    near a zone or route boundary.
+    """
+    precision = getattr(settings, 'PRICING_RESPONSE_CACHE_PRECISION', 4)
+    return tuple(round(float(value), precision) for value in coords)
+
+
+class PricedVehicle(NamedTuple):
+    """One vehicle's price for a matched zone or route."""
+    vehicle: object
+    price: Decimal
+    cost: Optional[Decimal]
+    min_booking_hours: Optional[int]
+    pricing: object  # the VehicleZonePricing / VehicleRoutePricing row
+
+
+class PricingQuote(NamedTuple):
+    """Result of pricing a pickup/dropoff pair against a snapshot."""
+    method: str  # 'zone' or 'route'
+    options: tuple
+    deposit_percentage: Decimal
+    zone: object = None
+    route: object = None
+    is_reverse: bool = False
+    pickup_subzone: object = None
+    dropoff_subzone: object = None
+    # Distance the zone range was looked up with (driving or haversine km)
+    distance_km: Optional[float] = None
+    # Extension ring pricing (pickup in zone, dropoff just outside)
+    km_beyond: Optional[float] = None
+    surcharge: Optional[Decimal] = None
+
+    @property
+    def is_extension(self):
+        return self.surcharge is not None
+
+    @property
+    def min_booking_hours(self):
+        values = [o.min_booking_hours for o in self.options if o.min_booking_hours]
+        return min(values) if values else None
+
+
+def _parse_adjustments(raw):
+    """Turn a {"zone_id": "amount"} JSON dict into {zone_id: Decimal}."""
+    adjustments = {}
+    for zone_id, amount in (raw or {}).items():
+        try:
+            adjustments[int(zone_id)] = Decimal(str(amount))
+        except (ValueError, TypeError, InvalidOperation):
+            continue
+    return adjustments
+
+
+class PricingSnapshot:
+    """Immutable, versioned view of every pricing input."""
+
+    def __init__(self, version, zones, distance_ranges, zone_pricing, routes,
+                 pickup_subzones, dropoff_subzones, route_pricing):
+        self.version = version
+        self.zones = ZoneIndex(zones)
+        self.routes = RouteIndex(routes)
+        self.conflicts = ConflictIndex(zones, routes)
+
+        # zone_id -> RangeIndex over the zone's active ranges
+        ranges_by_zone = {}
+        for distance_range in distance_ranges:
+            ranges_by_zone.setdefault(distance_range.zone_id, []).append(distance_range)
+        self._ranges = {zone_id: RangeIndex(items) for zone_id, items in ranges_by_zone.items()}
+
+        # range_id -> (VehicleZonePricing, ...)
+        prices_by_range = {}
+        for zp in zone_pricing:
+            prices_by_range.setdefault(zp.zone_distance_range_id, []).append(zp)
+        self._zone_pricing = {range_id: tuple(items) for range_id, items in prices_by_range.items()}
+
+        # route_id -> ((subzone, ...), CircleArray)
+        self._pickup_subzones = self._group_subzones(pickup_subzones)
+        self._dropoff_subzones = self._group_subzones(dropoff_subzones)
+
+        # route_id -> ((VehicleRoutePricing, pickup_adjustments, dropoff_adjustments), ...)
+        prices_by_route = {}
+        for rp in route_pricing:
+            prices_by_route.setdefault(rp.route_id, []).append((
+                rp,
+                _parse_adjustments(rp.pickup_zone_adjustments),
+                _parse_adjustments(rp.dropoff_zone_adjustments),
+            ))
+        self._route_pricing = {route_id: tuple(items) for route_id, items in prices_by_route.items()}
+
+    @staticmethod
+    def _group_subzones(subzones):
+        grouped = {}
+        for subzone in subzones:
+            grouped.setdefault(subzone.route_id, []).append(subzone)
+        return {
+            route_id: (tuple(items), CircleArray(
+                [float(z.center_latitude) for z in items],
+                [float(z.center_longitude) for z in items],
+                [float(z.radius_km) for z in items],
+            ))
+            for route_id, items in grouped.items()
+        }
+
+    @staticmethod
+    def _smallest_containing(grouped, route, lat, lng):
+        """Return the smallest sub-zone of ``route`` containing the point (first wins on ties)."""
+        if route.id not in grouped:
+            return None
+        subzones, circles = grouped[route.id]
+        index = circles.smallest_containing(lat, lng)
+        return subzones[index] if index is not None else None
+
+    @classmethod
+    def load(cls, version=None):
+        """Build a snapshot from the database."""
+        from apps.locations.models import (
+            Zone, ZoneDistanceRange, Route, RoutePickupZone, RouteDropoffZone, VehicleRoutePricing,
+        )
+        from apps.vehicles.models import VehicleZonePricing
+
+        return cls(
+            version=version,
+            zones=list(Zone.objects.filter(is_active=True)),
+            distance_ranges=list(ZoneDistanceRange.objects.filter(is_active=True, zone__is_active=True)),
+            zone_pricing=list(VehicleZonePricing.objects.filter(
+                is_active=True,
+                zone_distance_range__is_active=True,
+                zone_distance_range__zone__is_active=True,
+            ).select_related('vehicle', 'vehicle__category', 'vehicle__supplier')),
+            routes=list(Route.objects.filter(is_active=True)),
+            pickup_subzones=list(RoutePickupZone.objects.filter(is_active=True, route__is_active=True)),
+            dropoff_subzones=list(RouteDropoffZone.objects.filter(is_active=True, route__is_active=True)),
+            route_pricing=list(VehicleRoutePricing.objects.filter(
+                is_active=True,
+                route__is_active=True,
+                pickup_zone__isnull=True,
+                dropoff_zone__isnull=True,
+            ).select_related('vehicle', 'vehicle__category', 'vehicle__supplier')),
+        )
+
+    # -- lookups ------------------------------------------------------------
+
+    def range_for_distance(self, zone, distance_km):
+        """Return the active distance range of ``zone`` covering ``distance_km`` (inclusive)."""
+        index = self._ranges.get(zone.id)
+        return index.find(distance_km) if index is not None else None
+
+    def pickup_subzone(self, route, lat, lng):
+        """Smallest active pickup zone of ``route`` containing the point."""
+        return self._smallest_containing(self._pickup_subzones, route, lat, lng)
+
+    def dropoff_subzone(self, route, lat, lng):
+        """Smallest active dropoff zone of ``route`` containing the point."""
+        return self._smallest_containing(self._dropoff_subzones, route, lat, lng)
+
+    def route_subzones(self, route):
+        """Active (pickup sub-zones, dropoff sub-zones) of ``route``."""
+        pickup = self._pickup_subzones.get(route.id)
+        dropoff = self._dropoff_subzones.get(route.id)
+        return (pickup[0] if pickup else ()), (dropoff[0] if dropoff else ())
+
+    def zone_options(self, distance_range, vehicle_category_id=None, surcharge=None):
+        """Vehicle prices for a zone distance range, optionally for one category."""
+        options = []
+        for zp in self._zone_pricing.get(distance_range.id, ()):
+            if vehicle_category_id is not None and zp.vehicle.category_id != vehicle_category_id:
+                continue
+            price = zp.price + surcharge if surcharge is not None else zp.price
+            options.append(PricedVehicle(zp.vehicle, price, zp.cost, zp.min_booking_hours, zp))
+        return tuple(options)
+
+    def route_options(self, route, pickup_subzone=None, dropoff_subzone=None, vehicle_category_id=None):
+        """Default route prices plus per-vehicle sub-zone adjustments."""
+        options = []
+        for rp, pickup_adjustments, dropoff_adjustments in self._route_pricing.get(route.id, ()):
+            if vehicle_category_id is not None and rp.vehicle.category_id != vehicle_category_id:
+                continue
+            price = rp.price
+            if pickup_subzone is not None:
+                price += pickup_adjustments.get(pickup_subzone.id, Decimal('0'))
+            if dropoff_subzone is not None:
+                price += dropoff_adjustments.get(dropoff_subzone.id, Decimal('0'))
+            options.append(PricedVehicle(rp.vehicle, price, rp.cost, rp.min_booking_hours, rp))
+        return tuple(options)
+
+    # -- quoting ------------------------------------------------------------
+
+    def _candidates(self, pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, distance_km=None):
+        """
+        Yield an unfiltered PricingQuote for every pricing step that matches, in priority order.
+
+        Steps: both points in the same zone (range looked up with
+        ``distance_km`` or the haversine distance), the zone extension ring,
+        then the first matching route. Lazy, so a quote that is settled by the
+        first step never runs the route match.
+        """
+        p_lat, p_lng, d_lat, d_lng = snap_coordinates(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng)
+
+        pickup_zone = self.zones.find(p_lat, p_lng)
+        dropoff_zone = self.zones.find(d_lat, d_lng)
+
+        # 1. Both points in the same zone
+        if pickup_zone and dropoff_zone and pickup_zone.id == dropoff_zone.id:
+            zone_distance = float(distance_km) if distance_km else haversine_km(p_lat, p_lng, d_lat, d_lng)
+            distance_range = self.range_for_distance(pickup_zone, zone_distance)
+            if distance_range:
+                yield PricingQuote(
+                    method='zone', options=self.zone_options(distance_range),
+                    deposit_percentage=pickup_zone.deposit_percentage,
+                    zone=pickup_zone, distance_km=zone_distance,
+                )
+
+        # 2. Extended zone: pickup inside zone radius, dropoff just outside in the extension ring
+        if pickup_zone and dropoff_zone is None \
+                and pickup_zone.has_coordinates and pickup_zone.radius_km is not None \
+                and float(pickup_zone.max_extension_km or 0) > 0 \
+                and float(pickup_zone.extra_km_price or 0) > 0:
+            zone = pickup_zone
+            dropoff_dist = haversine_km(d_lat, d_lng, float(zone.center_latitude), float(zone.center_longitude))
+            outer_boundary = float(zone.radius_km) + float(zone.max_extension_km)
+            if dropoff_dist <= outer_boundary:
+                km_beyond = max(0.0, dropoff_dist - float(zone.radius_km))
+                # Extension ring is defined in haversine km; use haversine for range lookup too
+                zone_distance = haversine_km(p_lat, p_lng, d_lat, d_lng)
+                distance_range = self.range_for_distance(zone, zone_distance)
+                if distance_range:
+                    surcharge = Decimal(str(round(float(zone.extra_km_price) * km_beyond, 2)))
+                    yield PricingQuote(
+                        method='zone', options=self.zone_options(distance_range, surcharge=surcharge),
+                        deposit_percentage=zone.deposit_percentage,
+                        zone=zone, distance_km=zone_distance, km_beyond=km_beyond, surcharge=surcharge,
+                    )
+
+        # 3. Route pricing with sub-zone adjustments
+        match = self.routes.first_match(p_lat, p_lng, d_lat, d_lng)
+        if match:
+            route = match.route
+            if match.is_reverse:
+                # For reverse, pickup from dropoff zones and vice versa
+                pickup_subzone = self.dropoff_subzone(route, p_lat, p_lng)
+                dropoff_subzone = self.pickup_subzone(route, d_lat, d_lng)
+            else:
+                pickup_subzone = self.pickup_subzone(route, p_lat, p_lng)
+                dropoff_subzone = self.dropoff_subzone(route, d_lat, d_lng)
+            yield PricingQuote(
+                method='route',
+                options=self.route_options(route, pickup_subzone, dropoff_subzone),
+                deposit_percentage=route.deposit_percentage,
+                route=route, is_reverse=match.is_reverse,
+                pickup_subzone=pickup_subzone, dropoff_subzone=dropoff_subzone,
+            )
+
+    @staticmethod
+    def _pick(candidates, vehicle_category_id=None):
+        """
+        First candidate with prices (for one category, if given).
+
+        Zone matches without prices fall through to routes; a matched route is
+        returned even if it has no options.
+        """
+        for candidate in candidates:
+            if vehicle_category_id is not None:
+                candidate = candidate._replace(options=tuple(
+                    option for option in candidate.options if option.vehicle.category_id == vehicle_category_id
+                ))
+            if candidate.options or candidate.method == 'route':
+                return candidate
+        return None
+
+    def quote(self, pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, distance_km=None, vehicle_category_id=None):
+        """
+        Price a pickup/dropoff pair.
+
+        Returns the PricingQuote of the first matching step (see _candidates)
+        that has prices, or None when nothing is configured.
+        """
+        return self._pick(
+            self._candidates(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, distance_km),
+            vehicle_category_id,
+        )
+
+    def quote_categories(self, pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, distance_km=None,
+                         vehicle_category_ids=None):
+        """
+        Price several vehicle categories against a single geo-match.
+
+        Returns {category_id: PricingQuote or None}, each entry equal to
+        ``quote(..., vehicle_category_id=category_id)``. With
+        ``vehicle_category_ids`` None, every category priced by any matching
+        step is included, in order of first appearance.
+        """
+        candidates = list(self._candidates(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, distance_km))
+        if vehicle_category_ids is None:
+            vehicle_category_ids = list(dict.fromkeys(
+                option.vehicle.category_id for candidate in candidates for option in candidate.options
+            ))
+        return {
+            category_id: self._pick(candidates, category_id)
+            for category_id in vehicle_category_ids
+        }
+
+
+class PricingEngine:
+    """Process-wide access to the current PricingSnapshot."""
+
+    def __init__(self):
+        self._snapshots = ProcessCache(PRICING_VERSION_KEY, PricingSnapshot.load)
+
+    def snapshot(self):
+        """Return the current snapshot; hold on to it for the whole request."""
+        return self._snapshots.get()
+
+    def version(self):
+        return self._snapshots.version()
+
+    def invalidate(self):
+        """Bump the pricing version so every worker swaps in a new snapshot."""
+        self._snapshots.invalidate()
+
+    def quote(self, *args, **kwargs):
+        return self.snapshot().quote(*args, **kwargs)
+
+    def quote_categories(self, *args, **kwargs):
+        return self.snapshot().quote_categories(*args, **kwargs)
+
+
+pricing_engine = PricingEngine()
@@ -0,0 +1,141 @@
+"""
+Sorted interval helpers for ZoneDistanceRange tables.
+
+RangeIndex answers "which range covers this distance" with a bisect over a
+zone's ranges sorted by min_km, and validate_distance_ranges checks a whole
+range table for overlaps in one sort-and-sweep pass instead of one query per
+row.
+"""
+from bisect import bisect_left, bisect_right
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.utils.translation import gettext as _
+
+
+class RangeIndex:
+    """
+    A zone's ranges as sorted interval arrays.
+
+    Lookups keep the semantics of the old ``min_km <= d <= max_km`` query
+    ordered by ``min_km``: when ranges share an endpoint (or legacy rows
+    overlap) the covering range with the lowest ``min_km`` wins.
+    """
+
+    def __init__(self, ranges):
+        items = sorted(ranges, key=lambda r: (float(r.min_km), r.pk or 0))
+        self.ranges = tuple(items)
+        self.starts = [float(r.min_km) for r in items]
+        # Running maximum of max_km; non-decreasing, so it can be bisected too
+        self.reach = []
+        reach = float('-inf')
+        for r in items:
+            reach = max(reach, float(r.max_km))
+            self.reach.append(reach)
+
+    def __len__(self):
+        return len(self.ranges)
+
+    def find(self, distance_km):
+        """Return the first range (by min_km) with min_km <= d <= max_km, or None."""
+        distance_km = float(distance_km)
+        # Ranges [0, last] start at or before d
+        last = bisect_right(self.starts, distance_km) - 1
+        if last < 0:
+            return None
+        # The first range whose running reach gets to d is the one that reaches it
+        first = bisect_left(self.reach, distance_km)
+        return self.ranges[first] if first <= last else None
+
+
+def find_range_overlaps(ranges):
+    """
+    Return ``(earlier, later)`` pairs of overlapping ranges in O(n log n).
+
+    Ranges are swept in min_km order; every range that starts before the
+    furthest max_km seen so far is reported against the range that reached it.
+    Ranges that only share an endpoint (``a.max_km == b.min_km``) do not
+    overlap, matching ZoneDistanceRange.clean.
+    """
+    overlaps = []
+    widest = None
+    for current in sorted(ranges, key=lambda r: (r.min_km, r.max_km)):
+        if widest is not None and current.min_km < widest.max_km:
+            overlaps.append((widest, current))
+        if widest is None or current.max_km > widest.max_km:
+            widest = current
+    return overlaps
+
+
+def validate_distance_ranges(ranges):
+    """
+    Validate a whole range table for one zone at once.
+
+    Checks that distances are finite and not negative, min < max on every
+    row, and that active rows do not overlap.
+    Raises a ValidationError listing every problem found.
+    """
+    errors = []
+    valid = []
+    for r in ranges:
+        try:
+            min_km, max_km = Decimal(str(r.min_km)), Decimal(str(r.max_km))
+        except (InvalidOperation, TypeError, ValueError):
+            errors.append(_('Range "%(name)s" has an invalid distance.') % {'name': r.name})
+            continue
+        # NaN cannot be compared and Infinity does not fit the column
+        if not (min_km.is_finite() and max_km.is_finite()) or min_km < 0:
+            errors.append(_('Range "%(name)s" has an invalid distance.') % {'name': r.name})
+            continue
+        if min_km >= max_km:
+            errors.append(_('Range "%(name)s": minimum distance must be less than maximum distance.') % {'name': r.name})
+            continue
+        r.min_km, r.max_km = min_km, max_km
+        if r.is_active:
+            valid.append(r)
+
+    for a, b in find_range_overlaps(valid):
+        errors.append(_('Range "%(a)s" (%(a_min)s-%(a_max)s km) overlaps "%(b)s" (%(b_min)s-%(b_max)s km).') % {
+            'a': a.name, 'a_min': a.min_km, 'a_max': a.max_km,
+            'b': b.name, 'b_min': b.min_km, 'b_max': b.max_km,
+        })
+
+    if errors:
+        raise ValidationError(errors)
+
+
+def save_range_table(zone, rows):
+    """
+    Apply edits to a zone's whole range table, validated in one pass.
+
+    ``rows`` are dicts with ``id``, ``name``, ``min_km``, ``max_km`` and
+    ``is_active`` for existing ranges of ``zone``; ranges not listed keep their
+    values but still take part in the overlap check. Raises ValidationError
+    without saving anything if the resulting table is invalid.
+    """
+    from django.db import transaction
+    from django.utils import timezone
+    from apps.locations.models import ZoneDistanceRange
+    from apps.locations.pricing import pricing_engine
+
+    table = {r.pk: r for r in ZoneDistanceRange.objects.filter(zone=zone)}
+    now = timezone.now()
+    changed = []
+    for row in rows:
+        distance_range = table.get(int(row['id']))
+        if distance_range is None:
+            raise ValidationError(_('Unknown distance range %(id)s.') % {'id': row['id']})
+        distance_range.name = row.get('name') or distance_range.name
+        distance_range.min_km = row['min_km']
+        distance_range.max_km = row['max_km']
+        distance_range.is_active = bool(row.get('is_active'))
+        distance_range.updated_at = now
+        changed.append(distance_range)
+
+    validate_distance_ranges(table.values())
+
+    with transaction.atomic():
+        ZoneDistanceRange.objects.bulk_update(changed, ['name', 'min_km', 'max_km', 'is_active', 'updated_at'])
+        # bulk_update skips post_save, so refresh the pricing snapshot explicitly
+        pricing_engine.invalidate()
+    return changed
@@ -1,29 +1,93 @@
 """
 Distance calculation services using Google Distance Matrix API.
+
+Results are cached on coordinates snapped to DISTANCE_CACHE_PRECISION decimal
+places: a small in-process LRU sits in front of the shared Redis cache.
+Routes Google cannot find (NOT_FOUND, ZERO_RESULTS) are negatively cached for
+a shorter TTL; request-level failures are not cached. Hit/miss counters are
+summed across workers in Redis and logged by the log_distance_cache_stats
+task.
 """
 import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from decimal import Decimal
-from math import radians, sin, cos, sqrt, atan2
 
 import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings as django_settings
+from django.core.cache import cache
 
+from apps.accounts.key_cache import redis_connection
 from apps.accounts.models import SiteSettings
+from apps.locations.geo import haversine_km
 
 logger = logging.getLogger(__name__)
 
+# Hit/miss counters kept by DistanceCache
+DISTANCE_CACHE_COUNTERS = ('local_hits', 'redis_hits', 'negative_hits', 'misses')
+
+DISTANCE_MATRIX_URL = "https://maps.googleapis.com/maps/api/distancematrix/json"
+
+# Google Distance Matrix limits per request
+MATRIX_MAX_ORIGINS = 25
+MATRIX_MAX_DESTINATIONS = 25
+MATRIX_MAX_ELEMENTS = 100
+
+# Concurrent matrix requests issued by calculate_distances_batch()
+BATCH_WORKERS = getattr(django_settings, 'DISTANCE_BATCH_WORKERS', 8)
+
+# Shared session so Distance Matrix calls reuse pooled connections (and tests can stub it)
+http_session = requests.Session()
+http_session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=BATCH_WORKERS))
+
+# Runs budgeted lookups for calculate_distance_within() so the caller can stop waiting at the deadline
+lookup_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix='distance-lookup')
+
 
 class DistanceCalculationError(Exception):
     """Raised when distance calculation fails."""
     pass
 
 
+class RouteNotFound(DistanceCalculationError):
+    """Raised when Google answered but has no route for the pair."""
+    pass
+
+
+class DistanceLookupTimeout(DistanceCalculationError):
+    """Raised when the Distance Matrix call ran past the caller's time budget."""
+    pass
+
+
 def get_google_api_key():
     """Get the Google Maps API key from settings."""
     settings = SiteSettings.get_settings()
     return settings.google_maps_api_key
 
 
-def calculate_distance_google(origin_lat, origin_lng, dest_lat, dest_lng):
+def _parse_element(element):
+    """Turn one Distance Matrix element into a result dict."""
+    if element['status'] != 'OK':
+        raise RouteNotFound(f"Route not found: {element['status']}")
+
+    distance_meters = element['distance']['value']
+    distance_km = Decimal(str(distance_meters / 1000)).quantize(Decimal('0.01'))
+
+    duration_seconds = element['duration']['value']
+    duration_minutes = int(duration_seconds / 60)
+
+    return {
+        'distance_km': distance_km,
+        'distance_text': element['distance']['text'],
+        'duration_minutes': duration_minutes,
+        'duration_text': element['duration']['text']
+    }
+
+
+def calculate_distance_google(origin_lat, origin_lng, dest_lat, dest_lng, timeout=10, api_key=None):
     """
     Calculate driving distance and duration using Google Distance Matrix API.
 
@@ -32,6 +96,8 @@ def calculate_distance_google(origin_lat, origin_lng, dest_lat, dest_lng):
         origin_lng: Origin longitude
         dest_lat: Destination latitude
         dest_lng: Destination longitude
+        timeout: Seconds to wait for Google before giving up
+        api_key: Google Maps API key; looked up in SiteSettings when omitted
 
     Returns:
         dict: {
@@ -44,13 +110,12 @@ def calculate_distance_google(origin_lat, origin_lng, dest_lat, dest_lng):
     Raises:
         DistanceCalculationError: If the API call fails
     """
-    api_key = get_google_api_key()
+    if api_key is None:
+        api_key = get_google_api_key()
 
     if not api_key:
         raise DistanceCalculationError("Google Maps API key not configured")
 
-    url = "https://maps.googleapis.com/maps/api/distancematrix/json"
-
     params = {
         'origins': f"{origin_lat},{origin_lng}",
         'destinations': f"{dest_lat},{dest_lng}",
@@ -60,31 +125,17 @@ def calculate_distance_google(origin_lat, origin_lng, dest_lat, dest_lng):
     }
 
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = http_session.get(DISTANCE_MATRIX_URL, params=params, timeout=timeout)
         response.raise_for_status()
         data = response.json()
 
         if data['status'] != 'OK':
             raise DistanceCalculationError(f"Google API error: {data['status']}")
 
-        element = data['rows'][0]['elements'][0]
-
-        if element['status'] != 'OK':
-            raise DistanceCalculationError(f"Route not found: {element['status']}")
-
-        distance_meters = element['distance']['value']
-        distance_km = Decimal(str(distance_meters / 1000)).quantize(Decimal('0.01'))
-
-        duration_seconds = element['duration']['value']
-        duration_minutes = int(duration_seconds / 60)
-
-        return {
-            'distance_km': distance_km,
-            'distance_text': element['distance']['text'],
-            'duration_minutes': duration_minutes,
-            'duration_text': element['duration']['text']
-        }
+        return _parse_element(data['rows'][0]['elements'][0])
 
+    except requests.Timeout as e:
+        raise DistanceLookupTimeout(f"API request timed out after {timeout}s: {e}")
     except requests.RequestException as e:
         logger.error(f"Google Distance Matrix API request failed: {e}")
         raise DistanceCalculationError(f"API request failed: {e}")
@@ -98,6 +149,9 @@ def calculate_distance_haversine(lat1, lng1, lat2, lng2):
     Calculate straight-line distance using Haversine formula.
     This is a fallback when Google API is not available.
 
+    Thin Decimal wrapper around apps.locations.geo.haversine_km; bulk callers
+    should use the float kernels in apps.locations.geo directly.
+
     Args:
         lat1, lng1: Origin coordinates
         lat2, lng2: Destination coordinates
@@ -105,32 +159,396 @@ def calculate_distance_haversine(lat1, lng1, lat2, lng2):
     Returns:
         Decimal: Distance in kilometers
     """
-    R = 6371  # Earth's radius in kilometers
-
-    lat1, lng1, lat2, lng2 = map(radians, [float(lat1), float(lng1), float(lat2), float(lng2)])
-
-    dlat = lat2 - lat1
-    dlng = lng2 - lng1
+    distance = haversine_km(lat1, lng1, lat2, lng2)
+    return Decimal(str(round(distance, 2))).quantize(Decimal('0.01'))
+
+
+class _LocalLRU:
+    """Thread-safe, size-bounded LRU with per-entry expiry."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class DistanceCache:
+    """
+    Two-level cache for Distance Matrix results keyed on snapped coordinates.
 
-    a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlng / 2) ** 2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+    Entries are either {'result': {...}} or {'error': message} for negatively
+    cached RouteNotFound errors.
+    """
 
-    distance = R * c
-    return Decimal(str(distance)).quantize(Decimal('0.01'))
+    KEY_PREFIX = 'distance'
+    STATS_HASH = 'distance:stats'
+    # A process pushes its counters to Redis at most this often (seconds)
+    STATS_FLUSH_INTERVAL = 5
+
+    def __init__(self):
+        self.precision = getattr(django_settings, 'DISTANCE_CACHE_PRECISION', 4)
+        self.ttl = getattr(django_settings, 'DISTANCE_CACHE_TTL', 60 * 60 * 24 * 30)
+        self.negative_ttl = getattr(django_settings, 'DISTANCE_CACHE_NEGATIVE_TTL', 60 * 5)
+        self.local_ttl = getattr(django_settings, 'DISTANCE_CACHE_LOCAL_TTL', 60 * 60)
+        self.local = _LocalLRU(getattr(django_settings, 'DISTANCE_CACHE_LOCAL_SIZE', 4096))
+        self._counter_lock = threading.Lock()
+        # Counts not yet added to STATS_HASH
+        self.counters = dict.fromkeys(DISTANCE_CACHE_COUNTERS, 0)
+        self._flushed_at = time.monotonic()
+
+    def snap(self, origin_lat, origin_lng, dest_lat, dest_lng):
+        """Round coordinates to the configured precision."""
+        return tuple(round(float(v), self.precision) for v in (origin_lat, origin_lng, dest_lat, dest_lng))
+
+    def key(self, snapped):
+        return f"{self.KEY_PREFIX}:{self.precision}:" + ','.join(f"{v:.{self.precision}f}" for v in snapped)
+
+    def _count(self, name):
+        now = time.monotonic()
+        with self._counter_lock:
+            self.counters[name] += 1
+            if now - self._flushed_at < self.STATS_FLUSH_INTERVAL:
+                return
+            pending = self.counters
+            self.counters = dict.fromkeys(DISTANCE_CACHE_COUNTERS, 0)
+            self._flushed_at = now
+        self._flush_counters(pending)
+
+    def _flush_counters(self, pending):
+        """Add this process's counts to the shared hash. Best effort; never raises."""
+        redis = redis_connection()
+        if redis is None:
+            return
+        try:
+            pipe = redis.pipeline(transaction=False)
+            for name, count in pending.items():
+                if count:
+                    pipe.hincrby(self.STATS_HASH, name, count)
+            pipe.execute()
+        except Exception:
+            logger.debug('Could not record distance cache stats', exc_info=True)
+
+    def collect_stats(self):
+        """Return the hit/miss counts summed across workers since the last call, and reset them."""
+        redis = redis_connection()
+        if redis is None:
+            return None
+        # Read and clear atomically so counts arriving meanwhile wait for the next call
+        pipe = redis.pipeline(transaction=True)
+        pipe.hgetall(self.STATS_HASH)
+        pipe.delete(self.STATS_HASH)
+        counts, _ = pipe.execute()
+        stats = dict.fromkeys(DISTANCE_CACHE_COUNTERS, 0)
+        for name, count in counts.items():
+            name = name.decode() if isinstance(name, bytes) else name
+            if name in stats:
+                stats[name] = int(count)
+        return stats
+
+    def _unpack(self, entry):
+        if 'error' in entry:
+            raise RouteNotFound(entry['error'])
+        return dict(entry['result'])
+
+    def lookup(self, snapped):
+        """Return the cached entry for a snapped pair (local, then Redis), or None."""
+        key = self.key(snapped)
+
+        entry = self.local.get(key)
+        if entry is not None:
+            self._count('negative_hits' if 'error' in entry else 'local_hits')
+            return entry
+
+        try:
+            entry = cache.get(key)
+        except Exception:
+            logger.warning('Distance cache read failed', exc_info=True)
+            entry = None
+        if entry is None:
+            self._count('misses')
+            return None
+
+        self._count('negative_hits' if 'error' in entry else 'redis_hits')
+        local_ttl = self.negative_ttl if 'error' in entry else self.local_ttl
+        self.local.set(key, entry, min(local_ttl, self.local_ttl))
+        return entry
+
+    def store(self, snapped, entry):
+        """Write an entry to both levels; errors use the negative TTL."""
+        key = self.key(snapped)
+        ttl = self.negative_ttl if 'error' in entry else self.ttl
+        try:
+            cache.set(key, entry, ttl)
+        except Exception:
+            logger.warning('Distance cache write failed', exc_info=True)
+        self.local.set(key, entry, min(ttl, self.local_ttl))
+
+    def get_or_fetch(self, origin_lat, origin_lng, dest_lat, dest_lng, fetch):
+        """
+        Return a cached result for the snapped pair, calling ``fetch`` on a miss.
+
+        RouteNotFound from ``fetch`` is negatively cached; any other
+        DistanceCalculationError is transient and re-raised uncached.
+        """
+        snapped = self.snap(origin_lat, origin_lng, dest_lat, dest_lng)
+
+        entry = self.lookup(snapped)
+        if entry is None:
+            try:
+                entry = {'result': fetch(*snapped)}
+            except RouteNotFound as e:
+                entry = {'error': str(e)}
+            self.store(snapped, entry)
+        return self._unpack(entry)
+
+
+distance_cache = DistanceCache()
 
 
 def calculate_distance(origin_lat, origin_lng, dest_lat, dest_lng):
     """
     Calculate driving distance and duration using Google Distance Matrix API.
 
+    Served from the distance cache when the snapped pair was seen recently.
     Raises DistanceCalculationError if the API call fails — callers should
     catch this and fall back to haversine_distance() for straight-line estimates.
 
     Returns:
         dict with keys: distance_km, distance_text, duration_minutes, duration_text, source
     """
-    result = calculate_distance_google(origin_lat, origin_lng, dest_lat, dest_lng)
+    result = distance_cache.get_or_fetch(origin_lat, origin_lng, dest_lat, dest_lng, calculate_distance_google)
     result['source'] = 'google'
     return result
 
 
+def estimate_distance(origin_lat, origin_lng, dest_lat, dest_lng):
+    """
+    Straight-line estimate shaped like a calculate_distance() result.
+
+    Duration assumes 1.5 minutes per km; ``source`` is 'haversine'.
+    """
+    distance_km = calculate_distance_haversine(origin_lat, origin_lng, dest_lat, dest_lng)
+    duration_minutes = int(float(distance_km) * 1.5)
+    return {
+        'distance_km': distance_km,
+        'distance_text': f"{distance_km} km",
+        'duration_minutes': duration_minutes,
+        'duration_text': f"{duration_minutes} mins",
+        'source': 'haversine',
+    }
+
+
+def schedule_distance_refresh(origin_lat, origin_lng, dest_lat, dest_lng):
+    """Queue a background Distance Matrix lookup for the pair (at most once per cooldown)."""
+    snapped = distance_cache.snap(origin_lat, origin_lng, dest_lat, dest_lng)
+    cooldown = getattr(django_settings, 'DISTANCE_REFRESH_COOLDOWN', 60)
+    try:
+        if not cache.add(f"{distance_cache.key(snapped)}:refresh", 1, cooldown):
+            return
+        from apps.locations.tasks import refresh_distance
+        refresh_distance.delay(*snapped)
+    except Exception:
+        logger.warning('Could not queue distance refresh', exc_info=True)
+
+
+def calculate_distance_within(origin_lat, origin_lng, dest_lat, dest_lng, budget_ms=None):
+    """
+    Driving distance if it can be had within ``budget_ms``, else a haversine estimate.
+
+    Cached pairs are returned immediately. On a miss the Distance Matrix call
+    runs on a worker thread and the caller waits at most the budget
+    (DISTANCE_LOOKUP_BUDGET_MS by default) of wall-clock time; if it runs out,
+    the haversine estimate is returned and a Celery task fetches and caches
+    the real distance for the next caller. The abandoned call is left to
+    finish on its own socket timeout. Never raises; check the
+    ``source`` key ('google' or 'haversine') to see which one you got.
+    """
+    if budget_ms is None:
+        budget_ms = getattr(django_settings, 'DISTANCE_LOOKUP_BUDGET_MS', 300)
+
+    def fetch(*snapped):
+        # Settings are read here so the worker thread only does HTTP and never opens a DB connection
+        api_key = get_google_api_key()
+        if not api_key:
+            raise DistanceCalculationError("Google Maps API key not configured")
+        future = lookup_executor.submit(
+            calculate_distance_google, *snapped, timeout=budget_ms / 1000, api_key=api_key,
+        )
+        try:
+            return future.result(timeout=budget_ms / 1000)
+        except FutureTimeout:
+            raise DistanceLookupTimeout(f"Distance lookup exceeded {budget_ms}ms budget")
+
+    try:
+        result = distance_cache.get_or_fetch(origin_lat, origin_lng, dest_lat, dest_lng, fetch)
+        result['source'] = 'google'
+        return result
+    except DistanceLookupTimeout:
+        logger.info('Distance lookup exceeded %sms budget; using haversine estimate', budget_ms)
+        schedule_distance_refresh(origin_lat, origin_lng, dest_lat, dest_lng)
+    except DistanceCalculationError as e:
+        logger.warning('Distance lookup failed; using haversine estimate: %s', e)
+    return estimate_distance(origin_lat, origin_lng, dest_lat, dest_lng)
+
+
+def _plan_matrix_requests(pairs):
+    """
+    Fold (origin, destination) pairs into as few Distance Matrix requests as possible.
+
+    Google bills every element of the origins x destinations grid, so only
+    origins that want exactly the same destinations (or destinations wanted by
+    exactly the same origins) share a request. Both groupings are tried and the
+    one needing fewer requests wins. Returns a list of (origins, destinations).
+    """
+    def plan(by_origin):
+        partners = OrderedDict()
+        for origin, destination in pairs:
+            key, partner = (origin, destination) if by_origin else (destination, origin)
+            partners.setdefault(key, []).append(partner)
+
+        blocks = OrderedDict()
+        for key, wanted in partners.items():
+            blocks.setdefault(tuple(sorted(set(wanted))), []).append(key)
+
+        max_keys, max_partners = (
+            (MATRIX_MAX_ORIGINS, MATRIX_MAX_DESTINATIONS) if by_origin
+            else (MATRIX_MAX_DESTINATIONS, MATRIX_MAX_ORIGINS)
+        )
+        chunks = []
+        for wanted, keys in blocks.items():
+            partner_step = min(max_partners, MATRIX_MAX_ELEMENTS)
+            for i in range(0, len(wanted), partner_step):
+                partner_chunk = list(wanted[i:i + partner_step])
+                key_step = min(max_keys, MATRIX_MAX_ELEMENTS // len(partner_chunk))
+                for j in range(0, len(keys), key_step):
+                    key_chunk = keys[j:j + key_step]
+                    chunks.append((key_chunk, partner_chunk) if by_origin else (partner_chunk, key_chunk))
+        return chunks
+
+    by_origin = plan(True)
+    by_destination = plan(False)
+    return by_destination if len(by_destination) < len(by_origin) else by_origin
+
+
+def _fetch_matrix(origins, destinations, api_key):
+    """
+    Run one Distance Matrix request.
+
+    Returns {(origin, destination): entry} for every element of the grid, where
+    entry is {'result': {...}} or {'error': message}. A failed request yields
+    an error entry for each of its elements, marked ``transient`` so it is not
+    negatively cached.
+    """
+    params = {
+        'origins': '|'.join(f"{lat},{lng}" for lat, lng in origins),
+        'destinations': '|'.join(f"{lat},{lng}" for lat, lng in destinations),
+        'mode': 'driving',
+        'units': 'metric',
+        'key': api_key
+    }
+
+    try:
+        response = http_session.get(DISTANCE_MATRIX_URL, params=params, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+        if data['status'] != 'OK':
+            raise DistanceCalculationError(f"Google API error: {data['status']}")
+        rows = data['rows']
+    except requests.RequestException as e:
+        logger.error(f"Google Distance Matrix API request failed: {e}")
+        return {(o, d): {'error': f"API request failed: {e}", 'transient': True} for o in origins for d in destinations}
+    except (KeyError, ValueError) as e:
+        logger.error(f"Unexpected API response format: {e}")
+        return {(o, d): {'error': f"Invalid API response: {e}", 'transient': True} for o in origins for d in destinations}
+    except DistanceCalculationError as e:
+        return {(o, d): {'error': str(e), 'transient': True} for o in origins for d in destinations}
+
+    entries = {}
+    for i, origin in enumerate(origins):
+        for j, destination in enumerate(destinations):
+            try:
+                entries[(origin, destination)] = {'result': _parse_element(rows[i]['elements'][j])}
+            except RouteNotFound as e:
+                entries[(origin, destination)] = {'error': str(e)}
+            except (KeyError, IndexError, TypeError) as e:
+                entries[(origin, destination)] = {'error': f"Invalid API response: {e}", 'transient': True}
+    return entries
+
+
+def calculate_distances_batch(pairs):
+    """
+    Calculate driving distances for many origin/destination pairs.
+
+    Pairs are snapped and deduplicated, served from the distance cache where
+    possible, and the misses are folded into multi-element Distance Matrix
+    requests that run concurrently over the pooled session.
+
+    Args:
+        pairs: iterable of (origin_lat, origin_lng, dest_lat, dest_lng)
+
+    Returns:
+        list with one item per input pair, in input order: the same dict as
+        calculate_distance(), or {'error': message} when that pair failed.
+    """
+    snapped_pairs = [distance_cache.snap(*pair) for pair in pairs]
+
+    entries = {}
+    for snapped in dict.fromkeys(snapped_pairs):
+        entry = distance_cache.lookup(snapped)
+        if entry is not None:
+            entries[snapped] = entry
+
+    missing = [(s[:2], s[2:]) for s in dict.fromkeys(snapped_pairs) if s not in entries]
+    if missing:
+        api_key = get_google_api_key()
+        if not api_key:
+            fetched = {pair: {'error': "Google Maps API key not configured", 'transient': True} for pair in missing}
+        else:
+            chunks = _plan_matrix_requests(missing)
+            fetched = {}
+            if len(chunks) == 1:
+                fetched.update(_fetch_matrix(*chunks[0], api_key))
+            else:
+                with ThreadPoolExecutor(max_workers=min(BATCH_WORKERS, len(chunks))) as executor:
+                    for chunk_entries in executor.map(lambda chunk: _fetch_matrix(*chunk, api_key), chunks):
+                        fetched.update(chunk_entries)
+        for origin, destination in missing:
+            snapped = origin + destination
+            entries[snapped] = fetched[(origin, destination)]
+            # Only per-element failures (NOT_FOUND, ZERO_RESULTS) are negatively cached
+            if not entries[snapped].get('transient'):
+                distance_cache.store(snapped, entries[snapped])
+
+    results = []
+    for snapped in snapped_pairs:
+        entry = entries[snapped]
+        if 'error' in entry:
+            results.append({'error': entry['error']})
+        else:
+            result = dict(entry['result'])
+            result['source'] = 'google'
+            results.append(result)
+    return results
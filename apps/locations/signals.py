@@ -0,0 +1,23 @@
+from django.db.models.signals import post_save, post_delete
+
+from apps.vehicles.models import Vehicle, VehicleCategory, VehicleZonePricing
+from .models import (
+    Zone, ZoneDistanceRange, Route, RoutePickupZone, RouteDropoffZone, VehicleRoutePricing,
+)
+from .pricing import pricing_engine
+
+# Every model whose rows end up in the pricing snapshot
+PRICING_MODELS = [
+    Zone, ZoneDistanceRange, Route, RoutePickupZone, RouteDropoffZone, VehicleRoutePricing,
+    VehicleZonePricing, Vehicle, VehicleCategory,
+]
+
+
+def invalidate_pricing_snapshot(sender, **kwargs):
+    """Swap in a new pricing snapshot after any write to a pricing input."""
+    pricing_engine.invalidate()
+
+
+for model in PRICING_MODELS:
+    post_save.connect(invalidate_pricing_snapshot, sender=model)
+    post_delete.connect(invalidate_pricing_snapshot, sender=model)
@@ -0,0 +1,227 @@
+"""
+In-memory spatial indexes used by zone and route matching.
+
+Zones (circles or polygons) and route endpoints are bucketed into a uniform
+lat/lng grid by bounding box; a lookup takes the candidates whose box covers the
+query cell and runs the exact containment test on all of them at once with the
+vectorized kernels in apps.locations.geo. The indexes are plain data structures;
+apps.locations.pricing builds them as part of the process-wide pricing snapshot.
+"""
+from collections import defaultdict
+from typing import NamedTuple
+from math import radians, degrees, cos, sin, asin, floor
+
+import numpy as np
+
+from .geo import EARTH_RADIUS_KM, CircleArray, Polygon
+
+# Grid cell size in degrees (~28 km of latitude)
+GRID_CELL_DEG = 0.25
+# Entries whose bounding box covers more cells than this are checked on every lookup
+GRID_MAX_CELLS = 4096
+
+
+def circle_bbox(lat, lng, radius_km):
+    """Return (min_lat, min_lng, max_lat, max_lng) enclosing a circle on the sphere."""
+    angular = radius_km / EARTH_RADIUS_KM
+    dlat = degrees(angular)
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), -180.0, min(max_lat, 90.0), 180.0
+    ratio = sin(angular) / cos(radians(lat))
+    if ratio >= 1:
+        return min_lat, -180.0, max_lat, 180.0
+    dlng = degrees(asin(ratio))
+    return min_lat, lng - dlng, max_lat, lng + dlng
+
+
+class GridIndex:
+    """
+    Uniform grid over lat/lng bucketing entry indexes by bounding box.
+
+    Entries are inserted with increasing integer indexes (their rank); after
+    ``freeze()`` each cell holds a sorted index array, so candidates come back in
+    rank order and callers keep "first match wins" semantics of the original
+    linear scans.
+    """
+
+    def __init__(self, cell_deg=GRID_CELL_DEG):
+        self.cell_deg = cell_deg
+        self._cells = defaultdict(list)
+        self._overflow = []
+
+    def _cell(self, lat, lng):
+        return floor(lat / self.cell_deg), floor(lng / self.cell_deg)
+
+    def insert(self, bbox, index):
+        min_lat, min_lng, max_lat, max_lng = bbox
+        # Boxes crossing the antimeridian are not split; keep them in the always-checked list
+        if min_lng < -180 or max_lng > 180:
+            self._overflow.append(index)
+            return
+        lo_row, lo_col = self._cell(min_lat, min_lng)
+        hi_row, hi_col = self._cell(max_lat, max_lng)
+        if (hi_row - lo_row + 1) * (hi_col - lo_col + 1) > GRID_MAX_CELLS:
+            self._overflow.append(index)
+            return
+        for row in range(lo_row, hi_row + 1):
+            for col in range(lo_col, hi_col + 1):
+                self._cells[(row, col)].append(index)
+
+    def freeze(self):
+        """Turn the buckets into sorted index arrays with the overflow merged in."""
+        overflow = np.array(sorted(self._overflow), dtype=np.intp)
+        self._cells = {
+            cell: np.union1d(np.array(indexes, dtype=np.intp), overflow).astype(np.intp)
+            for cell, indexes in self._cells.items()
+        }
+        self._overflow = overflow
+        return self
+
+    def candidates(self, lat, lng):
+        """Return the sorted indexes whose bounding box may contain the point."""
+        return self._cells.get(self._cell(lat, lng), self._overflow)
+
+    def query_bbox(self, bbox):
+        """Return the sorted indexes whose bounding box may intersect ``bbox``."""
+        min_lat, min_lng, max_lat, max_lng = bbox
+        # Query boxes crossing the antimeridian are clamped rather than split
+        lo_row, lo_col = self._cell(min_lat, max(min_lng, -180.0))
+        hi_row, hi_col = self._cell(max_lat, min(max_lng, 180.0))
+        if (hi_row - lo_row + 1) * (hi_col - lo_col + 1) > len(self._cells):
+            # Cheaper to walk the occupied cells than every cell of the box
+            buckets = [
+                indexes for (row, col), indexes in self._cells.items()
+                if lo_row <= row <= hi_row and lo_col <= col <= hi_col
+            ]
+        else:
+            buckets = [
+                self._cells[(row, col)]
+                for row in range(lo_row, hi_row + 1)
+                for col in range(lo_col, hi_col + 1)
+                if (row, col) in self._cells
+            ]
+        return np.unique(np.concatenate(buckets + [self._overflow])).astype(np.intp)
+
+
+class ZoneIndex:
+    """
+    Point-in-zone lookups over active standalone Zones.
+
+    Zones with a valid ``polygon_coordinates`` GeoJSON are matched by polygon;
+    the rest by their center/radius circle. Zones with neither are skipped.
+    """
+
+    def __init__(self, zones):
+        self.grid = GridIndex()
+        self.zones = []
+        self.polygons = []
+        lats, lngs, radii = [], [], []
+        for zone in zones:
+            polygon = Polygon.from_geojson(zone.polygon_coordinates) if zone.polygon_coordinates else None
+            if polygon is not None:
+                bbox = polygon.bbox
+                # Placeholder circle that never matches; the polygon decides
+                lat, lng, radius = 0.0, 0.0, -1.0
+            elif zone.has_coordinates and zone.radius_km is not None:
+                lat, lng = float(zone.center_latitude), float(zone.center_longitude)
+                radius = float(zone.radius_km)
+                bbox = circle_bbox(lat, lng, radius)
+            else:
+                continue
+            self.grid.insert(bbox, len(self.zones))
+            self.zones.append(zone)
+            self.polygons.append(polygon)
+            lats.append(lat)
+            lngs.append(lng)
+            radii.append(radius)
+        self.grid.freeze()
+        self.circles = CircleArray(lats, lngs, radii)
+        self.is_polygon = np.array([p is not None for p in self.polygons], dtype=bool)
+
+    def find(self, lat, lng):
+        """Return the first zone (in display order) containing the point, or None."""
+        lat, lng = float(lat), float(lng)
+        candidates = self.grid.candidates(lat, lng)
+        if not len(candidates):
+            return None
+        in_circle, _ = self.circles.contains(lat, lng, candidates)
+        maybe = in_circle | self.is_polygon[candidates]
+        for index, circle_hit in zip(candidates[maybe], in_circle[maybe]):
+            if circle_hit or self.polygons[index].contains(lat, lng):
+                return self.zones[index]
+        return None
+
+
+class RouteMatch(NamedTuple):
+    route: object
+    is_reverse: bool
+    pickup_distance_km: float
+    dropoff_distance_km: float
+
+
+class RouteIndex:
+    """
+    Origin/destination lookups over active Routes.
+
+    Each route is indexed by its origin circle; bidirectional routes are also
+    indexed by their destination circle for the reverse direction. Matches come
+    back in the Route ordering (``order, name``), forward before reverse.
+    """
+
+    def __init__(self, routes):
+        self.forward = GridIndex()
+        self.reverse = GridIndex()
+        self.routes = []
+        origins, destinations = [], []
+        for route in routes:
+            if None in (route.origin_latitude, route.origin_longitude,
+                        route.destination_latitude, route.destination_longitude):
+                continue
+            origin = (float(route.origin_latitude), float(route.origin_longitude), float(route.origin_radius_km))
+            destination = (float(route.destination_latitude), float(route.destination_longitude),
+                           float(route.destination_radius_km))
+            index = len(self.routes)
+            self.forward.insert(circle_bbox(*origin), index)
+            if route.is_bidirectional:
+                self.reverse.insert(circle_bbox(*destination), index)
+            self.routes.append(route)
+            origins.append(origin)
+            destinations.append(destination)
+        self.forward.freeze()
+        self.reverse.freeze()
+        self.origins = CircleArray(*zip(*origins)) if origins else CircleArray([], [], [])
+        self.destinations = CircleArray(*zip(*destinations)) if destinations else CircleArray([], [], [])
+
+    @staticmethod
+    def _hits(candidates, pickup_circles, dropoff_circles, origin_lat, origin_lng, dest_lat, dest_lng):
+        """{index: (pickup_distance, dropoff_distance)} for candidates containing both points."""
+        if not len(candidates):
+            return {}
+        in_pickup, pickup_distances = pickup_circles.contains(origin_lat, origin_lng, candidates)
+        if not in_pickup.any():
+            return {}
+        candidates, pickup_distances = candidates[in_pickup], pickup_distances[in_pickup]
+        in_dropoff, dropoff_distances = dropoff_circles.contains(dest_lat, dest_lng, candidates)
+        return {
+            int(index): (float(pickup), float(dropoff))
+            for index, pickup, dropoff in zip(
+                candidates[in_dropoff], pickup_distances[in_dropoff], dropoff_distances[in_dropoff]
+            )
+        }
+
+    def matches(self, origin_lat, origin_lng, dest_lat, dest_lng):
+        """Yield a RouteMatch for every route serving this pickup/dropoff pair."""
+        point = (float(origin_lat), float(origin_lng), float(dest_lat), float(dest_lng))
+        forward = self._hits(self.forward.candidates(point[0], point[1]), self.origins, self.destinations, *point)
+        reverse = self._hits(self.reverse.candidates(point[0], point[1]), self.destinations, self.origins, *point)
+        for index in sorted(forward.keys() | reverse.keys()):
+            # A forward match hides the reverse direction of the same route
+            if index in forward:
+                yield RouteMatch(self.routes[index], False, *forward[index])
+            else:
+                yield RouteMatch(self.routes[index], True, *reverse[index])
+
+    def first_match(self, origin_lat, origin_lng, dest_lat, dest_lng):
+        """Return the first RouteMatch for the pair, or None."""
+        return next(self.matches(origin_lat, origin_lng, dest_lat, dest_lng), None)
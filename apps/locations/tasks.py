@@ -0,0 +1,42 @@
+import logging
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def refresh_distance(origin_lat, origin_lng, dest_lat, dest_lng):
+    """Fetch and cache the driving distance for a pair that was answered with a haversine estimate."""
+    from .services import calculate_distance, DistanceCalculationError
+
+    try:
+        calculate_distance(origin_lat, origin_lng, dest_lat, dest_lng)
+    except DistanceCalculationError as e:
+        logger.warning(f"Background distance lookup failed: {e}")
+
+
+@shared_task(ignore_result=True)
+def refresh_price_grid():
+    """Rebuild the popular-route price grid artifact (scheduled by celery beat)."""
+    from .price_grid import publish_price_grid
+
+    manifest = publish_price_grid()
+    logger.info(f"Price grid {manifest['etag']} published ({manifest['routes']} routes)")
+
+
+@shared_task(ignore_result=True)
+def log_distance_cache_stats():
+    """Log the distance cache hit rate across all workers since the last run (scheduled by celery beat)."""
+    from .services import distance_cache
+
+    stats = distance_cache.collect_stats()
+    if not stats:
+        return
+    lookups = sum(stats.values())
+    if lookups:
+        hits = lookups - stats['misses']
+        logger.info(
+            f"Distance cache: {lookups} lookup(s), {hits * 100 / lookups:.1f}% hits "
+            f"(local {stats['local_hits']}, redis {stats['redis_hits']}, "
+            f"negative {stats['negative_hits']}, misses {stats['misses']})"
+        )
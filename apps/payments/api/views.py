@@ -14,6 +14,7 @@ from django.http import HttpResponse
 from apps.accounts.permissions import HasAPIKeyOrIsAuthenticated
 from apps.payments.models import PaymentGateway, Payment, Refund, Invoice, Coupon, CouponUsage
 from apps.payments.gateways import get_gateway
+from config.pagination import KeysetPagination
 from .serializers import (
     PaymentGatewaySerializer,
     PaymentSerializer,
@@ -40,6 +41,8 @@ class PaymentViewSet(viewsets.ModelViewSet):
     filterset_fields = ['status', 'payment_type', 'gateway']
     search_fields = ['payment_ref', 'customer_email', 'gateway_payment_id']
     ordering_fields = ['created_at', 'amount']
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
 
     def get_permissions(self):
         if self.action in ['create', 'confirm']:
@@ -245,7 +248,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
             booking.save()
             # For round trips, update return transfer status too
             if booking.return_transfer_id:
-                Transfer.objects.filter(id=booking.return_transfer_id).update(status=new_status)
+                Transfer.objects.filter(id=booking.return_transfer_id).update(status=new_status, updated_at=timezone.now())
         elif payment.payment_type == Payment.PaymentType.TRIP:
             from apps.trips.models import TripBooking
             booking = TripBooking.objects.get(id=payment.object_id)
@@ -187,6 +187,7 @@ class Payment(models.Model):
         indexes = [
             models.Index(fields=['gateway_payment_id']),
             models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['created_at', 'id'], name='payment_created_keyset_idx'),
         ]
 
     def __str__(self):
@@ -144,6 +144,9 @@ class Rental(models.Model):
         verbose_name = _('rental')
         verbose_name_plural = _('rentals')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='rental_created_keyset_idx'),
+        ]
 
     def __str__(self):
         return f"{self.booking_ref} — {self.customer_name}"
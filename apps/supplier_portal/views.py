@@ -603,6 +603,25 @@ def zone_detail(request, pk):
             except Exception as e:
                 messages.error(request, str(e))
 
+        elif action == 'save_ranges':
+            from django.core.exceptions import ValidationError
+            from apps.locations.ranges import save_range_table
+            active_ids = set(request.POST.getlist('active_range_ids'))
+            rows = [
+                {'id': range_id, 'name': name.strip(), 'min_km': min_km, 'max_km': max_km,
+                 'is_active': range_id in active_ids}
+                for range_id, name, min_km, max_km in zip(
+                    request.POST.getlist('range_id'), request.POST.getlist('range_name'),
+                    request.POST.getlist('min_km'), request.POST.getlist('max_km'),
+                )
+            ]
+            try:
+                save_range_table(zone, rows)
+                messages.success(request, 'Distance ranges updated.')
+            except (ValidationError, ValueError) as e:
+                for error in getattr(e, 'messages', [str(e)]):
+                    messages.error(request, error)
+
         elif action == 'delete_range':
             dr = get_object_or_404(ZoneDistanceRange, pk=request.POST.get('range_id'), zone=zone)
             dr.delete()
@@ -995,21 +1014,21 @@ def booking_detail(request, pk):
 
         if action == 'confirm' and transfer.status == Transfer.Status.PENDING:
             transfer.status = Transfer.Status.CONFIRMED
-            transfer.save(update_fields=['status'])
+            transfer.save(update_fields=['status', 'updated_at'])
             messages.success(request, 'Booking confirmed.')
 
         elif action == 'complete' and transfer.status in [
             Transfer.Status.CONFIRMED, Transfer.Status.PENDING
         ]:
             transfer.status = Transfer.Status.COMPLETED
-            transfer.save(update_fields=['status'])
+            transfer.save(update_fields=['status', 'updated_at'])
             messages.success(request, 'Booking marked as completed.')
 
         elif action == 'cancel' and transfer.status in [
             Transfer.Status.PENDING, Transfer.Status.CONFIRMED
         ]:
             transfer.status = Transfer.Status.CANCELLED
-            transfer.save(update_fields=['status'])
+            transfer.save(update_fields=['status', 'updated_at'])
             messages.success(request, 'Booking cancelled.')
 
         else:
@@ -0,0 +1,116 @@
+"""
+Blocked days for the booking date picker.
+
+The plugin greys out unavailable pickup dates for a whole month from one
+request, instead of asking get_pricing about each day. Days come from the
+compiled blocked-date intervals, so the endpoint does not touch the database
+while the blocks are unchanged.
+"""
+from calendar import monthrange
+from datetime import date, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.transfers.blocked_dates import blocked_intervals
+
+DEFAULT_BLOCKED_MESSAGE = 'Selected pickup date is unavailable. Please pick another date.'
+
+# Longest range one request may cover (days)
+MAX_RANGE_DAYS = 366
+
+
+def _error(message):
+    return Response(
+        {'error': {'code': 'validation_error', 'message': message}},
+        status=status.HTTP_400_BAD_REQUEST,
+    )
+
+
+class BlockedDatesView(APIView):
+    """Every blocked day in a month or date range."""
+
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        summary="Blocked dates",
+        description="""
+        List the days on which transfers cannot be booked, so a date picker can disable them.
+
+        Pass `month` (`YYYY-MM`), or `start` and `end` (`YYYY-MM-DD`, inclusive, at most
+        366 days apart). Without parameters the current month is returned. Each day carries
+        the message shown to customers who pick it.
+        """,
+        tags=['Booking'],
+        parameters=[
+            OpenApiParameter(name='month', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, required=False,
+                             description='Month as YYYY-MM'),
+            OpenApiParameter(name='start', type=OpenApiTypes.DATE, location=OpenApiParameter.QUERY, required=False,
+                             description='First day of the range'),
+            OpenApiParameter(name='end', type=OpenApiTypes.DATE, location=OpenApiParameter.QUERY, required=False,
+                             description='Last day of the range'),
+        ],
+        responses={
+            200: {
+                'type': 'object',
+                'properties': {
+                    'start': {'type': 'string', 'format': 'date'},
+                    'end': {'type': 'string', 'format': 'date'},
+                    'blocked_dates': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'date': {'type': 'string', 'format': 'date'},
+                                'message': {'type': 'string'},
+                            },
+                        },
+                    },
+                },
+            },
+        },
+    )
+    def get(self, request):
+        params = request.query_params
+        if params.get('start') or params.get('end'):
+            try:
+                start = parse_date(params.get('start', ''))
+                end = parse_date(params.get('end', ''))
+            except ValueError:
+                # Well-formed but impossible dates such as 2026-02-30
+                start = end = None
+            if start is None or end is None:
+                return _error('start and end must both be dates (YYYY-MM-DD).')
+        else:
+            try:
+                if params.get('month'):
+                    year, month = (int(part) for part in params['month'].split('-'))
+                else:
+                    today = timezone.localdate()
+                    year, month = today.year, today.month
+                start = date(year, month, 1)
+            except ValueError:
+                return _error('month must be YYYY-MM.')
+            end = start + timedelta(days=monthrange(year, month)[1] - 1)
+
+        if end < start:
+            return _error('end cannot be before start.')
+        if (end - start).days >= MAX_RANGE_DAYS:
+            return _error(f'The range cannot be longer than {MAX_RANGE_DAYS} days.')
+
+        blocked = [
+            {
+                'date': day.isoformat(),
+                'message': block.customer_message.strip() if block.customer_message else DEFAULT_BLOCKED_MESSAGE,
+            }
+            for day, block in blocked_intervals().days(start, end)
+        ]
+        response = Response({'start': start.isoformat(), 'end': end.isoformat(), 'blocked_dates': blocked})
+        response['Cache-Control'] = 'public, max-age=60'
+        return response
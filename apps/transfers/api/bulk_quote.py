@@ -0,0 +1,195 @@
+"""
+Bulk quotes for B2B partners.
+
+Partners price whole arrival manifests in one request. Each leg is validated
+on its own, so a bad leg gets an error line instead of failing the batch.
+Legs are priced in chunks of BULK_QUOTE_CHUNK_SIZE: the distinct coordinate
+pairs of a chunk go through one batched distance lookup and one geo-match
+each against a single pricing snapshot, and the results stream back as
+NDJSON, one line per leg in input order.
+"""
+import json
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from drf_spectacular.utils import extend_schema, OpenApiExample
+from rest_framework.views import APIView
+
+from apps.accounts.models import SiteSettings
+from apps.accounts.permissions import HasAPIKey
+from apps.accounts.throttles import BulkQuoteRateThrottle
+from apps.transfers.models import TransferExtra
+from .serializers import BulkQuoteLegSerializer, BulkQuoteSerializer
+from .views import _quote_extras, _quote_totals
+
+
+def _leg_distances(pairs):
+    """Distance result per distinct pair, falling back to haversine where Google failed."""
+    from apps.locations.services import calculate_distances_batch, estimate_distance
+
+    distances = {}
+    for pair, result in zip(pairs, calculate_distances_batch(pairs)):
+        if 'error' in result:
+            result = estimate_distance(*pair)
+        else:
+            result['source'] = 'google'
+        distances[pair] = result
+    return distances
+
+
+def _price_leg(leg, distance, pricing_quote, category, extras_by_id, currency):
+    """Quote fields for one validated leg, shaped like TransferViewSet.quote."""
+    if category is None:
+        return {'error': 'Unknown vehicle category.'}
+    if not (pricing_quote and pricing_quote.options):
+        return {'error': 'No pricing configured for this route.'}
+    try:
+        extras_total, extras_details = _quote_extras(leg.get('extras', []), extras_by_id)
+    except (TransferExtra.DoesNotExist, KeyError, TypeError, ValueError):
+        return {'error': 'Unknown extra.'}
+
+    base_price = pricing_quote.options[0].price
+    multiplier = 2 if leg.get('is_round_trip') else 1
+    deposit_percentage = pricing_quote.deposit_percentage
+    total, deposit_amount = _quote_totals(base_price, extras_total, multiplier, deposit_percentage)
+    distance_km = distance.get('distance_km')
+    return {
+        'distance_km': float(distance_km) if distance_km else None,
+        'duration_minutes': distance.get('duration_minutes'),
+        'distance_source': distance['source'],
+        'vehicle_category_id': category.id,
+        'vehicle_category': category.name,
+        'pricing_type': pricing_quote.method,
+        'base_price': float(base_price),
+        'extras': extras_details,
+        'extras_total': float(extras_total),
+        'is_round_trip': leg.get('is_round_trip', False),
+        'multiplier': multiplier,
+        'total_price': float(total),
+        'deposit_percentage': float(deposit_percentage),
+        'deposit_amount': float(deposit_amount),
+        'currency': currency,
+    }
+
+
+def bulk_quote_lines(raw_legs):
+    """Yield one NDJSON line per leg, in input order."""
+    from apps.locations.pricing import pricing_engine
+    from apps.vehicles.models import VehicleCategory
+
+    # (validated leg, None) or (None, field errors) per input leg
+    legs = []
+    for raw in raw_legs:
+        leg_serializer = BulkQuoteLegSerializer(data=raw)
+        if leg_serializer.is_valid():
+            legs.append((leg_serializer.validated_data, None))
+        else:
+            legs.append((None, leg_serializer.errors))
+
+    valid = [leg for leg, _ in legs if leg is not None]
+    categories = VehicleCategory.objects.in_bulk({leg['vehicle_category_id'] for leg in valid})
+    extra_ids = set()
+    for leg in valid:
+        for extra in leg.get('extras', []):
+            try:
+                extra_ids.add(int(extra['extra_id']))
+            except (KeyError, TypeError, ValueError):
+                pass
+    extras_by_id = TransferExtra.objects.in_bulk(extra_ids)
+    currency = SiteSettings.get_settings().default_currency
+
+    # One snapshot for the whole batch so every leg is priced on the same data
+    snapshot = pricing_engine.snapshot()
+    chunk_size = max(1, getattr(settings, 'BULK_QUOTE_CHUNK_SIZE', 200))
+
+    for start in range(0, len(legs), chunk_size):
+        chunk = legs[start:start + chunk_size]
+
+        # Distinct coordinate pairs and the categories asked for on each
+        wanted = {}
+        for leg, _ in chunk:
+            if leg is not None:
+                pair = (leg['pickup_latitude'], leg['pickup_longitude'],
+                        leg['dropoff_latitude'], leg['dropoff_longitude'])
+                wanted.setdefault(pair, set()).add(leg['vehicle_category_id'])
+
+        distances = _leg_distances(list(wanted)) if wanted else {}
+        quotes = {
+            pair: snapshot.quote_categories(
+                *pair,
+                distance_km=distances[pair]['distance_km'] if distances[pair]['source'] == 'google' else None,
+                vehicle_category_ids=sorted(category_ids),
+            )
+            for pair, category_ids in wanted.items()
+        }
+
+        for index, (leg, errors) in enumerate(chunk, start):
+            if leg is None:
+                line = {'index': index, 'reference': raw_legs[index].get('reference'), 'error': errors}
+            else:
+                pair = (leg['pickup_latitude'], leg['pickup_longitude'],
+                        leg['dropoff_latitude'], leg['dropoff_longitude'])
+                category_id = leg['vehicle_category_id']
+                line = {'index': index, 'reference': leg.get('reference')}
+                line.update(_price_leg(
+                    leg, distances[pair], quotes[pair][category_id],
+                    categories.get(category_id), extras_by_id, currency,
+                ))
+            yield json.dumps(line) + '\n'
+
+
+class BulkQuoteView(APIView):
+    """Price many transfer legs in one request (API key only)."""
+
+    permission_classes = [HasAPIKey]
+    throttle_classes = [BulkQuoteRateThrottle]
+
+    @extend_schema(
+        summary="Bulk price quotes",
+        description="""
+        Price a whole manifest of transfer legs in one request. Requires an API key.
+
+        Each leg takes the pickup/dropoff coordinates, `vehicle_category_id`, and optional
+        `is_round_trip`, `extras` and `reference` (echoed back). Identical coordinate pairs
+        are matched and measured once.
+
+        The response is streamed as NDJSON (`application/x-ndjson`): one JSON object per leg,
+        in input order, with `index`, `reference` and either the quote fields of
+        `/transfers/quote/` or an `error`.
+
+        Bulk quotes have their own rate limit and do not count against the key's per-minute
+        `rate_limit`. At most `BULK_QUOTE_MAX_LEGS` legs per request.
+        """,
+        tags=['Booking'],
+        request=BulkQuoteSerializer,
+        responses={(200, 'application/x-ndjson'): {'type': 'string'}},
+        examples=[
+            OpenApiExample(
+                'Bulk Quote Request',
+                value={
+                    'legs': [
+                        {
+                            'reference': 'AT804-1',
+                            'pickup_latitude': 31.6069,
+                            'pickup_longitude': -8.0363,
+                            'dropoff_latitude': 31.6258,
+                            'dropoff_longitude': -7.9891,
+                            'vehicle_category_id': 1,
+                        },
+                    ]
+                },
+                request_only=True,
+            ),
+        ]
+    )
+    def post(self, request):
+        serializer = BulkQuoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        response = StreamingHttpResponse(
+            bulk_quote_lines(serializer.validated_data['legs']),
+            content_type='application/x-ndjson',
+        )
+        # Let nginx pass lines through as they are produced
+        response['X-Accel-Buffering'] = 'no'
+        return response
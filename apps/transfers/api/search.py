@@ -2,7 +2,6 @@ from rest_framework import status
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db.models import Q
 from apps.accounts.permissions import HasAPIKeyOrIsAuthenticated
 
 
@@ -25,13 +24,8 @@ class UnifiedSearchView(APIView):
 
         if search_type in ('all', 'transfers'):
             from apps.transfers.models import Transfer
-            transfers = Transfer.objects.filter(
-                Q(booking_ref__icontains=query) |
-                Q(customer_name__icontains=query) |
-                Q(customer_email__icontains=query) |
-                Q(pickup_address__icontains=query) |
-                Q(dropoff_address__icontains=query)
-            ).values(
+            from apps.transfers.search_index import search_transfers
+            transfers = search_transfers(Transfer.objects.all(), query).values(
                 'id', 'booking_ref', 'customer_name', 'pickup_address',
                 'dropoff_address', 'status', 'total_price', 'created_at',
             )[:20]
@@ -39,11 +33,8 @@ class UnifiedSearchView(APIView):
 
         if search_type in ('all', 'routes'):
             from apps.locations.models import Route
-            routes = Route.objects.filter(
-                Q(name__icontains=query) |
-                Q(origin_name__icontains=query) |
-                Q(destination_name__icontains=query)
-            ).filter(is_active=True).values(
+            from apps.transfers.search_index import search_routes
+            routes = search_routes(Route.objects.filter(is_active=True), query).values(
                 'id', 'name', 'slug', 'origin_name', 'destination_name',
                 'distance_km',
             )[:20]
@@ -51,11 +42,8 @@ class UnifiedSearchView(APIView):
 
         if search_type in ('all', 'trips'):
             from apps.trips.models import Trip
-            trips = Trip.objects.filter(
-                Q(name__icontains=query) |
-                Q(description__icontains=query) |
-                Q(short_description__icontains=query)
-            ).filter(is_active=True).values(
+            from apps.transfers.search_index import search_trips
+            trips = search_trips(Trip.objects.filter(is_active=True), query).values(
                 'id', 'name', 'slug', 'short_description',
             )[:20]
             results['trips'] = list(trips)
@@ -1,112 +1,30 @@
 from rest_framework import serializers
+from django.conf import settings
 from decimal import Decimal
 from apps.transfers.models import Transfer, TransferExtra, TransferExtraBooking
 from apps.vehicles.api.serializers import VehicleCategorySerializer
 from .validators import validate_phone, validate_future_datetime, validate_latitude, validate_longitude
 
 
-def _lookup_base_price(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, vehicle_category, distance_km=None):
-    """Price a single leg. Returns (base_price, vehicle, cost, deposit_pct, method); base_price is None if no pricing found."""
-    from apps.locations.models import Route, VehicleRoutePricing
-    from apps.locations.services import calculate_distance_haversine
-    from apps.locations.api.views import (
-        find_matching_zone, find_matching_pickup_zone, find_matching_dropoff_zone,
-        haversine_distance,
+def _lookup_base_price(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, vehicle_category, distance_km=None,
+                       snapshot=None):
+    """
+    Price a single leg. Returns (base_price, vehicle, cost, deposit_pct, method); base_price is None if no pricing found.
+
+    Pass the same pricing ``snapshot`` to price several legs against the same data.
+    """
+    from apps.locations.pricing import pricing_engine
+
+    pricing_quote = (snapshot or pricing_engine).quote(
+        pickup_lat, pickup_lng, dropoff_lat, dropoff_lng,
+        distance_km=distance_km,
+        vehicle_category_id=vehicle_category.id,
     )
-    from apps.vehicles.models import VehicleZonePricing
-
-    base_price = None
-    deposit_pct = Decimal('0')
-    priced_vehicle = None
-    priced_cost = None
-    pricing_method = ''
-
-    p_lat, p_lng = float(pickup_lat), float(pickup_lng)
-    d_lat, d_lng = float(dropoff_lat), float(dropoff_lng)
-
-    pickup_zone = find_matching_zone(p_lat, p_lng)
-    dropoff_zone = find_matching_zone(d_lat, d_lng)
-
-    if pickup_zone and dropoff_zone and pickup_zone.id == dropoff_zone.id:
-        zone = pickup_zone
-        zone_distance = distance_km or float(haversine_distance(p_lat, p_lng, d_lat, d_lng))
-        distance_range = zone.get_range_for_distance(zone_distance)
-        if distance_range:
-            zp = VehicleZonePricing.objects.filter(
-                zone_distance_range=distance_range,
-                vehicle__category=vehicle_category,
-                is_active=True,
-            ).select_related('vehicle__supplier').first()
-            if zp:
-                base_price = zp.price
-                deposit_pct = zone.deposit_percentage
-                pricing_method = 'zone'
-                priced_vehicle = zp.vehicle
-                priced_cost = zp.cost
-
-    # Extended zone: pickup inside zone, dropoff slightly outside in extension ring
-    if base_price is None and pickup_zone and dropoff_zone is None \
-            and float(pickup_zone.max_extension_km or 0) > 0 \
-            and float(pickup_zone.extra_km_price or 0) > 0:
-        zone = pickup_zone
-        dropoff_dist = float(haversine_distance(d_lat, d_lng, float(zone.center_latitude), float(zone.center_longitude)))
-        outer_boundary = float(zone.radius_km) + float(zone.max_extension_km)
-        if dropoff_dist <= outer_boundary:
-            km_beyond = max(0.0, dropoff_dist - float(zone.radius_km))
-            # Extension ring is defined in haversine km; use haversine for range lookup too
-            zone_distance = float(haversine_distance(p_lat, p_lng, d_lat, d_lng))
-            distance_range = zone.get_range_for_distance(zone_distance)
-            if distance_range:
-                zp = VehicleZonePricing.objects.filter(
-                    zone_distance_range=distance_range,
-                    vehicle__category=vehicle_category,
-                    is_active=True,
-                ).select_related('vehicle__supplier').first()
-                if zp:
-                    surcharge = round(float(zone.extra_km_price) * km_beyond, 2)
-                    from decimal import Decimal as _D
-                    base_price = zp.price + _D(str(surcharge))
-                    deposit_pct = zone.deposit_percentage
-                    pricing_method = 'zone'
-                    priced_vehicle = zp.vehicle
-                    priced_cost = zp.cost
-
-    if base_price is None:
-        for route in Route.objects.filter(is_active=True):
-            if route.origin_latitude and route.origin_longitude and route.destination_latitude and route.destination_longitude:
-                o_dist = float(calculate_distance_haversine(p_lat, p_lng, float(route.origin_latitude), float(route.origin_longitude)))
-                d_dist = float(calculate_distance_haversine(d_lat, d_lng, float(route.destination_latitude), float(route.destination_longitude)))
-                matched = (o_dist <= float(route.origin_radius_km) and d_dist <= float(route.destination_radius_km))
-                is_reverse = False
-                if not matched and route.is_bidirectional:
-                    o_rev = float(calculate_distance_haversine(p_lat, p_lng, float(route.destination_latitude), float(route.destination_longitude)))
-                    d_rev = float(calculate_distance_haversine(d_lat, d_lng, float(route.origin_latitude), float(route.origin_longitude)))
-                    if o_rev <= float(route.destination_radius_km) and d_rev <= float(route.origin_radius_km):
-                        matched = True
-                        is_reverse = True
-                if matched:
-                    rp = VehicleRoutePricing.objects.filter(
-                        route=route, vehicle__category=vehicle_category, is_active=True,
-                        pickup_zone__isnull=True, dropoff_zone__isnull=True,
-                    ).select_related('vehicle__supplier').first()
-                    if rp:
-                        base_price = rp.price
-                        priced_vehicle = rp.vehicle
-                        priced_cost = rp.cost
-                        if is_reverse:
-                            m_pickup = find_matching_dropoff_zone(route, p_lat, p_lng)
-                            m_dropoff = find_matching_pickup_zone(route, d_lat, d_lng)
-                        else:
-                            m_pickup = find_matching_pickup_zone(route, p_lat, p_lng)
-                            m_dropoff = find_matching_dropoff_zone(route, d_lat, d_lng)
-                        pickup_adj = Decimal(str(rp.pickup_zone_adjustments.get(str(m_pickup.id), 0))) if m_pickup else Decimal('0')
-                        dropoff_adj = Decimal(str(rp.dropoff_zone_adjustments.get(str(m_dropoff.id), 0))) if m_dropoff else Decimal('0')
-                        base_price = base_price + pickup_adj + dropoff_adj
-                        deposit_pct = route.deposit_percentage
-                        pricing_method = 'route'
-                    break
-
-    return base_price, priced_vehicle, priced_cost, deposit_pct, pricing_method
+    if not pricing_quote or not pricing_quote.options:
+        return None, None, None, Decimal('0'), ''
+
+    option = pricing_quote.options[0]
+    return option.price, option.vehicle, option.cost, pricing_quote.deposit_percentage, pricing_quote.method
 
 
 class TransferExtraSerializer(serializers.ModelSerializer):
@@ -176,14 +94,12 @@ class TransferCreateSerializer(serializers.ModelSerializer):
     return_dropoff_lng = serializers.FloatField(validators=[validate_longitude], required=False, allow_null=True)
 
     def validate_custom_field_values(self, value):
-        from apps.accounts.models import CustomField
-        required_fields = CustomField.objects.filter(
-            is_active=True, is_required=True, applies_to__in=['transfer', 'both']
-        ).values_list('name', flat=True)
-        for field_name in required_fields:
-            if field_name not in value or not str(value[field_name]).strip():
-                field = CustomField.objects.get(name=field_name)
-                raise serializers.ValidationError({field_name: f'{field.label} is required.'})
+        from apps.accounts.custom_field_schema import custom_field_schema
+        if not isinstance(value, dict):
+            raise serializers.ValidationError('Expected an object of custom field values.')
+        errors = custom_field_schema('transfer').validate(value)
+        if errors:
+            raise serializers.ValidationError(errors)
         return value
 
     def validate_transfer_type(self, value):
@@ -229,8 +145,19 @@ class TransferCreateSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'booking_ref', 'base_price', 'extras_price', 'total_price', 'deposit_amount', 'currency', 'status']
 
     def create(self, validated_data):
-        from apps.vehicles.models import VehicleCategory
+        """
+        Price and write the booking.
+
+        Everything slow (distance lookup, pricing, reading extras) happens
+        before the transaction. The writes then go out in one atomic block:
+        the return leg, the outbound leg pointing at it, and every extra
+        booking in one bulk insert.
+        """
+        from django.db import transaction
+        from apps.accounts.models import SiteSettings
+        from apps.locations.pricing import pricing_engine
         from apps.locations.services import calculate_distance
+        from apps.vehicles.models import VehicleCategory
 
         extras_data = validated_data.pop('extras', [])
         vehicle_category_id = validated_data.pop('vehicle_category_id')
@@ -239,6 +166,16 @@ class TransferCreateSerializer(serializers.ModelSerializer):
         return_dropoff_lng = validated_data.pop('return_dropoff_lng', None)
         vehicle_category = VehicleCategory.objects.get(id=vehicle_category_id)
 
+        # Resolve all extras in one query
+        try:
+            extra_ids = [int(extra_data['extra_id']) for extra_data in extras_data]
+        except (KeyError, TypeError, ValueError):
+            raise serializers.ValidationError({'extras': 'Each extra needs a numeric extra_id.'})
+        extras_by_id = TransferExtra.objects.in_bulk(extra_ids)
+        missing = sorted(set(extra_ids) - set(extras_by_id))
+        if missing:
+            raise serializers.ValidationError({'extras': f'Unknown extra: {missing[0]}.'})
+
         # Calculate distance if coordinates provided
         distance_km = None
         duration_minutes = None
@@ -258,7 +195,8 @@ class TransferCreateSerializer(serializers.ModelSerializer):
             except Exception:
                 pass
 
-        # Price outbound leg
+        # Price both legs against one snapshot
+        snapshot = pricing_engine.snapshot()
         base_price = None
         priced_vehicle = None
         priced_cost = None
@@ -267,7 +205,8 @@ class TransferCreateSerializer(serializers.ModelSerializer):
 
         if all([pickup_lat, pickup_lng, dropoff_lat, dropoff_lng]):
             base_price, priced_vehicle, priced_cost, deposit_percentage_from_pricing, pricing_method = \
-                _lookup_base_price(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, vehicle_category, distance_km)
+                _lookup_base_price(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng, vehicle_category, distance_km,
+                                   snapshot=snapshot)
 
         if base_price is None:
             raise serializers.ValidationError('No pricing configured for this route. Please contact support.')
@@ -281,7 +220,8 @@ class TransferCreateSerializer(serializers.ModelSerializer):
             rt_dropoff_lng_lookup = return_dropoff_lng if return_dropoff_lng is not None else pickup_lng
             if all([rt_dropoff_lat_lookup, rt_dropoff_lng_lookup]):
                 rt_price, rt_vehicle, rt_cost, _, _ = _lookup_base_price(
-                    dropoff_lat, dropoff_lng, rt_dropoff_lat_lookup, rt_dropoff_lng_lookup, vehicle_category
+                    dropoff_lat, dropoff_lng, rt_dropoff_lat_lookup, rt_dropoff_lng_lookup, vehicle_category,
+                    snapshot=snapshot,
                 )
                 if rt_price is not None:
                     return_base_price = rt_price
@@ -289,10 +229,19 @@ class TransferCreateSerializer(serializers.ModelSerializer):
                         return_priced_vehicle = rt_vehicle
                         return_priced_cost = rt_cost
 
-        # Create transfer
-        from apps.accounts.models import SiteSettings
+        # Extras
+        extra_bookings = []
+        extras_total = Decimal('0')
+        for extra_data in extras_data:
+            extra = extras_by_id[int(extra_data['extra_id'])]
+            quantity = extra_data.get('quantity', 1)
+            price = extra.price * quantity if extra.is_per_item else extra.price
+            extra_bookings.append(TransferExtraBooking(extra=extra, quantity=quantity, price=price))
+            extras_total += price
+
         priced_supplier = priced_vehicle.supplier if priced_vehicle and priced_vehicle.supplier_id else None
-        transfer = Transfer.objects.create(
+        currency = SiteSettings.get_settings().default_currency
+        transfer = Transfer(
             vehicle_category=vehicle_category,
             vehicle=priced_vehicle,
             supplier=priced_supplier,
@@ -300,28 +249,11 @@ class TransferCreateSerializer(serializers.ModelSerializer):
             distance_km=distance_km,
             duration_minutes=duration_minutes,
             base_price=base_price,
-            pricing_method=pricing_method if all([pickup_lat, pickup_lng, dropoff_lat, dropoff_lng]) else '',
-            currency=SiteSettings.get_settings().default_currency,
+            extras_price=extras_total,
+            pricing_method=pricing_method,
+            currency=currency,
             **validated_data
         )
-
-        # Add extras
-        extras_total = Decimal('0')
-        for extra_data in extras_data:
-            extra = TransferExtra.objects.get(id=extra_data['extra_id'])
-            quantity = extra_data.get('quantity', 1)
-            price = extra.price * quantity if extra.is_per_item else extra.price
-
-            TransferExtraBooking.objects.create(
-                transfer=transfer,
-                extra=extra,
-                quantity=quantity,
-                price=price
-            )
-            extras_total += price
-
-        # Update extras price and total
-        transfer.extras_price = extras_total
         transfer.total_price = transfer.calculate_total()
 
         # Deposit is calculated on the combined price of all legs
@@ -332,9 +264,7 @@ class TransferCreateSerializer(serializers.ModelSerializer):
         if deposit_percentage_from_pricing > 0:
             transfer.deposit_amount = (deposit_base * deposit_percentage_from_pricing / Decimal('100')).quantize(Decimal('0.01'))
 
-        transfer.save()
-
-        # Handle round trip
+        return_transfer = None
         if transfer.is_round_trip and transfer.return_datetime:
             # Return pickup is always the outbound dropoff (locked)
             # Return dropoff defaults to outbound pickup unless client specified a different destination
@@ -342,7 +272,7 @@ class TransferCreateSerializer(serializers.ModelSerializer):
             rt_dropoff_lat = return_dropoff_lat if return_dropoff_lat is not None else transfer.pickup_latitude
             rt_dropoff_lng = return_dropoff_lng if return_dropoff_lng is not None else transfer.pickup_longitude
             return_priced_supplier = return_priced_vehicle.supplier if return_priced_vehicle and return_priced_vehicle.supplier_id else None
-            return_transfer = Transfer.objects.create(
+            return_transfer = Transfer(
                 customer=transfer.customer,
                 customer_name=transfer.customer_name,
                 customer_email=transfer.customer_email,
@@ -369,8 +299,16 @@ class TransferCreateSerializer(serializers.ModelSerializer):
                 total_price=return_base_price + extras_total,
                 special_requests=transfer.special_requests,
             )
-            transfer.return_transfer = return_transfer
+
+        with transaction.atomic():
+            # The return leg goes first so the outbound insert can already point at it
+            if return_transfer is not None:
+                return_transfer.save()
+                transfer.return_transfer = return_transfer
             transfer.save()
+            for booking in extra_bookings:
+                booking.transfer = transfer
+            TransferExtraBooking.objects.bulk_create(extra_bookings)
 
         return transfer
 
@@ -382,7 +320,11 @@ class TransferQuoteSerializer(serializers.Serializer):
     dropoff_address = serializers.CharField()
     dropoff_latitude = serializers.DecimalField(max_digits=10, decimal_places=7)
     dropoff_longitude = serializers.DecimalField(max_digits=10, decimal_places=7)
-    vehicle_category_id = serializers.IntegerField()
+    vehicle_category_id = serializers.IntegerField(required=False)
+    vehicle_category_ids = serializers.JSONField(
+        required=False,
+        help_text='List of vehicle category IDs, or "all", to quote several categories at once'
+    )
     passengers = serializers.IntegerField(default=1)
     is_round_trip = serializers.BooleanField(default=False)
     extras = serializers.ListField(
@@ -390,6 +332,50 @@ class TransferQuoteSerializer(serializers.Serializer):
         required=False
     )
 
+    def validate_vehicle_category_ids(self, value):
+        if value == 'all':
+            return value
+        if not isinstance(value, list) or not value:
+            raise serializers.ValidationError('Expected a list of vehicle category IDs or "all".')
+        try:
+            ids = [int(v) for v in value]
+        except (TypeError, ValueError):
+            raise serializers.ValidationError('Vehicle category IDs must be integers.')
+        return list(dict.fromkeys(ids))
+
+    def validate(self, attrs):
+        if attrs.get('vehicle_category_id') is None and not attrs.get('vehicle_category_ids'):
+            raise serializers.ValidationError(
+                {'vehicle_category_id': 'Provide vehicle_category_id or vehicle_category_ids.'}
+            )
+        return attrs
+
+
+class BulkQuoteLegSerializer(serializers.Serializer):
+    """One leg of a bulk quote request."""
+    reference = serializers.CharField(required=False, allow_blank=True, max_length=100)
+    pickup_latitude = serializers.DecimalField(max_digits=10, decimal_places=7)
+    pickup_longitude = serializers.DecimalField(max_digits=10, decimal_places=7)
+    dropoff_latitude = serializers.DecimalField(max_digits=10, decimal_places=7)
+    dropoff_longitude = serializers.DecimalField(max_digits=10, decimal_places=7)
+    vehicle_category_id = serializers.IntegerField()
+    is_round_trip = serializers.BooleanField(default=False)
+    extras = serializers.ListField(
+        child=serializers.DictField(),
+        required=False
+    )
+
+
+class BulkQuoteSerializer(serializers.Serializer):
+    """Bulk quote request; legs are validated one by one by the view."""
+    legs = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+
+    def validate_legs(self, value):
+        max_legs = getattr(settings, 'BULK_QUOTE_MAX_LEGS', 2000)
+        if len(value) > max_legs:
+            raise serializers.ValidationError(f'At most {max_legs} legs per request.')
+        return value
+
 
 class TransferListSerializer(serializers.ModelSerializer):
     """Simplified serializer for list views."""
@@ -2,6 +2,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
 from .search import TransferByRefView
+from .bulk_quote import BulkQuoteView
+from .blocked_dates import BlockedDatesView
 
 app_name = 'transfers'
 
@@ -11,5 +13,7 @@ router.register('', views.TransferViewSet, basename='transfer')
 
 urlpatterns = [
     path('by-ref/<str:ref>/', TransferByRefView.as_view(), name='transfer_by_ref'),
+    path('bulk-quote/', BulkQuoteView.as_view(), name='bulk_quote'),
+    path('blocked-dates/', BlockedDatesView.as_view(), name='blocked_dates'),
     path('', include(router.urls)),
 ]
@@ -7,6 +7,7 @@ from decimal import Decimal
 from apps.accounts.permissions import HasAPIKeyOrIsAuthenticated
 from apps.accounts.models import SiteSettings
 from apps.transfers.models import Transfer, TransferExtra
+from config.pagination import KeysetPagination
 from .serializers import (
     TransferSerializer,
     TransferCreateSerializer,
@@ -16,6 +17,55 @@ from .serializers import (
 )
 
 
+def _quote_distance(data):
+    """Driving distance for a quote: (distance_km, duration_minutes, source)."""
+    from apps.locations.services import calculate_distance_within
+
+    result = calculate_distance_within(
+        data['pickup_latitude'],
+        data['pickup_longitude'],
+        data['dropoff_latitude'],
+        data['dropoff_longitude']
+    )
+    return result.get('distance_km'), result.get('duration_minutes'), result['source']
+
+
+def _quote_extras(extras, extras_by_id=None):
+    """
+    Price the requested extras: (extras_total, extras_details).
+
+    Pass ``extras_by_id`` (from in_bulk) to price from preloaded extras;
+    raises TransferExtra.DoesNotExist for an unknown extra either way.
+    """
+    extras_total = Decimal('0')
+    extras_details = []
+    for extra_data in extras:
+        if extras_by_id is None:
+            extra = TransferExtra.objects.get(id=extra_data['extra_id'])
+        else:
+            extra = extras_by_id.get(int(extra_data['extra_id']))
+            if extra is None:
+                raise TransferExtra.DoesNotExist(f"Unknown extra {extra_data['extra_id']}")
+        quantity = extra_data.get('quantity', 1)
+        price = extra.price * quantity if extra.is_per_item else extra.price
+        extras_total += price
+        extras_details.append({
+            'name': extra.name,
+            'quantity': quantity,
+            'price': float(price)
+        })
+    return extras_total, extras_details
+
+
+def _quote_totals(base_price, extras_total, multiplier, deposit_percentage):
+    """Total price and deposit amount for a quote: (total, deposit_amount)."""
+    total = (base_price + extras_total) * multiplier
+    deposit_amount = Decimal('0')
+    if deposit_percentage > 0:
+        deposit_amount = (total * deposit_percentage / Decimal('100')).quantize(Decimal('0.01'))
+    return total, deposit_amount
+
+
 @extend_schema_view(
     list=extend_schema(
         summary="List bookings",
@@ -78,6 +128,8 @@ class TransferViewSet(viewsets.ModelViewSet):
     filterset_fields = ['status', 'transfer_type', 'vehicle_category', 'is_round_trip']
     search_fields = ['booking_ref', 'customer_name', 'customer_email', 'flight_number']
     ordering_fields = ['pickup_datetime', 'created_at', 'total_price']
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-pickup_datetime', '-id')
 
     def get_permissions(self):
         if self.action in ['create', 'quote']:
@@ -120,6 +172,14 @@ class TransferViewSet(viewsets.ModelViewSet):
 
         Provide the pickup and dropoff locations, vehicle category, and any extras.
         The API will calculate the distance using Google Maps and return the total price.
+        If Google does not answer within the latency budget, a straight-line estimate is
+        used and `distance_source` is `haversine`.
+
+        To compare categories, send `vehicle_category_ids` (a list of IDs, or `"all"`)
+        instead of `vehicle_category_id`. All categories are priced against one location
+        match and one distance lookup; the response has a `quotes` list with one price
+        breakdown per category, and `unavailable_category_ids` for requested categories
+        without pricing on this trip.
 
         **Note:** This is a public endpoint, no authentication required.
         """,
@@ -133,6 +193,7 @@ class TransferViewSet(viewsets.ModelViewSet):
                     'dropoff_address': {'type': 'string'},
                     'distance_km': {'type': 'number', 'nullable': True},
                     'duration_minutes': {'type': 'integer', 'nullable': True},
+                    'distance_source': {'type': 'string', 'enum': ['google', 'haversine']},
                     'vehicle_category': {'type': 'string'},
                     'base_price': {'type': 'number'},
                     'extras': {
@@ -150,6 +211,25 @@ class TransferViewSet(viewsets.ModelViewSet):
                     'is_round_trip': {'type': 'boolean'},
                     'multiplier': {'type': 'integer'},
                     'total_price': {'type': 'number'},
+                    'quotes': {
+                        'type': 'array',
+                        'description': 'Multi-category mode only',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'vehicle_category_id': {'type': 'integer'},
+                                'vehicle_category': {'type': 'string'},
+                                'pricing_type': {'type': 'string', 'enum': ['zone', 'route']},
+                                'base_price': {'type': 'number'},
+                                'extras_total': {'type': 'number'},
+                                'multiplier': {'type': 'integer'},
+                                'total_price': {'type': 'number'},
+                                'deposit_percentage': {'type': 'number'},
+                                'deposit_amount': {'type': 'number'},
+                            }
+                        }
+                    },
+                    'unavailable_category_ids': {'type': 'array', 'items': {'type': 'integer'}},
                     'currency': {'type': 'string', 'example': 'MAD'},
                 }
             }
@@ -170,6 +250,20 @@ class TransferViewSet(viewsets.ModelViewSet):
                 },
                 request_only=True,
             ),
+            OpenApiExample(
+                'Multi-category Quote Request',
+                value={
+                    'pickup_address': 'Marrakech Airport',
+                    'pickup_latitude': 31.6069,
+                    'pickup_longitude': -8.0363,
+                    'dropoff_address': 'Jemaa el-Fnaa, Marrakech',
+                    'dropoff_latitude': 31.6258,
+                    'dropoff_longitude': -7.9891,
+                    'vehicle_category_ids': 'all',
+                    'is_round_trip': True,
+                },
+                request_only=True,
+            ),
         ]
     )
     @action(detail=False, methods=['post'])
@@ -178,136 +272,51 @@ class TransferViewSet(viewsets.ModelViewSet):
         serializer = TransferQuoteSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
+        data = serializer.validated_data
+        if data.get('vehicle_category_ids'):
+            return self._quote_categories(data)
+
         from apps.vehicles.models import VehicleCategory
-        from apps.locations.services import calculate_distance
 
-        data = serializer.validated_data
         vehicle_category = VehicleCategory.objects.get(id=data['vehicle_category_id'])
 
-        # Calculate distance
-        distance_km = None
-        duration_minutes = None
-        try:
-            distance_result = calculate_distance(
-                float(data['pickup_latitude']),
-                float(data['pickup_longitude']),
-                float(data['dropoff_latitude']),
-                float(data['dropoff_longitude'])
-            )
-            distance_km = distance_result.get('distance_km')
-            duration_minutes = distance_result.get('duration_minutes')
-        except Exception:
-            pass
+        # Calculate distance (haversine estimate if Google misses the latency budget)
+        distance_km, duration_minutes, distance_source = _quote_distance(data)
 
         # Look up matching zone or route for pricing (no fallback)
-        from apps.locations.models import Route, Zone
-        from apps.locations.services import calculate_distance_haversine
-        from apps.locations.api.views import (
-            find_matching_zone, find_matching_pickup_zone, find_matching_dropoff_zone,
-            haversine_distance,
-        )
-        from apps.vehicles.models import VehicleZonePricing
-
-        pickup_lat = float(data['pickup_latitude'])
-        pickup_lng = float(data['pickup_longitude'])
-        dropoff_lat = float(data['dropoff_latitude'])
-        dropoff_lng = float(data['dropoff_longitude'])
+        from apps.locations.pricing import pricing_engine
 
         base_price = None
         deposit_percentage_from_pricing = Decimal('0')
 
-        # 1. Zone pricing: both points in same zone
-        pickup_zone = find_matching_zone(pickup_lat, pickup_lng)
-        dropoff_zone = find_matching_zone(dropoff_lat, dropoff_lng)
-
-        if pickup_zone and dropoff_zone and pickup_zone.id == dropoff_zone.id:
-            zone = pickup_zone
-            zone_distance = distance_km or float(haversine_distance(pickup_lat, pickup_lng, dropoff_lat, dropoff_lng))
-            distance_range = zone.get_range_for_distance(zone_distance)
-            if distance_range:
-                zp = VehicleZonePricing.objects.filter(
-                    zone_distance_range=distance_range,
-                    vehicle__category=vehicle_category,
-                    is_active=True,
-                ).first()
-                if zp:
-                    base_price = zp.price
-                    deposit_percentage_from_pricing = zone.deposit_percentage
-
-        # 2. Route pricing with zone adjustments
-        matched_route = None
-        if base_price is None:
-            is_reverse = False
-            for route in Route.objects.filter(is_active=True):
-                if route.origin_latitude and route.origin_longitude and route.destination_latitude and route.destination_longitude:
-                    origin_dist = float(calculate_distance_haversine(pickup_lat, pickup_lng, float(route.origin_latitude), float(route.origin_longitude)))
-                    dest_dist = float(calculate_distance_haversine(dropoff_lat, dropoff_lng, float(route.destination_latitude), float(route.destination_longitude)))
-                    if origin_dist <= float(route.origin_radius_km) and dest_dist <= float(route.destination_radius_km):
-                        matched_route = route
-                        break
-                    if route.is_bidirectional:
-                        origin_dist_rev = float(calculate_distance_haversine(pickup_lat, pickup_lng, float(route.destination_latitude), float(route.destination_longitude)))
-                        dest_dist_rev = float(calculate_distance_haversine(dropoff_lat, dropoff_lng, float(route.origin_latitude), float(route.origin_longitude)))
-                        if origin_dist_rev <= float(route.destination_radius_km) and dest_dist_rev <= float(route.origin_radius_km):
-                            matched_route = route
-                            is_reverse = True
-                            break
-
-            if matched_route:
-                from apps.locations.models import VehicleRoutePricing
-                route_pricing = VehicleRoutePricing.objects.filter(
-                    route=matched_route,
-                    vehicle__category=vehicle_category,
-                    is_active=True,
-                    pickup_zone__isnull=True,
-                    dropoff_zone__isnull=True,
-                ).first()
-                if route_pricing:
-                    base_price = route_pricing.price
-                    if is_reverse:
-                        m_pickup = find_matching_dropoff_zone(matched_route, pickup_lat, pickup_lng)
-                        m_dropoff = find_matching_pickup_zone(matched_route, dropoff_lat, dropoff_lng)
-                    else:
-                        m_pickup = find_matching_pickup_zone(matched_route, pickup_lat, pickup_lng)
-                        m_dropoff = find_matching_dropoff_zone(matched_route, dropoff_lat, dropoff_lng)
-                    pickup_adj = Decimal(str(route_pricing.pickup_zone_adjustments.get(str(m_pickup.id), 0))) if m_pickup else Decimal('0')
-                    dropoff_adj = Decimal(str(route_pricing.dropoff_zone_adjustments.get(str(m_dropoff.id), 0))) if m_dropoff else Decimal('0')
-                    base_price = base_price + pickup_adj + dropoff_adj
-                    deposit_percentage_from_pricing = matched_route.deposit_percentage
+        pricing_quote = pricing_engine.quote(
+            data['pickup_latitude'], data['pickup_longitude'],
+            data['dropoff_latitude'], data['dropoff_longitude'],
+            distance_km=distance_km if distance_source == 'google' else None,
+            vehicle_category_id=vehicle_category.id,
+        )
+        if pricing_quote and pricing_quote.options:
+            base_price = pricing_quote.options[0].price
+            deposit_percentage_from_pricing = pricing_quote.deposit_percentage
 
         if base_price is None:
             return Response({'error': 'No pricing configured for this route.'}, status=400)
 
-        # Calculate extras
-        extras_total = Decimal('0')
-        extras_details = []
-        for extra_data in data.get('extras', []):
-            extra = TransferExtra.objects.get(id=extra_data['extra_id'])
-            quantity = extra_data.get('quantity', 1)
-            price = extra.price * quantity if extra.is_per_item else extra.price
-            extras_total += price
-            extras_details.append({
-                'name': extra.name,
-                'quantity': quantity,
-                'price': float(price)
-            })
+        extras_total, extras_details = _quote_extras(data.get('extras', []))
 
         # Calculate round trip if applicable
         multiplier = 2 if data.get('is_round_trip') else 1
 
-        total = (base_price + extras_total) * multiplier
-
         # Deposit from percentage already captured during pricing lookup
         deposit_percentage = deposit_percentage_from_pricing
-        deposit_amount = Decimal('0')
-        if deposit_percentage > 0:
-            deposit_amount = (total * deposit_percentage / Decimal('100')).quantize(Decimal('0.01'))
+        total, deposit_amount = _quote_totals(base_price, extras_total, multiplier, deposit_percentage)
 
         return Response({
             'pickup_address': data['pickup_address'],
             'dropoff_address': data['dropoff_address'],
             'distance_km': float(distance_km) if distance_km else None,
             'duration_minutes': duration_minutes,
+            'distance_source': distance_source,
             'vehicle_category': vehicle_category.name,
             'base_price': float(base_price),
             'extras': extras_details,
@@ -320,6 +329,80 @@ class TransferViewSet(viewsets.ModelViewSet):
             'currency': SiteSettings.get_settings().default_currency
         })
 
+    def _quote_categories(self, data):
+        """Quote several vehicle categories against one geo-match and one distance lookup."""
+        from apps.vehicles.models import VehicleCategory
+        from apps.locations.pricing import pricing_engine
+
+        requested = data['vehicle_category_ids']
+        if requested != 'all':
+            categories = VehicleCategory.objects.in_bulk(requested)
+            unknown = [category_id for category_id in requested if category_id not in categories]
+            if unknown:
+                return Response(
+                    {'error': f'Unknown vehicle categories: {", ".join(map(str, unknown))}'},
+                    status=400
+                )
+
+        distance_km, duration_minutes, distance_source = _quote_distance(data)
+
+        quotes = pricing_engine.quote_categories(
+            data['pickup_latitude'], data['pickup_longitude'],
+            data['dropoff_latitude'], data['dropoff_longitude'],
+            distance_km=distance_km if distance_source == 'google' else None,
+            vehicle_category_ids=None if requested == 'all' else requested,
+        )
+        if requested == 'all':
+            categories = VehicleCategory.objects.in_bulk(list(quotes))
+
+        extras_total, extras_details = _quote_extras(data.get('extras', []))
+        multiplier = 2 if data.get('is_round_trip') else 1
+
+        results = []
+        unavailable = []
+        for category_id, pricing_quote in quotes.items():
+            category = categories.get(category_id)
+            if category is None:
+                continue
+            if not (pricing_quote and pricing_quote.options):
+                unavailable.append(category_id)
+                continue
+            base_price = pricing_quote.options[0].price
+            deposit_percentage = pricing_quote.deposit_percentage
+            total, deposit_amount = _quote_totals(base_price, extras_total, multiplier, deposit_percentage)
+            results.append({
+                'vehicle_category_id': category.id,
+                'vehicle_category': category.name,
+                'pricing_type': pricing_quote.method,
+                'base_price': float(base_price),
+                'extras_total': float(extras_total),
+                'multiplier': multiplier,
+                'total_price': float(total),
+                'deposit_percentage': float(deposit_percentage),
+                'deposit_amount': float(deposit_amount),
+            })
+
+        if not results:
+            return Response({'error': 'No pricing configured for this route.'}, status=400)
+
+        # Same order as VehicleCategory.Meta.ordering
+        results.sort(key=lambda q: (categories[q['vehicle_category_id']].order, q['vehicle_category']))
+
+        return Response({
+            'pickup_address': data['pickup_address'],
+            'dropoff_address': data['dropoff_address'],
+            'distance_km': float(distance_km) if distance_km else None,
+            'duration_minutes': duration_minutes,
+            'distance_source': distance_source,
+            'extras': extras_details,
+            'extras_total': float(extras_total),
+            'is_round_trip': data.get('is_round_trip', False),
+            'multiplier': multiplier,
+            'quotes': results,
+            'unavailable_category_ids': unavailable,
+            'currency': SiteSettings.get_settings().default_currency
+        })
+
     @action(detail=True, methods=['post'])
     def assign_driver(self, request, pk=None):
         """Assign a driver to a transfer (admin only)."""
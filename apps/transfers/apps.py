@@ -5,3 +5,6 @@ class TransfersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.transfers'
     verbose_name = 'Transfers'
+
+    def ready(self):
+        import apps.transfers.signals  # noqa
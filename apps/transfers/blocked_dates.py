@@ -0,0 +1,86 @@
+"""
+Blocked-date lookups from a compiled interval list.
+
+BlockedDate.covering runs on every priced search that carries a pickup date,
+and again when a booking is validated. The active blocks are compiled once
+per process into sorted, non-overlapping day intervals, each pointing at the
+block that covers it, and a lookup is a bisect. Any BlockedDate save or
+delete bumps a shared version, so every worker recompiles (see
+apps.transfers.signals).
+"""
+from bisect import bisect_right
+from datetime import timedelta
+
+from config.process_cache import ProcessCache
+
+BLOCKED_DATES_VERSION_KEY = 'transfers:blocked_dates:version'
+
+ONE_DAY = timedelta(days=1)
+
+
+class BlockedIntervals:
+    """
+    Active blocked dates as sorted, merged ``[start, end]`` day intervals.
+
+    Where blocks overlap, the one that starts latest wins, as with the old
+    query ordered by ``-start_date``. Adjacent days covered by the same block
+    are merged into one interval.
+    """
+
+    def __init__(self, blocks):
+        blocks = sorted(blocks, key=lambda b: (b.start_date, b.pk or 0))
+        bounds = sorted({b.start_date for b in blocks} | {b.end_date + ONE_DAY for b in blocks})
+        self.starts, self.ends, self.blocks = [], [], []
+        for start, stop in zip(bounds, bounds[1:]):
+            owner = None
+            for block in blocks:
+                if block.start_date <= start <= block.end_date:
+                    owner = block
+            if owner is None:
+                continue
+            if self.blocks and self.blocks[-1] is owner and self.ends[-1] + ONE_DAY == start:
+                self.ends[-1] = stop - ONE_DAY
+            else:
+                self.starts.append(start)
+                self.ends.append(stop - ONE_DAY)
+                self.blocks.append(owner)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def covering(self, day):
+        """Return the BlockedDate covering ``day``, or None."""
+        index = bisect_right(self.starts, day) - 1
+        if index >= 0 and day <= self.ends[index]:
+            return self.blocks[index]
+        return None
+
+    def days(self, start, end):
+        """Yield ``(day, BlockedDate)`` for every blocked day from ``start`` to ``end`` inclusive."""
+        index = max(bisect_right(self.starts, start) - 1, 0)
+        while index < len(self.starts) and self.starts[index] <= end:
+            day = max(self.starts[index], start)
+            last = min(self.ends[index], end)
+            while day <= last:
+                yield day, self.blocks[index]
+                day += ONE_DAY
+            index += 1
+
+
+def load_blocked_intervals(version=None):
+    """Compile the active BlockedDate rows."""
+    from .models import BlockedDate
+    return BlockedIntervals(BlockedDate.objects.filter(is_active=True))
+
+
+_blocked_intervals = ProcessCache(BLOCKED_DATES_VERSION_KEY, load_blocked_intervals)
+
+
+def blocked_intervals():
+    """The compiled blocked dates for the current version."""
+    return _blocked_intervals.get()
+
+
+def invalidate_blocked_dates():
+    """Make every worker recompile the blocked dates (after the current transaction commits)."""
+    _blocked_intervals.invalidate()
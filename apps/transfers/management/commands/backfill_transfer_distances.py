@@ -0,0 +1,67 @@
+import logging
+from django.core.management.base import BaseCommand
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Fill in missing driving distance/duration on transfers using batched Distance Matrix lookups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Transfers per batch lookup')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many transfers')
+
+    def handle(self, *args, **options):
+        from apps.transfers.models import Transfer
+        from apps.locations.services import calculate_distances_batch
+
+        batch_size = options['batch_size']
+        transfers = Transfer.objects.filter(
+            distance_km__isnull=True,
+            pickup_latitude__isnull=False,
+            pickup_longitude__isnull=False,
+            dropoff_latitude__isnull=False,
+            dropoff_longitude__isnull=False,
+        ).only(
+            'id', 'booking_ref', 'pickup_latitude', 'pickup_longitude',
+            'dropoff_latitude', 'dropoff_longitude', 'distance_km', 'duration_minutes',
+        ).order_by('id')
+        if options['limit']:
+            transfers = transfers[:options['limit']]
+
+        updated = 0
+        failed = 0
+        batch = []
+        for transfer in transfers.iterator(chunk_size=batch_size):
+            batch.append(transfer)
+            if len(batch) >= batch_size:
+                ok, bad = self._process(batch, calculate_distances_batch)
+                updated, failed = updated + ok, failed + bad
+                batch = []
+        if batch:
+            ok, bad = self._process(batch, calculate_distances_batch)
+            updated, failed = updated + ok, failed + bad
+
+        self.stdout.write(self.style.SUCCESS(f'Updated {updated} transfer(s), {failed} lookup(s) failed.'))
+
+    def _process(self, batch, calculate_distances_batch):
+        from apps.transfers.models import Transfer
+
+        results = calculate_distances_batch([
+            (t.pickup_latitude, t.pickup_longitude, t.dropoff_latitude, t.dropoff_longitude)
+            for t in batch
+        ])
+
+        to_update = []
+        failed = 0
+        for transfer, result in zip(batch, results):
+            if 'error' in result:
+                logger.warning('Distance backfill failed for transfer %s: %s', transfer.booking_ref, result['error'])
+                failed += 1
+                continue
+            transfer.distance_km = result['distance_km']
+            transfer.duration_minutes = result['duration_minutes']
+            to_update.append(transfer)
+
+        Transfer.objects.bulk_update(to_update, ['distance_km', 'duration_minutes'])
+        return len(to_update), failed
@@ -0,0 +1,70 @@
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# {row} is 'NEW.' in the trigger and empty in the backfill
+TRANSFER_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce({row}booking_ref, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce({row}customer_name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce({row}customer_email, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce({row}pickup_address, '') || ' ' || "
+    "coalesce({row}dropoff_address, '')), 'C')"
+)
+
+CREATE_SQL = [
+    f"""
+    CREATE OR REPLACE FUNCTION transfers_transfer_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {TRANSFER_VECTOR_SQL.format(row='NEW.')};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER transfers_transfer_search_vector_update
+    BEFORE INSERT OR UPDATE OF booking_ref, customer_name, customer_email, pickup_address, dropoff_address
+    ON transfers_transfer
+    FOR EACH ROW EXECUTE FUNCTION transfers_transfer_search_vector();
+    """,
+    f"UPDATE transfers_transfer SET search_vector = {TRANSFER_VECTOR_SQL.format(row='')};",
+    "CREATE INDEX transfers_transfer_search_vector_gin ON transfers_transfer USING gin (search_vector);",
+    "CREATE INDEX transfers_transfer_booking_ref_prefix ON transfers_transfer (booking_ref varchar_pattern_ops);",
+    "CREATE INDEX transfers_transfer_customer_name_trgm ON transfers_transfer USING gin (customer_name gin_trgm_ops);",
+    "CREATE INDEX transfers_transfer_customer_email_trgm ON transfers_transfer USING gin (customer_email gin_trgm_ops);",
+]
+
+DROP_SQL = [
+    "DROP INDEX IF EXISTS transfers_transfer_customer_email_trgm;",
+    "DROP INDEX IF EXISTS transfers_transfer_customer_name_trgm;",
+    "DROP INDEX IF EXISTS transfers_transfer_booking_ref_prefix;",
+    "DROP INDEX IF EXISTS transfers_transfer_search_vector_gin;",
+    "DROP TRIGGER IF EXISTS transfers_transfer_search_vector_update ON transfers_transfer;",
+    "DROP FUNCTION IF EXISTS transfers_transfer_search_vector();",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        # The search index is PostgreSQL only; other databases fall back to icontains
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transfers', '0011_transfer_review_email_sent'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='transfer',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(_run(CREATE_SQL), _run(DROP_SQL)),
+    ]
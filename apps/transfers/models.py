@@ -1,4 +1,5 @@
 import uuid
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
@@ -220,10 +221,18 @@ class Transfer(models.Model):
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
 
+    # Full-text search; kept current by a database trigger (see apps.transfers.search_index)
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         verbose_name = _('transfer')
         verbose_name_plural = _('transfers')
         ordering = ['-pickup_datetime']
+        indexes = [
+            # Keyset pagination (config.pagination)
+            models.Index(fields=['pickup_datetime', 'id'], name='transfer_pickup_keyset_idx'),
+            models.Index(fields=['created_at', 'id'], name='transfer_created_keyset_idx'),
+        ]
 
     def __str__(self):
         pickup_short = self.pickup_address[:30] + '...' if len(self.pickup_address) > 30 else self.pickup_address
@@ -334,9 +343,6 @@ class BlockedDate(models.Model):
 
     @classmethod
     def covering(cls, date):
-        """Return the active BlockedDate covering this date, or None."""
-        return cls.objects.filter(
-            is_active=True,
-            start_date__lte=date,
-            end_date__gte=date,
-        ).first()
+        """Return the active BlockedDate covering this date, or None (from the per-process interval list)."""
+        from .blocked_dates import blocked_intervals
+        return blocked_intervals().covering(date)
@@ -0,0 +1,148 @@
+"""
+Search for transfers, routes and trips.
+
+On PostgreSQL, Transfer.search_vector holds a 'simple' tsvector of the
+booking reference (weight A), customer name (A), email (B) and both
+addresses (C). The trigger installed by migration 0012 keeps it in step with
+the row, and it has a GIN index. Search terms are matched as prefixes, so
+results update while the user is still typing. booking_ref also gets a
+pattern index for prefix lookups, and customer name and email get trigram
+indexes so that typos still match.
+
+Routes and trips are small catalogue tables. Their translated columns are
+searched in the active language, plus the default language for untranslated
+content, using that language's text search configuration. Results are
+ranked.
+
+Other databases (the sqlite local settings) use the plain icontains filters.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.utils import translation
+
+# Text search configuration per site language; Arabic has no stemmer in older PostgreSQL
+SEARCH_CONFIGS = {
+    'en': 'english',
+    'fr': 'french',
+    'es': 'spanish',
+    'de': 'german',
+    'it': 'italian',
+    'pt': 'portuguese',
+}
+
+BOOKING_REF_PREFIX = 'TRF-'
+
+
+def use_search_index():
+    """True when the database supports the full-text and trigram search."""
+    return connection.vendor == 'postgresql'
+
+
+def prefix_tsquery(query):
+    """Raw tsquery matching every word of ``query`` as a prefix, or None if it has no words."""
+    words = re.findall(r'\w+', query)
+    if not words:
+        return None
+    return ' & '.join(f'{word}:*' for word in words)
+
+
+def search_config(language=None):
+    """Text search configuration for a language code (active language by default)."""
+    language = (language or translation.get_language() or settings.LANGUAGE_CODE).split('-')[0]
+    return SEARCH_CONFIGS.get(language, 'simple')
+
+
+def _localized_fields(field_names):
+    """Columns of translated fields for the active language and the default language."""
+    from modeltranslation.utils import build_localized_fieldname
+
+    default = settings.MODELTRANSLATION_DEFAULT_LANGUAGE
+    active = (translation.get_language() or default).split('-')[0]
+    languages = [default]
+    if active != default and active in settings.MODELTRANSLATION_LANGUAGES:
+        languages.insert(0, active)
+    return [
+        [build_localized_fieldname(name, language) for language in languages]
+        for name in field_names
+    ]
+
+
+def search_transfers(queryset, query):
+    """Filter ``queryset`` to transfers matching ``query``, best matches first."""
+    if not use_search_index():
+        return queryset.filter(
+            Q(booking_ref__icontains=query) |
+            Q(customer_name__icontains=query) |
+            Q(customer_email__icontains=query) |
+            Q(pickup_address__icontains=query) |
+            Q(dropoff_address__icontains=query)
+        )
+
+    from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+
+    ref = query.upper()
+    ref_match = Q(booking_ref__startswith=ref)
+    if not ref.startswith(BOOKING_REF_PREFIX):
+        ref_match |= Q(booking_ref__startswith=BOOKING_REF_PREFIX + ref)
+
+    match = ref_match | Q(customer_name__trigram_word_similar=query) | Q(customer_email__trigram_word_similar=query)
+    rank = TrigramWordSimilarity(query, 'customer_name')
+    tsquery = prefix_tsquery(query)
+    if tsquery:
+        text_query = SearchQuery(tsquery, search_type='raw', config='simple')
+        match |= Q(search_vector=text_query)
+        rank = rank + SearchRank(F('search_vector'), text_query)
+
+    return queryset.filter(match).annotate(
+        search_rank=rank + Case(When(ref_match, then=Value(1.0)), default=Value(0.0), output_field=FloatField()),
+    ).order_by('-search_rank', '-created_at')
+
+
+def _search_catalogue(queryset, query, weighted_fields):
+    """Ranked search of a translated model over ``(field, weight)`` pairs."""
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+
+    columns = _localized_fields([name for name, _ in weighted_fields])
+    config = search_config()
+    vector = None
+    for (name, weight), localized in zip(weighted_fields, columns):
+        for column in localized:
+            part = SearchVector(column, weight=weight, config=config)
+            vector = part if vector is None else vector + part
+
+    name_column = columns[0][0]
+    match = Q(**{f'{name_column}__trigram_word_similar': query})
+    rank = TrigramWordSimilarity(query, name_column)
+    tsquery = prefix_tsquery(query)
+    if tsquery:
+        text_query = SearchQuery(tsquery, search_type='raw', config=config)
+        queryset = queryset.annotate(search_vector=vector)
+        match |= Q(search_vector=text_query)
+        rank = rank + SearchRank(F('search_vector'), text_query)
+
+    return queryset.filter(match).annotate(search_rank=rank).order_by('-search_rank')
+
+
+def search_routes(queryset, query):
+    """Filter ``queryset`` to routes matching ``query`` in the active language, best first."""
+    if not use_search_index():
+        return queryset.filter(
+            Q(name__icontains=query) |
+            Q(origin_name__icontains=query) |
+            Q(destination_name__icontains=query)
+        )
+    return _search_catalogue(queryset, query, [('name', 'A'), ('origin_name', 'B'), ('destination_name', 'B')])
+
+
+def search_trips(queryset, query):
+    """Filter ``queryset`` to trips matching ``query`` in the active language, best first."""
+    if not use_search_index():
+        return queryset.filter(
+            Q(name__icontains=query) |
+            Q(description__icontains=query) |
+            Q(short_description__icontains=query)
+        )
+    return _search_catalogue(queryset, query, [('name', 'A'), ('short_description', 'B'), ('description', 'C')])
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .blocked_dates import invalidate_blocked_dates
+from .models import BlockedDate
+
+
+@receiver(post_save, sender=BlockedDate)
+@receiver(post_delete, sender=BlockedDate)
+def invalidate_blocked_date_intervals(sender, **kwargs):
+    """Recompile the blocked-date intervals in every worker."""
+    invalidate_blocked_dates()
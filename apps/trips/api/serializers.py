@@ -142,14 +142,12 @@ class TripBookingCreateSerializer(serializers.ModelSerializer):
     custom_field_values = serializers.JSONField(required=False, default=dict)
 
     def validate_custom_field_values(self, value):
-        from apps.accounts.models import CustomField
-        required_fields = CustomField.objects.filter(
-            is_active=True, is_required=True, applies_to__in=['trip', 'both']
-        ).values_list('name', flat=True)
-        for field_name in required_fields:
-            if field_name not in value or not str(value[field_name]).strip():
-                field = CustomField.objects.get(name=field_name)
-                raise serializers.ValidationError({field_name: f'{field.label} is required.'})
+        from apps.accounts.custom_field_schema import custom_field_schema
+        if not isinstance(value, dict):
+            raise serializers.ValidationError('Expected an object of custom field values.')
+        errors = custom_field_schema('trip').validate(value)
+        if errors:
+            raise serializers.ValidationError(errors)
         return value
 
     def create(self, validated_data):
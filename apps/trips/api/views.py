@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from apps.trips.models import Trip, TripSchedule, TripBooking
 from apps.accounts.permissions import HasAPIKeyOrIsAuthenticated
+from config.pagination import KeysetPagination
 from .serializers import (
     TripSerializer,
     TripListSerializer,
@@ -65,6 +66,9 @@ class TripBookingViewSet(viewsets.ModelViewSet):
     filterset_fields = ['status', 'trip', 'is_private', 'trip_date']
     search_fields = ['booking_ref', 'customer_name', 'customer_email']
     ordering_fields = ['trip_date', 'created_at', 'total_price']
+    pagination_class = KeysetPagination
+    # Same order as TripBooking.Meta.ordering, made unique by id
+    keyset_ordering = ('-trip_date', '-created_at', '-id')
 
     def get_permissions(self):
         if self.action == 'create':
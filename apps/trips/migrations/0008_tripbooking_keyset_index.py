@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0007_update_price_tier_fields'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tripbooking',
+            index=models.Index(fields=['trip_date', 'created_at', 'id'], name='tripbooking_date_keyset_idx'),
+        ),
+    ]
@@ -591,6 +591,9 @@ class TripBooking(models.Model):
         verbose_name = _('trip booking')
         verbose_name_plural = _('trip bookings')
         ordering = ['-trip_date', '-created_at']
+        indexes = [
+            models.Index(fields=['trip_date', 'created_at', 'id'], name='tripbooking_date_keyset_idx'),
+        ]
 
     def __str__(self):
         return f"{self.booking_ref} - {self.trip.name}"
@@ -0,0 +1,113 @@
+"""
+Precomputed vehicle option cards for pricing responses.
+
+A card holds everything a pricing response shows about a vehicle except the
+price: category and vehicle presentation fields, the primary image URL, the
+first four features and custom_info. Cards are built in batches per language
+and kept in process memory; any write to Vehicle, VehicleImage, VehicleFeature
+or VehicleCategory bumps the shared card version (see apps.vehicles.signals).
+"""
+import threading
+
+from django.conf import settings
+from django.db.models import Prefetch
+from django.utils import translation
+
+from config.process_cache import ProcessCache
+
+VEHICLE_CARD_VERSION_KEY = 'vehicles:cards:version'
+
+# Number of features shown on a card
+CARD_FEATURE_COUNT = 4
+
+
+def build_vehicle_card(vehicle):
+    """
+    Serialize the presentation fields of a vehicle in the active language.
+
+    Expects ``category`` selected, ``features`` prefetched and the primary
+    image prefetched into ``primary_images`` (see load_vehicle_cards).
+    """
+    category = vehicle.category
+    primary_image = vehicle.primary_images[0] if vehicle.primary_images else None
+    return {
+        'vehicle_id': vehicle.id,
+        'vehicle_name': vehicle.name,
+        'category_id': category.id,
+        'category_name': category.name,
+        'category_icon': category.icon,
+        'category_description': category.description or '',
+        'category_tagline': category.tagline or '',
+        'category_included_amenities': category.included_amenities or [],
+        'category_not_included': category.not_included or [],
+        'category_image': category.image.url if category.image else None,
+        'passengers': vehicle.passengers,
+        'luggage': vehicle.luggage,
+        'features': [f.name for f in list(vehicle.features.all())[:CARD_FEATURE_COUNT]],
+        'image': primary_image.image.url if primary_image else None,
+        'client_description': vehicle.client_description or '',
+        'key_features': vehicle.key_features or [],
+        'important_note': vehicle.important_note or '',
+        'important_note_type': vehicle.important_note_type or 'info',
+        'custom_info': vehicle.custom_info or {},
+    }
+
+
+def load_vehicle_cards(vehicle_ids, language):
+    """Build cards for ``vehicle_ids`` in ``language`` with a fixed number of queries."""
+    from apps.vehicles.models import Vehicle, VehicleImage
+
+    vehicles = Vehicle.objects.filter(id__in=vehicle_ids).select_related('category').prefetch_related(
+        'features',
+        Prefetch('images', queryset=VehicleImage.objects.filter(is_primary=True), to_attr='primary_images'),
+    )
+    with translation.override(language):
+        return {vehicle.id: build_vehicle_card(vehicle) for vehicle in vehicles}
+
+
+class VehicleCardCache:
+    """Process-wide cards keyed by language, then vehicle id."""
+
+    def __init__(self):
+        # version -> {language: {vehicle_id: card}}, filled lazily per vehicle
+        self._cards = ProcessCache(VEHICLE_CARD_VERSION_KEY, lambda version: {})
+        self._lock = threading.Lock()
+
+    def cards(self, vehicle_ids, language=None):
+        """Return {vehicle_id: card} for the given ids, building any that are missing."""
+        language = language or translation.get_language() or settings.LANGUAGE_CODE
+        by_language = self._cards.get()
+        cached = by_language.get(language)
+        if cached is None:
+            with self._lock:
+                cached = by_language.setdefault(language, {})
+        missing = [vehicle_id for vehicle_id in set(vehicle_ids) if vehicle_id not in cached]
+        if missing:
+            cached.update(load_vehicle_cards(missing, language))
+        return {vehicle_id: cached[vehicle_id] for vehicle_id in vehicle_ids if vehicle_id in cached}
+
+    def option(self, card, price, pricing_type, min_booking_hours=None):
+        """Merge a price into a copy of a card to form a vehicle option."""
+        option = dict(card)
+        option['price'] = float(price)
+        option['pricing_type'] = pricing_type
+        option['min_booking_hours'] = min_booking_hours
+        return option
+
+    def options(self, priced, pricing_type, language=None):
+        """Vehicle options for PricedVehicle tuples, in the same order."""
+        cards = self.cards([p.vehicle.id for p in priced], language)
+        return [
+            self.option(cards[p.vehicle.id], p.price, pricing_type, p.min_booking_hours)
+            for p in priced if p.vehicle.id in cards
+        ]
+
+    def version(self):
+        return self._cards.version()
+
+    def invalidate(self):
+        """Bump the card version so every worker rebuilds its cards."""
+        self._cards.invalidate()
+
+
+vehicle_cards = VehicleCardCache()
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+
+from .cards import vehicle_cards
+from .models import Vehicle, VehicleCategory, VehicleFeature, VehicleImage
+
+# Every model shown on a vehicle card
+CARD_MODELS = [Vehicle, VehicleCategory, VehicleFeature, VehicleImage]
+
+
+def invalidate_vehicle_cards(sender, **kwargs):
+    """Rebuild vehicle cards after any write to a card input."""
+    vehicle_cards.invalidate()
+
+
+for model in CARD_MODELS:
+    post_save.connect(invalidate_vehicle_cards, sender=model)
+    post_delete.connect(invalidate_vehicle_cards, sender=model)
+
+m2m_changed.connect(invalidate_vehicle_cards, sender=Vehicle.features.through)
@@ -0,0 +1,298 @@
+"""
+Keyset (cursor) pagination for the booking and payment listings.
+
+With offset pagination every page runs COUNT(*) over the whole result set,
+and the database walks past every skipped row, so deep pages get slower as
+the history grows. Keyset pagination orders on a unique key such as
+``(created_at, id)`` and asks for the rows after the last one shown. An
+index on those columns answers that directly, whatever the page.
+
+Cursors are opaque URL-safe strings. Counts are optional. On PostgreSQL they
+come from the planner's row estimate rather than a COUNT(*), unless the
+estimate is small enough to count exactly.
+"""
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet, ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def encode_cursor(values, reverse=False):
+    """Opaque cursor for the ordering key ``values``; ``reverse`` pages backwards."""
+    payload = {
+        'v': [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values],
+        'r': int(reverse),
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (values, reverse) for a cursor. Raises ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        return list(payload['v']), bool(payload.get('r'))
+    except (binascii.Error, TypeError, KeyError, AttributeError, UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise ValueError('Invalid cursor') from exc
+
+
+def _cursor_values(model, ordering, values):
+    """Convert decoded cursor values with their ordering fields. Raises ValueError if any does not fit."""
+    if len(values) != len(ordering):
+        raise ValueError('Invalid cursor')
+    converted = []
+    for name, value in zip(ordering, values):
+        field = model._meta.get_field(name.lstrip('-'))
+        try:
+            value = field.to_python(value)
+        except (DjangoValidationError, TypeError, ValueError) as exc:
+            raise ValueError('Invalid cursor') from exc
+        if value is None:
+            raise ValueError('Invalid cursor')
+        converted.append(value)
+    return converted
+
+
+def _after(ordering, values, forward):
+    """Q for rows after ``values`` in ``ordering`` (before them if not ``forward``)."""
+    fields = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+    match = Q()
+    equal = {}
+    for (name, descending), value in zip(fields, values):
+        lookup = 'lt' if descending == forward else 'gt'
+        match |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    # Redundant bound on the leading column so the index scan starts at the cursor
+    name, descending = fields[0]
+    bound = Q(**{f"{name}__{'lte' if descending == forward else 'gte'}": values[0]})
+    return bound & match
+
+
+class KeysetPage:
+    """One page of rows plus the cursors either side of it."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = None
+        self.count_is_estimate = False
+        self.querystring = ''
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def _url(self, cursor):
+        query = f'{self.querystring}&' if self.querystring else ''
+        return f'?{query}cursor={cursor}'
+
+    @property
+    def next_url(self):
+        return self._url(self.next_cursor) if self.next_cursor else None
+
+    @property
+    def previous_url(self):
+        return self._url(self.previous_cursor) if self.previous_cursor else None
+
+
+def keyset_paginate(queryset, ordering, cursor=None, per_page=20):
+    """
+    Page of ``queryset`` ordered by ``ordering``, starting at ``cursor``.
+
+    ``ordering`` must end in a unique field, e.g. ``('-created_at', '-id')``.
+    Raises ValueError for a malformed cursor.
+    """
+    values, reverse = decode_cursor(cursor) if cursor else (None, False)
+    if values is not None:
+        values = _cursor_values(queryset.model, ordering, values)
+
+    if reverse:
+        queryset = queryset.order_by(*[name[1:] if name.startswith('-') else f'-{name}' for name in ordering])
+    else:
+        queryset = queryset.order_by(*ordering)
+    if values is not None:
+        queryset = queryset.filter(_after(ordering, values, forward=not reverse))
+
+    rows = list(queryset[:per_page + 1])
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if reverse:
+        rows.reverse()
+    if not rows:
+        return KeysetPage(rows)
+
+    def key(row):
+        return [getattr(row, name.lstrip('-')) for name in ordering]
+
+    has_next = True if reverse else more
+    has_previous = more if reverse else values is not None
+    return KeysetPage(
+        rows,
+        next_cursor=encode_cursor(key(rows[-1])) if has_next else None,
+        previous_cursor=encode_cursor(key(rows[0]), reverse=True) if has_previous else None,
+    )
+
+
+def estimate_count(queryset):
+    """
+    Return (count, is_estimate) for a queryset.
+
+    On PostgreSQL with KEYSET_APPROXIMATE_COUNT, this is the planner's row
+    estimate. Estimates below KEYSET_EXACT_COUNT_BELOW are replaced by an
+    exact count, since counting a small result set is cheap.
+    """
+    queryset = queryset.order_by()
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql' or not getattr(settings, 'KEYSET_APPROXIMATE_COUNT', True):
+        return queryset.count(), False
+
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0, False
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    estimate = int(plan[0]['Plan']['Plan Rows'])
+    if estimate < getattr(settings, 'KEYSET_EXACT_COUNT_BELOW', 1000):
+        return queryset.count(), False
+    return estimate, True
+
+
+def keyset_page(request, queryset, ordering, per_page=20, with_count=True):
+    """Keyset page for a dashboard list view; a bad cursor shows the first page."""
+    try:
+        page = keyset_paginate(queryset, ordering, request.GET.get('cursor'), per_page)
+    except ValueError:
+        page = keyset_paginate(queryset, ordering, None, per_page)
+    if with_count:
+        page.count, page.count_is_estimate = estimate_count(queryset)
+    params = request.GET.copy()
+    params.pop('cursor', None)
+    params.pop('page', None)
+    page.querystring = params.urlencode()
+    return page
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination for API list endpoints.
+
+    Views set ``keyset_ordering`` (ending in a unique field). Responses keep
+    the ``count``/``next``/``previous``/``results`` shape. ``count`` is
+    omitted when the request passes ``count=false``. ``count_is_estimate``
+    says whether the count came from the planner. Requests with ``page`` or
+    ``ordering`` fall back to page-number pagination, so existing clients keep
+    working.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    ordering = ('-created_at', '-id')
+
+    def _use_offset(self, request):
+        params = request.query_params
+        return 'page' in params or api_settings.ORDERING_PARAM in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.offset = None
+        if self._use_offset(request):
+            self.offset = PageNumberPagination()
+            return self.offset.paginate_queryset(queryset, request, view)
+
+        ordering = getattr(view, 'keyset_ordering', self.ordering)
+        try:
+            self.page = keyset_paginate(
+                queryset, ordering, request.query_params.get(self.cursor_query_param), self.page_size,
+            )
+        except ValueError:
+            raise NotFound(_('Invalid cursor.'))
+
+        self.count = None
+        self.count_is_estimate = False
+        if request.query_params.get('count', 'true').lower() not in ('0', 'false', 'no'):
+            self.count, self.count_is_estimate = estimate_count(queryset)
+        return list(self.page)
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(remove_query_param(url, 'page'), self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        return self._link(self.page.next_cursor)
+
+    def get_previous_link(self):
+        return self._link(self.page.previous_cursor)
+
+    def get_paginated_response(self, data):
+        if self.offset is not None:
+            return self.offset.get_paginated_response(data)
+        body = OrderedDict()
+        if self.count is not None:
+            body['count'] = self.count
+            body['count_is_estimate'] = self.count_is_estimate
+        body['next'] = self.get_next_link()
+        body['previous'] = self.get_previous_link()
+        body['results'] = data
+        return Response(body)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'example': 123},
+                'count_is_estimate': {'type': 'boolean'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Cursor from the `next` or `previous` link.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': 'count',
+                'required': False,
+                'in': 'query',
+                'description': 'Set to `false` to skip the result count.',
+                'schema': {'type': 'boolean'},
+            },
+        ]
@@ -0,0 +1,90 @@
+"""
+Per-process caches kept coherent across gunicorn workers.
+
+Each cache holds an object built from the database in process memory and
+remembers the version token that was current when it was built. The token
+lives in the shared Django cache (Redis), so a write in one worker makes every
+other worker rebuild on its next access. While Redis cannot be read the last
+built object keeps being served, and is rebuilt at most once per
+``unknown_version_ttl`` seconds.
+"""
+import logging
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessCache:
+    """
+    Lazily built, process-local object invalidated through a shared version key.
+
+    ``builder`` is called with the version token the object is being built for.
+    Writers call ``invalidate()`` (usually from post_save/post_delete signals);
+    the version token is bumped once the surrounding transaction commits so
+    other workers never rebuild from uncommitted data.
+    """
+
+    # Seconds to keep serving a copy whose version cannot be checked
+    unknown_version_ttl = 30
+
+    def __init__(self, version_key, builder):
+        self.version_key = version_key
+        self.builder = builder
+        self._lock = threading.Lock()
+        # (version, value, built_at) swapped as a single reference so readers never see a torn pair
+        self._state = None
+
+    def version(self):
+        """Return the shared version token, creating it if Redis lost it."""
+        try:
+            version = cache.get(self.version_key)
+            if version is None:
+                cache.add(self.version_key, uuid.uuid4().hex, None)
+                version = cache.get(self.version_key)
+            return version
+        except Exception:
+            logger.warning('Could not read cache version %s', self.version_key, exc_info=True)
+            return None
+
+    def _current(self, state, version):
+        if state is None:
+            return False
+        if version is None:
+            # Redis is unreachable; a rebuild could not be told apart from this copy anyway
+            return time.monotonic() - state[2] < self.unknown_version_ttl
+        return state[0] == version
+
+    def get(self):
+        """Return the cached object, rebuilding it if the shared version moved."""
+        version = self.version()
+        state = self._state
+        if self._current(state, version):
+            return state[1]
+        with self._lock:
+            state = self._state
+            if self._current(state, version):
+                return state[1]
+            value = self.builder(version)
+            self._state = (version, value, time.monotonic())
+            return value
+
+    def invalidate(self):
+        """
+        Bump the shared version, and drop the local copy, after commit.
+
+        Until then this worker keeps the committed copy, so a rollback leaves
+        nothing stale behind.
+        """
+        transaction.on_commit(self._bump)
+
+    def _bump(self):
+        self._state = None
+        try:
+            cache.set(self.version_key, uuid.uuid4().hex, None)
+        except Exception:
+            logger.warning('Could not bump cache version %s', self.version_key, exc_info=True)
@@ -18,6 +18,7 @@ DJANGO_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.humanize',
+    'django.contrib.postgres',
 ]
 
 THIRD_PARTY_APPS = [
@@ -58,6 +59,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.accounts.middleware.APIKeyUsageMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -150,7 +152,10 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20,
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_THROTTLE_CLASSES': ['apps.accounts.throttles.APIKeyRateThrottle'],
-    'DEFAULT_THROTTLE_RATES': {'anon': '30/min'},
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': '30/min',
+        'bulk_quote': config('BULK_QUOTE_THROTTLE_RATE', default='10/min'),
+    },
     'EXCEPTION_HANDLER': 'config.exception_handler.custom_exception_handler',
 }
 
@@ -231,6 +236,24 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    'refresh-price-grid': {
+        'task': 'apps.locations.tasks.refresh_price_grid',
+        'schedule': config('PRICE_GRID_REFRESH_SECONDS', default=900, cast=int),
+    },
+    'flush-api-key-usage': {
+        'task': 'apps.accounts.tasks.flush_api_key_usage',
+        'schedule': config('API_KEY_USAGE_FLUSH_SECONDS', default=60, cast=int),
+    },
+    'rollup-api-key-usage': {
+        'task': 'apps.accounts.tasks.rollup_api_key_usage',
+        'schedule': config('API_KEY_USAGE_ROLLUP_SECONDS', default=3600, cast=int),
+    },
+    'log-distance-cache-stats': {
+        'task': 'apps.locations.tasks.log_distance_cache_stats',
+        'schedule': config('DISTANCE_CACHE_STATS_SECONDS', default=900, cast=int),
+    },
+}
 
 # Cache Settings
 CACHES = {
@@ -243,6 +266,49 @@ CACHES = {
     }
 }
 
+# Distance Matrix cache: coordinates are snapped to this many decimal places
+# (4 ≈ 11 m) before lookup; TTLs are in seconds
+DISTANCE_CACHE_PRECISION = config('DISTANCE_CACHE_PRECISION', default=4, cast=int)
+DISTANCE_CACHE_TTL = config('DISTANCE_CACHE_TTL', default=60 * 60 * 24 * 30, cast=int)
+DISTANCE_CACHE_NEGATIVE_TTL = config('DISTANCE_CACHE_NEGATIVE_TTL', default=300, cast=int)
+DISTANCE_CACHE_LOCAL_SIZE = config('DISTANCE_CACHE_LOCAL_SIZE', default=4096, cast=int)
+DISTANCE_CACHE_LOCAL_TTL = config('DISTANCE_CACHE_LOCAL_TTL', default=3600, cast=int)
+# Batch lookups: concurrent matrix requests and max pairs per API call
+DISTANCE_BATCH_WORKERS = config('DISTANCE_BATCH_WORKERS', default=8, cast=int)
+DISTANCE_BATCH_MAX_PAIRS = config('DISTANCE_BATCH_MAX_PAIRS', default=1000, cast=int)
+# Request-path lookups wait at most this long for Google before using haversine
+DISTANCE_LOOKUP_BUDGET_MS = config('DISTANCE_LOOKUP_BUDGET_MS', default=300, cast=int)
+DISTANCE_REFRESH_COOLDOWN = config('DISTANCE_REFRESH_COOLDOWN', default=60, cast=int)
+
+# get_pricing response cache (0 disables). All pricing (get_pricing, quotes, bookings) snaps
+# coordinates to PRICING_RESPONSE_CACHE_PRECISION decimals so cached and booked prices agree
+PRICING_RESPONSE_CACHE_TTL = config('PRICING_RESPONSE_CACHE_TTL', default=3600, cast=int)
+PRICING_RESPONSE_CACHE_PRECISION = config('PRICING_RESPONSE_CACHE_PRECISION', default=4, cast=int)
+
+# Bulk quote API: max legs per request and legs priced per chunk of the NDJSON stream
+BULK_QUOTE_MAX_LEGS = config('BULK_QUOTE_MAX_LEGS', default=2000, cast=int)
+BULK_QUOTE_CHUNK_SIZE = config('BULK_QUOTE_CHUNK_SIZE', default=200, cast=int)
+
+# Popular-route price grid: how long clients/CDN may reuse the latest grid before revalidating
+PRICE_GRID_MAX_AGE = config('PRICE_GRID_MAX_AGE', default=300, cast=int)
+
+# API key resolution cache: per-process LRU size and seconds a resolved key is trusted
+API_KEY_CACHE_SIZE = config('API_KEY_CACHE_SIZE', default=1024, cast=int)
+API_KEY_CACHE_TTL = config('API_KEY_CACHE_TTL', default=60, cast=int)
+# Requests an API key may make above its per-minute rate_limit in a short burst, by tier
+API_KEY_TIER_BURST = {
+    'free': config('API_KEY_BURST_FREE', default=0, cast=int),
+    'standard': config('API_KEY_BURST_STANDARD', default=20, cast=int),
+    'premium': config('API_KEY_BURST_PREMIUM', default=100, cast=int),
+}
+
+# Keyset pagination counts: use the PostgreSQL planner estimate, counting exactly below this many rows
+KEYSET_APPROXIMATE_COUNT = config('KEYSET_APPROXIMATE_COUNT', default=True, cast=bool)
+KEYSET_EXACT_COUNT_BELOW = config('KEYSET_EXACT_COUNT_BELOW', default=1000, cast=int)
+
+# Dashboard transfer calendar: longest window (days) one events request may cover
+CALENDAR_MAX_WINDOW_DAYS = config('CALENDAR_MAX_WINDOW_DAYS', default=62, cast=int)
+
 # Session Settings
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'